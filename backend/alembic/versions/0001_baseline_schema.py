@@ -0,0 +1,228 @@
+"""baseline schema
+
+Schema as previously created by Base.metadata.create_all(). Existing databases
+created that way should be stamped rather than upgraded: `alembic stamp 0001`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 06:20:43.301963
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('market_trends',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('ticker', sa.String(), nullable=False),
+    sa.Column('trend_type', sa.String(), nullable=False),
+    sa.Column('magnitude', sa.Float(), nullable=False),
+    sa.Column('detected_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('trend_metadata', sa.JSON(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_market_trends_detected_at'), 'market_trends', ['detected_at'], unique=False)
+    op.create_index(op.f('ix_market_trends_id'), 'market_trends', ['id'], unique=False)
+    op.create_index(op.f('ix_market_trends_ticker'), 'market_trends', ['ticker'], unique=False)
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('hashed_password', sa.String(), nullable=False),
+    sa.Column('full_name', sa.String(), nullable=True),
+    sa.Column('bio', sa.Text(), nullable=True),
+    sa.Column('reputation_score', sa.Float(), nullable=True),
+    sa.Column('is_verified', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_index(op.f('ix_users_reputation_score'), 'users', ['reputation_score'], unique=False)
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+    op.create_table('direct_messages',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sender_id', sa.Integer(), nullable=False),
+    sa.Column('recipient_id', sa.Integer(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('is_read', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['recipient_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['sender_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_direct_messages_created_at'), 'direct_messages', ['created_at'], unique=False)
+    op.create_index(op.f('ix_direct_messages_id'), 'direct_messages', ['id'], unique=False)
+    op.create_index(op.f('ix_direct_messages_is_read'), 'direct_messages', ['is_read'], unique=False)
+    op.create_index(op.f('ix_direct_messages_recipient_id'), 'direct_messages', ['recipient_id'], unique=False)
+    op.create_index(op.f('ix_direct_messages_sender_id'), 'direct_messages', ['sender_id'], unique=False)
+    op.create_table('follows',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('follower_id', sa.Integer(), nullable=False),
+    sa.Column('following_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['follower_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['following_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sqlite_autoincrement=True
+    )
+    op.create_index(op.f('ix_follows_created_at'), 'follows', ['created_at'], unique=False)
+    op.create_index(op.f('ix_follows_follower_id'), 'follows', ['follower_id'], unique=False)
+    op.create_index(op.f('ix_follows_following_id'), 'follows', ['following_id'], unique=False)
+    op.create_index(op.f('ix_follows_id'), 'follows', ['id'], unique=False)
+    op.create_table('posts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('author_id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('ticker', sa.String(), nullable=True),
+    sa.Column('insight_type', sa.Enum('FUNDAMENTAL_ANALYSIS', 'TECHNICAL_ANALYSIS', 'MACRO_COMMENTARY', 'EARNINGS_FORECAST', 'RISK_WARNING', name='insighttype'), nullable=False),
+    sa.Column('summary', sa.Text(), nullable=True),
+    sa.Column('quality_score', sa.Float(), nullable=True),
+    sa.Column('semantic_tags', sa.JSON(), nullable=True),
+    sa.Column('sector', sa.String(), nullable=True),
+    sa.Column('catalyst_type', sa.String(), nullable=True),
+    sa.Column('risk_profile', sa.String(), nullable=True),
+    sa.Column('llm_explanation', sa.Text(), nullable=True),
+    sa.Column('like_count', sa.Integer(), nullable=True),
+    sa.Column('dislike_count', sa.Integer(), nullable=True),
+    sa.Column('bullish_count', sa.Integer(), nullable=True),
+    sa.Column('bearish_count', sa.Integer(), nullable=True),
+    sa.Column('helpful_count', sa.Integer(), nullable=True),
+    sa.Column('view_count', sa.Integer(), nullable=True),
+    sa.Column('market_price_at_post', sa.Float(), nullable=True),
+    sa.Column('market_volume_at_post', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('comment_count', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['author_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_posts_author_id'), 'posts', ['author_id'], unique=False)
+    op.create_index(op.f('ix_posts_catalyst_type'), 'posts', ['catalyst_type'], unique=False)
+    op.create_index(op.f('ix_posts_created_at'), 'posts', ['created_at'], unique=False)
+    op.create_index(op.f('ix_posts_id'), 'posts', ['id'], unique=False)
+    op.create_index(op.f('ix_posts_insight_type'), 'posts', ['insight_type'], unique=False)
+    op.create_index(op.f('ix_posts_quality_score'), 'posts', ['quality_score'], unique=False)
+    op.create_index(op.f('ix_posts_risk_profile'), 'posts', ['risk_profile'], unique=False)
+    op.create_index(op.f('ix_posts_sector'), 'posts', ['sector'], unique=False)
+    op.create_index(op.f('ix_posts_ticker'), 'posts', ['ticker'], unique=False)
+    op.create_table('user_feed_preferences',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('preferred_sectors', sa.JSON(), nullable=True),
+    sa.Column('preferred_insight_types', sa.JSON(), nullable=True),
+    sa.Column('followed_tickers', sa.JSON(), nullable=True),
+    sa.Column('risk_tolerance', sa.String(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_user_feed_preferences_id'), 'user_feed_preferences', ['id'], unique=False)
+    op.create_index(op.f('ix_user_feed_preferences_user_id'), 'user_feed_preferences', ['user_id'], unique=True)
+    op.create_table('comments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('author_id', sa.Integer(), nullable=False),
+    sa.Column('parent_comment_id', sa.Integer(), nullable=True),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('like_count', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['author_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['parent_comment_id'], ['comments.id'], ),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_comments_author_id'), 'comments', ['author_id'], unique=False)
+    op.create_index(op.f('ix_comments_created_at'), 'comments', ['created_at'], unique=False)
+    op.create_index(op.f('ix_comments_id'), 'comments', ['id'], unique=False)
+    op.create_index(op.f('ix_comments_parent_comment_id'), 'comments', ['parent_comment_id'], unique=False)
+    op.create_index(op.f('ix_comments_post_id'), 'comments', ['post_id'], unique=False)
+    op.create_table('reactions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('reaction_type', sa.Enum('LIKE', 'DISLIKE', 'BULLISH', 'BEARISH', 'HELPFUL', name='reactiontype'), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sqlite_autoincrement=True
+    )
+    op.create_index(op.f('ix_reactions_id'), 'reactions', ['id'], unique=False)
+    op.create_index(op.f('ix_reactions_post_id'), 'reactions', ['post_id'], unique=False)
+    op.create_index(op.f('ix_reactions_user_id'), 'reactions', ['user_id'], unique=False)
+    op.create_table('comment_reactions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('comment_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['comment_id'], ['comments.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_comment_reactions_comment_id'), 'comment_reactions', ['comment_id'], unique=False)
+    op.create_index(op.f('ix_comment_reactions_id'), 'comment_reactions', ['id'], unique=False)
+    op.create_index(op.f('ix_comment_reactions_user_id'), 'comment_reactions', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_comment_reactions_user_id'), table_name='comment_reactions')
+    op.drop_index(op.f('ix_comment_reactions_id'), table_name='comment_reactions')
+    op.drop_index(op.f('ix_comment_reactions_comment_id'), table_name='comment_reactions')
+    op.drop_table('comment_reactions')
+    op.drop_index(op.f('ix_reactions_user_id'), table_name='reactions')
+    op.drop_index(op.f('ix_reactions_post_id'), table_name='reactions')
+    op.drop_index(op.f('ix_reactions_id'), table_name='reactions')
+    op.drop_table('reactions')
+    op.drop_index(op.f('ix_comments_post_id'), table_name='comments')
+    op.drop_index(op.f('ix_comments_parent_comment_id'), table_name='comments')
+    op.drop_index(op.f('ix_comments_id'), table_name='comments')
+    op.drop_index(op.f('ix_comments_created_at'), table_name='comments')
+    op.drop_index(op.f('ix_comments_author_id'), table_name='comments')
+    op.drop_table('comments')
+    op.drop_index(op.f('ix_user_feed_preferences_user_id'), table_name='user_feed_preferences')
+    op.drop_index(op.f('ix_user_feed_preferences_id'), table_name='user_feed_preferences')
+    op.drop_table('user_feed_preferences')
+    op.drop_index(op.f('ix_posts_ticker'), table_name='posts')
+    op.drop_index(op.f('ix_posts_sector'), table_name='posts')
+    op.drop_index(op.f('ix_posts_risk_profile'), table_name='posts')
+    op.drop_index(op.f('ix_posts_quality_score'), table_name='posts')
+    op.drop_index(op.f('ix_posts_insight_type'), table_name='posts')
+    op.drop_index(op.f('ix_posts_id'), table_name='posts')
+    op.drop_index(op.f('ix_posts_created_at'), table_name='posts')
+    op.drop_index(op.f('ix_posts_catalyst_type'), table_name='posts')
+    op.drop_index(op.f('ix_posts_author_id'), table_name='posts')
+    op.drop_table('posts')
+    op.drop_index(op.f('ix_follows_id'), table_name='follows')
+    op.drop_index(op.f('ix_follows_following_id'), table_name='follows')
+    op.drop_index(op.f('ix_follows_follower_id'), table_name='follows')
+    op.drop_index(op.f('ix_follows_created_at'), table_name='follows')
+    op.drop_table('follows')
+    op.drop_index(op.f('ix_direct_messages_sender_id'), table_name='direct_messages')
+    op.drop_index(op.f('ix_direct_messages_recipient_id'), table_name='direct_messages')
+    op.drop_index(op.f('ix_direct_messages_is_read'), table_name='direct_messages')
+    op.drop_index(op.f('ix_direct_messages_id'), table_name='direct_messages')
+    op.drop_index(op.f('ix_direct_messages_created_at'), table_name='direct_messages')
+    op.drop_table('direct_messages')
+    op.drop_index(op.f('ix_users_username'), table_name='users')
+    op.drop_index(op.f('ix_users_reputation_score'), table_name='users')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+    op.drop_index(op.f('ix_market_trends_ticker'), table_name='market_trends')
+    op.drop_index(op.f('ix_market_trends_id'), table_name='market_trends')
+    op.drop_index(op.f('ix_market_trends_detected_at'), table_name='market_trends')
+    op.drop_table('market_trends')
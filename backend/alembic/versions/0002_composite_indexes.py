@@ -0,0 +1,69 @@
+"""composite and unique indexes for hot queries
+
+Adds composite indexes matched to the feed, comment-thread and conversation
+queries, and enforces "one reaction per user per post", "one like per user per
+comment" and "no duplicate follows" in the database. Single-column indexes that
+become a prefix of the new ones are dropped to keep write cost down.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 06:20:45.954352
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _delete_duplicates(table: str, columns: Sequence[str]) -> None:
+    """Keep the oldest row per key so the unique index can be built"""
+    key = ", ".join(columns)
+    op.execute(
+        f"DELETE FROM {table} WHERE id NOT IN "
+        f"(SELECT keep_id FROM (SELECT MIN(id) AS keep_id FROM {table} GROUP BY {key}) AS keep)"
+    )
+
+
+def upgrade() -> None:
+    op.create_index('ix_posts_ticker_created_at', 'posts', ['ticker', 'created_at'], unique=False)
+    op.create_index('ix_comments_post_id_parent_comment_id_created_at', 'comments', ['post_id', 'parent_comment_id', 'created_at'], unique=False)
+    op.create_index('ix_direct_messages_sender_id_recipient_id_created_at', 'direct_messages', ['sender_id', 'recipient_id', 'created_at'], unique=False)
+
+    _delete_duplicates('reactions', ['post_id', 'user_id', 'reaction_type'])
+    op.create_index('uq_reactions_post_id_user_id_reaction_type', 'reactions', ['post_id', 'user_id', 'reaction_type'], unique=True)
+    _delete_duplicates('comment_reactions', ['comment_id', 'user_id'])
+    op.create_index('uq_comment_reactions_comment_id_user_id', 'comment_reactions', ['comment_id', 'user_id'], unique=True)
+    _delete_duplicates('follows', ['follower_id', 'following_id'])
+    op.create_index('uq_follows_follower_id_following_id', 'follows', ['follower_id', 'following_id'], unique=True)
+
+    # Now covered by the leading column of the composite indexes above
+    op.drop_index('ix_posts_ticker', table_name='posts')
+    op.drop_index('ix_comments_post_id', table_name='comments')
+    op.drop_index('ix_direct_messages_sender_id', table_name='direct_messages')
+    op.drop_index('ix_reactions_post_id', table_name='reactions')
+    op.drop_index('ix_comment_reactions_comment_id', table_name='comment_reactions')
+    op.drop_index('ix_follows_follower_id', table_name='follows')
+
+
+def downgrade() -> None:
+    op.create_index('ix_follows_follower_id', 'follows', ['follower_id'], unique=False)
+    op.create_index('ix_comment_reactions_comment_id', 'comment_reactions', ['comment_id'], unique=False)
+    op.create_index('ix_reactions_post_id', 'reactions', ['post_id'], unique=False)
+    op.create_index('ix_direct_messages_sender_id', 'direct_messages', ['sender_id'], unique=False)
+    op.create_index('ix_comments_post_id', 'comments', ['post_id'], unique=False)
+    op.create_index('ix_posts_ticker', 'posts', ['ticker'], unique=False)
+
+    op.drop_index('uq_follows_follower_id_following_id', table_name='follows')
+    op.drop_index('uq_comment_reactions_comment_id_user_id', table_name='comment_reactions')
+    op.drop_index('uq_reactions_post_id_user_id_reaction_type', table_name='reactions')
+    op.drop_index('ix_direct_messages_sender_id_recipient_id_created_at', table_name='direct_messages')
+    op.drop_index('ix_comments_post_id_parent_comment_id_created_at', table_name='comments')
+    op.drop_index('ix_posts_ticker_created_at', table_name='posts')
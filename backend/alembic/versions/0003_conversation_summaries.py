@@ -0,0 +1,69 @@
+"""conversation summaries for the message inbox
+
+One row per (user, conversation partner) with the last message and the unread
+count, maintained on send/read. Existing conversations are backfilled from
+direct_messages with a ROW_NUMBER() window over each user's partners.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 09:12:31.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BACKFILL_SQL = """
+INSERT INTO conversation_summaries (user_id, partner_id, last_message_id, last_message_at, unread_count)
+SELECT user_id, partner_id, id, COALESCE(created_at, CURRENT_TIMESTAMP), unread_count
+FROM (
+    SELECT sides.*,
+           ROW_NUMBER() OVER (PARTITION BY user_id, partner_id ORDER BY created_at DESC, id DESC) AS rn,
+           SUM(is_unread) OVER (PARTITION BY user_id, partner_id) AS unread_count
+    FROM (
+        SELECT id, created_at, sender_id AS user_id, recipient_id AS partner_id, 0 AS is_unread
+        FROM direct_messages
+        UNION ALL
+        SELECT id, created_at, recipient_id AS user_id, sender_id AS partner_id,
+               CASE WHEN is_read THEN 0 ELSE 1 END AS is_unread
+        FROM direct_messages
+    ) AS sides
+) AS ranked
+WHERE rn = 1
+"""
+
+
+def upgrade() -> None:
+    op.create_table('conversation_summaries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('partner_id', sa.Integer(), nullable=False),
+    sa.Column('last_message_id', sa.Integer(), nullable=False),
+    sa.Column('last_message_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('unread_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['last_message_id'], ['direct_messages.id'], ),
+    sa.ForeignKeyConstraint(['partner_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_conversation_summaries_id'), 'conversation_summaries', ['id'], unique=False)
+    op.create_index('uq_conversation_summaries_user_id_partner_id', 'conversation_summaries', ['user_id', 'partner_id'], unique=True)
+    op.create_index('ix_conversation_summaries_user_id_last_message_at', 'conversation_summaries', ['user_id', 'last_message_at'], unique=False)
+
+    op.execute(BACKFILL_SQL)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_conversation_summaries_user_id_last_message_at', table_name='conversation_summaries')
+    op.drop_index('uq_conversation_summaries_user_id_partner_id', table_name='conversation_summaries')
+    op.drop_index(op.f('ix_conversation_summaries_id'), table_name='conversation_summaries')
+    op.drop_table('conversation_summaries')
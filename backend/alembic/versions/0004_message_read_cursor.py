@@ -0,0 +1,36 @@
+"""per-conversation read cursor
+
+Adds conversation_summaries.last_read_message_id ("partner's messages up to
+this id are read") and backfills it from the newest message already marked read.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 10:04:52.771930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('conversation_summaries', sa.Column('last_read_message_id', sa.Integer(), nullable=True))
+    op.execute(
+        "UPDATE conversation_summaries SET last_read_message_id = ("
+        "SELECT MAX(direct_messages.id) FROM direct_messages "
+        "WHERE direct_messages.sender_id = conversation_summaries.partner_id "
+        "AND direct_messages.recipient_id = conversation_summaries.user_id "
+        "AND direct_messages.is_read)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('conversation_summaries', 'last_read_message_id')
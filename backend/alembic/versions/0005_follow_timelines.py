@@ -0,0 +1,67 @@
+"""home timelines for the following feed
+
+Adds users.follower_count (denormalized, chooses fan-out on write vs. on read)
+and timeline_entries (per-follower post ids). Both are backfilled: counts from
+follows, timelines with each follower's newest posts from followed authors.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 11:37:08.518244
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same defaults as settings.TIMELINE_MAX_ENTRIES / TIMELINE_FANOUT_MAX_FOLLOWERS
+TIMELINE_MAX_ENTRIES = 800
+FANOUT_MAX_FOLLOWERS = 10000
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('follower_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        "UPDATE users SET follower_count = ("
+        "SELECT COUNT(*) FROM follows WHERE follows.following_id = users.id)"
+    )
+
+    op.create_table('timeline_entries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('author_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['author_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_timeline_entries_user_id_post_id', 'timeline_entries', ['user_id', 'post_id'], unique=True)
+    op.create_index('ix_timeline_entries_user_id_author_id', 'timeline_entries', ['user_id', 'author_id'], unique=False)
+
+    op.execute(
+        "INSERT INTO timeline_entries (user_id, post_id, author_id) "
+        "SELECT user_id, post_id, author_id FROM ("
+        "  SELECT follows.follower_id AS user_id, posts.id AS post_id, posts.author_id AS author_id,"
+        "         ROW_NUMBER() OVER (PARTITION BY follows.follower_id ORDER BY posts.id DESC) AS rn"
+        "  FROM follows"
+        "  JOIN posts ON posts.author_id = follows.following_id"
+        "  JOIN users ON users.id = follows.following_id"
+        f"  WHERE users.follower_count <= {FANOUT_MAX_FOLLOWERS}"
+        ") AS ranked "
+        f"WHERE rn <= {TIMELINE_MAX_ENTRIES}"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_timeline_entries_user_id_author_id', table_name='timeline_entries')
+    op.drop_index('uq_timeline_entries_user_id_post_id', table_name='timeline_entries')
+    op.drop_table('timeline_entries')
+    op.drop_column('users', 'follower_count')
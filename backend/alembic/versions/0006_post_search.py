@@ -0,0 +1,90 @@
+"""full-text search over posts
+
+Adds post_tags (one row per post and lower-cased semantic tag, backfilled from
+posts.semantic_tags) and the inverted index the search service queries:
+a GIN index over a weighted tsvector on PostgreSQL, or an external-content FTS5
+table kept in sync by triggers on SQLite.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 14:02:51.730415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same expression as search_service.PG_DOCUMENT_SQL, or the planner will not use the index
+PG_DOCUMENT_SQL = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(summary, '') || ' ' || coalesce(semantic_tags::text, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'C')"
+)
+
+FTS5_COLUMNS = "title, summary, semantic_tags, content"
+
+
+def upgrade() -> None:
+    op.create_table('post_tags',
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('tag', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ),
+    sa.PrimaryKeyConstraint('post_id', 'tag')
+    )
+    op.create_index('ix_post_tags_tag_post_id', 'post_tags', ['tag', 'post_id'], unique=False)
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            "INSERT INTO post_tags (post_id, tag) "
+            "SELECT DISTINCT posts.id, lower(trim(tags.value)) "
+            "FROM posts, json_array_elements_text(posts.semantic_tags) AS tags(value) "
+            "WHERE json_typeof(posts.semantic_tags) = 'array' AND trim(tags.value) <> ''"
+        )
+        op.execute(f"CREATE INDEX ix_posts_fts_document ON posts USING GIN (({PG_DOCUMENT_SQL}))")
+    else:
+        op.execute(
+            "INSERT INTO post_tags (post_id, tag) "
+            "SELECT DISTINCT posts.id, lower(trim(tags.value)) "
+            "FROM posts, json_each(posts.semantic_tags) AS tags "
+            "WHERE json_type(posts.semantic_tags) = 'array' AND trim(tags.value) <> ''"
+        )
+        op.execute(
+            f"CREATE VIRTUAL TABLE posts_fts USING fts5({FTS5_COLUMNS}, "
+            "content='posts', content_rowid='id', tokenize='porter unicode61 remove_diacritics 2')"
+        )
+        new_row = "new.id, new.title, new.summary, new.semantic_tags, new.content"
+        old_row = "'delete', old.id, old.title, old.summary, old.semantic_tags, old.content"
+        op.execute(
+            "CREATE TRIGGER posts_fts_ai AFTER INSERT ON posts BEGIN "
+            f"INSERT INTO posts_fts(rowid, {FTS5_COLUMNS}) VALUES ({new_row}); END"
+        )
+        op.execute(
+            "CREATE TRIGGER posts_fts_ad AFTER DELETE ON posts BEGIN "
+            f"INSERT INTO posts_fts(posts_fts, rowid, {FTS5_COLUMNS}) VALUES ({old_row}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER posts_fts_au AFTER UPDATE OF {FTS5_COLUMNS} ON posts BEGIN "
+            f"INSERT INTO posts_fts(posts_fts, rowid, {FTS5_COLUMNS}) VALUES ({old_row}); "
+            f"INSERT INTO posts_fts(rowid, {FTS5_COLUMNS}) VALUES ({new_row}); END"
+        )
+        op.execute("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_posts_fts_document")
+    else:
+        op.execute("DROP TRIGGER IF EXISTS posts_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS posts_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS posts_fts_ai")
+        op.execute("DROP TABLE IF EXISTS posts_fts")
+    op.drop_index('ix_post_tags_tag_post_id', table_name='post_tags')
+    op.drop_table('post_tags')
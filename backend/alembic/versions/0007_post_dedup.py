@@ -0,0 +1,42 @@
+"""near-duplicate post detection
+
+Adds posts.canonical_post_id (the earlier post a near-duplicate copies),
+posts.minhash (its MinHash signature) and post_minhash_bands (LSH band keys of
+canonical posts). Existing posts are signed and linked by
+scripts/backfill_dedup.py rather than here.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 16:21:07.402183
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('posts', sa.Column('canonical_post_id', sa.Integer(), nullable=True))
+    op.add_column('posts', sa.Column('minhash', sa.LargeBinary(), nullable=True))
+    op.create_index(op.f('ix_posts_canonical_post_id'), 'posts', ['canonical_post_id'], unique=False)
+    op.create_table('post_minhash_bands',
+    sa.Column('band_key', sa.BigInteger(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ),
+    sa.PrimaryKeyConstraint('band_key', 'post_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('post_minhash_bands')
+    op.drop_index(op.f('ix_posts_canonical_post_id'), table_name='posts')
+    op.drop_column('posts', 'minhash')
+    op.drop_column('posts', 'canonical_post_id')
@@ -0,0 +1,36 @@
+"""post analysis tier
+
+Adds posts.analysis_tier: which pipeline stage produced a post's analysis
+(llm, local pre-score below the LLM threshold, duplicate of a canonical post,
+or fallback after an LLM error). Posts analyzed before triage are marked llm,
+or fallback where the summary is the fallback's "title: content..." stub.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 17:48:33.915620
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('posts', sa.Column('analysis_tier', sa.String(), nullable=True))
+    op.execute(
+        "UPDATE posts SET analysis_tier = CASE "
+        "WHEN summary = title || ': ' || substr(content, 1, 200) || '...' THEN 'fallback' ELSE 'llm' END "
+        "WHERE summary IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('posts', 'analysis_tier')
@@ -0,0 +1,50 @@
+"""ticker fundamentals
+
+Moves ticker_fundamentals out of the 0001 baseline. The table was added to the
+models after the original create_all() schema, so databases from that era that
+were stamped at 0001 never got it. Databases that already have the table (built
+by an earlier version of 0001, or by create_all() after it was added) are left
+as they are.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 19:02:11.408317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if 'ticker_fundamentals' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table('ticker_fundamentals',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('ticker', sa.String(), nullable=False),
+    sa.Column('market_cap', sa.Float(), nullable=True),
+    sa.Column('sector', sa.String(), nullable=True),
+    sa.Column('industry', sa.String(), nullable=True),
+    sa.Column('fundamentals', sa.JSON(), nullable=True),
+    sa.Column('earnings_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('refreshed_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ticker_fundamentals_id'), 'ticker_fundamentals', ['id'], unique=False)
+    op.create_index(op.f('ix_ticker_fundamentals_refreshed_at'), 'ticker_fundamentals', ['refreshed_at'], unique=False)
+    op.create_index(op.f('ix_ticker_fundamentals_ticker'), 'ticker_fundamentals', ['ticker'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_ticker_fundamentals_ticker'), table_name='ticker_fundamentals')
+    op.drop_index(op.f('ix_ticker_fundamentals_refreshed_at'), table_name='ticker_fundamentals')
+    op.drop_index(op.f('ix_ticker_fundamentals_id'), table_name='ticker_fundamentals')
+    op.drop_table('ticker_fundamentals')
@@ -0,0 +1,129 @@
+"""
+Caching helpers: in-process TTL/LRU cache and a Redis-backed shared cache
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from app.config import settings
+
+
+class TTLCache:
+    """Thread-safe in-process cache with per-entry TTL and LRU eviction"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SharedCache:
+    """
+    Bytes cache shared across workers through Redis (settings.REDIS_URL).
+    Falls back to an in-process TTLCache when Redis is not reachable, and
+    retries the connection periodically.
+    """
+
+    RETRY_SECONDS = 30.0
+
+    def __init__(self, url: Optional[str] = None, namespace: str = "ssi"):
+        self.url = url or settings.REDIS_URL
+        self.namespace = namespace
+        self._local = TTLCache(maxsize=512, ttl=60.0)
+        self._redis = None
+        self._next_attempt = 0.0
+        self._lock = threading.Lock()
+
+    def _client(self):
+        if self._redis is not None:
+            return self._redis
+        now = time.monotonic()
+        if now < self._next_attempt:
+            return None
+        with self._lock:
+            self._next_attempt = now + self.RETRY_SECONDS
+            try:
+                import redis
+                client = redis.Redis.from_url(self.url, socket_timeout=0.25, socket_connect_timeout=0.25)
+                client.ping()
+                self._redis = client
+            except Exception as e:
+                print(f"Shared cache: Redis unavailable ({e}), using in-process cache")
+                self._redis = None
+        return self._redis
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        client = self._client()
+        if client is not None:
+            try:
+                return client.get(self._key(key))
+            except Exception:
+                self._redis = None
+        return self._local.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float = 60.0) -> None:
+        self._local.set(key, value, ttl=ttl)
+        client = self._client()
+        if client is not None:
+            try:
+                client.set(self._key(key), value, px=int(ttl * 1000))
+            except Exception:
+                self._redis = None
+
+    def delete(self, key: str) -> None:
+        self._local.delete(key)
+        client = self._client()
+        if client is not None:
+            try:
+                client.delete(self._key(key))
+            except Exception:
+                self._redis = None
+
+
+_shared_cache: Optional[SharedCache] = None
+
+
+def get_shared_cache() -> SharedCache:
+    """Process-wide SharedCache instance"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = SharedCache()
+    return _shared_cache
@@ -9,17 +9,39 @@ from typing import List, Union
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite:///./social_stock_insights.db"
+    DATABASE_READ_REPLICA_URL: str = ""  # Optional replica for read-only endpoints
+    DB_POOL_SIZE: int = 5  # Persistent connections per engine, per worker
+    DB_MAX_OVERFLOW: int = 10  # Extra connections allowed under burst load
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # Reconnect before server/proxy idle timeouts
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0  # Max wait for a free connection
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
     
+    # Real-time push (SSE / WebSocket)
+    PUSH_HEARTBEAT_SECONDS: float = 15.0  # Keep-alive interval for idle connections
+    PUSH_QUEUE_SIZE: int = 100  # Buffered events per connection before dropping
+    PUSH_MAX_POST_CHANNELS: int = 50  # Post channels one connection may watch
+    
     # OpenAI
     OPENAI_API_KEY: str = ""
     OPENAI_MODEL: str = "gpt-4-turbo-preview"
     
     # Market Data
     MARKET_DATA_API_KEY: str = ""  # For Alpha Vantage or similar
-    MARKET_DATA_PROVIDER: str = "yfinance"  # yfinance, alphavantage, etc.
+    MARKET_DATA_PROVIDER: str = "yfinance"  # yfinance or replay (offline, deterministic)
+    MARKET_DATA_REPLAY_DIR: str = "./data/replay"  # Recorded data for the "replay" provider
+    MARKET_DATA_STORE_DIR: str = "./data/market"  # Local OHLCV bar store
+    MARKET_DATA_BAR_INTERVAL: str = "1d"
+    MARKET_DATA_BACKFILL_PERIOD: str = "1mo"  # History fetched for a ticker with no stored bars
+    MARKET_DATA_SYNC_INTERVAL_SECONDS: int = 60  # Min time between upstream bar syncs per ticker
+    MARKET_SNAPSHOT_TTL_SECONDS: int = 60  # How long a compact ranking snapshot is reused
+    FUNDAMENTALS_REFRESH_SECONDS: int = 86400  # Fundamentals/earnings change at most daily
+    
+    # Upstream circuit breakers (yfinance, StockTwits)
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 5  # Consecutive failures before opening
+    CIRCUIT_BREAKER_RECOVERY_SECONDS: float = 30.0  # Time open before a half-open probe
+    CIRCUIT_BREAKER_WINDOW_SECONDS: float = 60.0  # Rolling window for error-rate metrics
     
     # StockTwits (optional, for social sentiment)
     STOCKTWITS_API_KEY: str = ""  # RapidAPI key for StockTwits API
@@ -41,13 +63,50 @@ class Settings(BaseSettings):
     
     # Feed Settings
     FEED_PAGE_SIZE: int = 20
+    COMMENT_THREAD_MAX_DEPTH: int = 10  # Upper bound for the max_depth of thread requests
     MAX_TRENDING_TICKERS: int = 10
+    SEARCH_MAX_PAGE_SIZE: int = 50
+    SEARCH_MAX_TERMS: int = 12  # Extra query words are ignored
+    SEARCH_MAX_CANDIDATES: int = 2000  # Relevance ranks only the newest N matches
+    TIMELINE_MAX_ENTRIES: int = 800  # Post ids kept per home timeline (older pages fall off)
+    TIMELINE_FANOUT_MAX_FOLLOWERS: int = 10000  # Authors above this are merged in at read time
+    TIMELINE_FOLLOW_BACKFILL_POSTS: int = 50  # Recent posts copied into a timeline on follow
+    
+    # Post Embeddings (similar posts, semantic feed candidates)
+    EMBEDDING_INDEX_DIR: str = "./data/embeddings"  # Memory-mapped post vectors
+    EMBEDDING_DIM: int = 256  # Hashed TF-IDF buckets (changing it needs scripts/rebuild_embeddings.py)
+    EMBEDDING_LSH_TABLES: int = 32  # More tables = better recall, ~6 bytes per post per table
+    EMBEDDING_LSH_BITS: int = 12  # Bits per LSH key (max 16); fewer bits = bigger buckets
+    EMBEDDING_PROBE_BITS: int = 6  # Least certain bits per table considered for multi-probe flips
+    EMBEDDING_MAX_CANDIDATES: int = 20000  # Rows reranked exactly per lookup (smaller indexes are scanned)
+    EMBEDDING_REINDEX_PENDING: int = 5000  # Appended rows scanned before the LSH tables are rebuilt
+    EMBEDDING_SIMILAR_MAX: int = 50  # Page cap for /posts/{id}/similar
+    EMBEDDING_FEED_CANDIDATES: int = 50  # Posts like the user's liked posts boosted in the feed
+    EMBEDDING_INTEREST_POSTS: int = 20  # Recent liked/own posts that define a user's interests
+    
+    # Near-duplicate detection (MinHash/LSH at post creation)
+    DEDUP_THRESHOLD: float = 0.8  # Estimated Jaccard of word 3-gram shingles at which a post is a copy
+    
+    # Analysis triage (local pre-score before the LLM)
+    PRESCORE_LLM_THRESHOLD: float = 35.0  # Posts pre-scored below this keep the local analysis (0 = LLM for all)
+    PRESCORE_MODEL_PATH: str = "./data/prescore_model.json"  # Fitted weights (scripts/evaluate_prescorer.py --fit)
+    
+    # Feed explanations (cached per post, preference profile, ranking factors and market state)
+    EXPLANATION_CACHE_SIZE: int = 10000  # Cached explanations per worker (least recently used evicted)
+    EXPLANATION_CACHE_TTL_SECONDS: float = 3600.0  # Upper bound on how long one explanation is reused
+    EXPLANATION_PRICE_BUCKET_PCT: float = 2.0  # 24h price moves within the same bucket reuse an explanation
+    EXPLANATION_LLM_UPGRADE: bool = True  # Generate LLM phrasing in the background (False = template explanations only)
+    EXPLANATION_LLM_TOP_N: int = 5  # Top-ranked posts per feed that get the LLM upgrade
     
     # Reputation
     REPUTATION_DECAY_FACTOR: float = 0.95
     
     # JWT Secret Key
     SECRET_KEY: str = "your-secret-key-change-in-production-use-env-var"
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30.0  # How long a resolved caller is reused without a user query
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    BCRYPT_ROUNDS: int = 12  # Password hash cost (each +1 doubles hash/verify time)
+    PASSWORD_HASH_WORKERS: int = 2  # Threads for bcrypt; caps auth CPU per worker
     MIN_REPUTATION_FOR_VERIFIED: float = 50.0
     
     class Config:
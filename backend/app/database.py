@@ -1,15 +1,76 @@
 """
 Database configuration and session management
 """
+import time
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from app.config import settings
+from app.metrics import registry
 
-connect_args = {"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-engine = create_engine(settings.DATABASE_URL, connect_args=connect_args, pool_pre_ping=True)
+_pool_checkout_seconds = registry.histogram(
+    "db_pool_checkout_seconds", "Time spent waiting for a pooled database connection"
+)
+
+
+def get_async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL to its async driver (aiosqlite / asyncpg)"""
+    if url.startswith("sqlite:///"):
+        return url.replace("sqlite:///", "sqlite+aiosqlite:///", 1)
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return url.replace(prefix, "postgresql+asyncpg://", 1)
+    return url
+
+
+def _timed_pool_class(base, name: str):
+    """Pool subclass that records checkout wait time under the given pool label"""
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return base._do_get(self)
+        finally:
+            _pool_checkout_seconds.observe(time.perf_counter() - start, pool=name)
+    return type(f"Timed{base.__name__}", (base,), {"_do_get": _do_get})
+
+
+def _engine_kwargs(url: str, name: str, is_async: bool = False) -> dict:
+    """Pool settings shared by the sync and async engines"""
+    kwargs = {"pool_pre_ping": True}
+    if "sqlite" in url:
+        if not is_async:
+            kwargs["connect_args"] = {"check_same_thread": False}
+        if ":memory:" in url or url.rstrip("/").endswith("sqlite:"):
+            return kwargs  # in-memory SQLite keeps its single-connection pool
+    kwargs.update(
+        poolclass=_timed_pool_class(AsyncAdaptedQueuePool if is_async else QueuePool, name),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    )
+    return kwargs
+
+
+engine = create_engine(settings.DATABASE_URL, **_engine_kwargs(settings.DATABASE_URL, "primary"))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for request handlers, so DB waits don't block the event loop
+async_url = get_async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(async_url, **_engine_kwargs(async_url, "primary_async", is_async=True))
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Optional read replica for read-only endpoints; falls back to the primary
+if settings.DATABASE_READ_REPLICA_URL:
+    replica_url = get_async_database_url(settings.DATABASE_READ_REPLICA_URL)
+    async_read_engine = create_async_engine(replica_url, **_engine_kwargs(replica_url, "replica_async", is_async=True))
+    AsyncReadSessionLocal = async_sessionmaker(async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+else:
+    async_read_engine = async_engine
+    AsyncReadSessionLocal = AsyncSessionLocal
+
 Base = declarative_base()
 
 
@@ -21,3 +82,14 @@ def get_db():
     finally:
         db.close()
 
+
+async def get_async_db():
+    """Dependency for getting an async database session (primary, for writes)"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db():
+    """Dependency for getting a read-only async session (replica when configured)"""
+    async with AsyncReadSessionLocal() as db:
+        yield db
@@ -1,56 +1,105 @@
 """
 Dependencies for authentication and authorization
 """
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.cache import TTLCache
+from app.config import settings
+from app.database import get_async_db
+from app.metrics import registry
 from app import models
 from app.services.auth_service import decode_access_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+principal_cache_requests = registry.counter(
+    "principal_cache_requests_total", "Authenticated principal lookups, by result (hit/miss)"
+)
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> models.User:
-    """Get current authenticated user from JWT token"""
+
+class Principal:
+    """The authenticated caller: just what handlers need, without an ORM User"""
+    
+    __slots__ = ("id", "username", "is_verified")
+    
+    def __init__(self, id: int, username: str, is_verified: bool = False):
+        self.id = id
+        self.username = username
+        self.is_verified = bool(is_verified)
+    
+    def __repr__(self) -> str:
+        return f"Principal(id={self.id}, username={self.username!r})"
+
+
+# Per-process; the short TTL bounds staleness on workers that missed an invalidation
+_principal_cache = TTLCache(maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+def invalidate_principal(user_id: int) -> None:
+    """Drop a cached principal after the user row changed"""
+    _principal_cache.delete(user_id)
+
+
+def _credentials_error(detail: str = "Could not validate credentials") -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def resolve_principal(token: str, db: AsyncSession) -> Principal:
+    """Principal for a JWT, from the cache or (on a miss) one primary-key lookup"""
     payload = decode_access_token(token)
-    if payload is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    if payload is None or payload.get("sub") is None:
+        raise _credentials_error()
     
-    user_id: str = payload.get("sub")
-    if user_id is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    user_id = int(payload["sub"])
+    principal = _principal_cache.get(user_id)
+    if principal is not None:
+        principal_cache_requests.inc(result="hit")
+        return principal
     
-    user = db.query(models.User).filter(models.User.id == int(user_id)).first()
+    principal_cache_requests.inc(result="miss")
+    user = await db.get(models.User, user_id)
     if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _credentials_error("User not found")
+    
+    principal = Principal(user.id, user.username, user.is_verified)
+    _principal_cache.set(user_id, principal)
+    return principal
+
+
+async def get_current_principal(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """Authenticated caller without a per-request user query (cached for a few seconds)"""
+    return await resolve_principal(token, db)
+
+
+async def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+) -> models.User:
+    """Get current authenticated user from JWT token (full ORM row, for handlers that need it)"""
+    user = await db.get(models.User, principal.id)
+    if user is None:
+        invalidate_principal(principal.id)
+        raise _credentials_error("User not found")
     
     return user
 
 
 async def get_current_user_optional(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> models.User | None:
+    db: AsyncSession = Depends(get_async_db)
+) -> Optional[models.User]:
     """Get current user if authenticated, otherwise return None"""
     try:
-        return await get_current_user(token, db)
+        principal = await resolve_principal(token, db)
     except HTTPException:
         return None
-
-
+    return await db.get(models.User, principal.id)
@@ -1,48 +1,82 @@
 """
 FastAPI application entry point for Social Stock Insights Platform
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
-from app.routers import posts, users, feeds, analytics, market_data, sentiment, comments, messages, auth
+from fastapi.responses import PlainTextResponse
+from app.database import engine, async_engine, async_read_engine
+from app.routers import posts, users, feeds, analytics, market_data, sentiment, comments, messages, auth, stream, search
 from app.config import settings
+from app.metrics import registry
+from app.services.auth_service import shutdown_password_executor
+from app.services.shared import built_services, reset_services
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI(
-    title="Social Stock Insights API",
-    description="API for social-driven stock analysis platform",
-    version="1.0.0"
-)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Startup does no database or upstream work: the schema is managed by
+    `scripts/migrate.py` (run once per deploy) and services are built lazily on
+    first request. Shutdown releases pooled connections and shared services.
+    """
+    yield
+    push_service = built_services().get("push")
+    if push_service is not None:
+        await push_service.close()
+    reset_services()
+    shutdown_password_executor()
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
+    engine.dispose()
 
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.CORS_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 
-# Include routers
-app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
-app.include_router(posts.router, prefix="/api/posts", tags=["posts"])
-app.include_router(users.router, prefix="/api/users", tags=["users"])
-app.include_router(feeds.router, prefix="/api/feeds", tags=["feeds"])
-app.include_router(analytics.router, prefix="/api/analytics", tags=["analytics"])
-app.include_router(market_data.router, prefix="/api/market", tags=["market"])
-app.include_router(sentiment.router, prefix="/api/sentiment", tags=["sentiment"])
-app.include_router(comments.router, prefix="/api/comments", tags=["comments"])
-app.include_router(messages.router, prefix="/api/messages", tags=["messages"])
+def create_app() -> FastAPI:
+    """Build the FastAPI application"""
+    app = FastAPI(
+        title="Social Stock Insights API",
+        description="API for social-driven stock analysis platform",
+        version="1.0.0",
+        lifespan=lifespan
+    )
+    
+    # CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.CORS_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    
+    # Include routers
+    app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
+    app.include_router(posts.router, prefix="/api/posts", tags=["posts"])
+    app.include_router(users.router, prefix="/api/users", tags=["users"])
+    app.include_router(feeds.router, prefix="/api/feeds", tags=["feeds"])
+    app.include_router(analytics.router, prefix="/api/analytics", tags=["analytics"])
+    app.include_router(market_data.router, prefix="/api/market", tags=["market"])
+    app.include_router(sentiment.router, prefix="/api/sentiment", tags=["sentiment"])
+    app.include_router(comments.router, prefix="/api/comments", tags=["comments"])
+    app.include_router(messages.router, prefix="/api/messages", tags=["messages"])
+    app.include_router(stream.router, prefix="/api/stream", tags=["stream"])
+    app.include_router(search.router, prefix="/api/search", tags=["search"])
+    
+    @app.get("/")
+    async def root():
+        return {"message": "Social Stock Insights API", "version": "1.0.0"}
+    
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+    
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        """Prometheus-format metrics (upstream circuit breakers, etc.)"""
+        return registry.render()
+    
+    return app
 
 
-@app.get("/")
-async def root():
-    return {"message": "Social Stock Insights API", "version": "1.0.0"}
-
-
-@app.get("/health")
-async def health():
-    return {"status": "healthy"}
-
+app = create_app()
@@ -0,0 +1,127 @@
+"""
+Lightweight in-process metrics registry with Prometheus text exposition
+"""
+import threading
+from typing import Dict, List, Optional, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = list(key) + sorted((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    """Monotonically increasing value per label set"""
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(k)} {v}" for k, v in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    """Value that can go up and down per label set"""
+    type_name = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set"""
+    type_name = "histogram"
+
+    DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, name: str, documentation: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[LabelKey, List[float]] = {}  # bucket counts + [sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            counts = self._values.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    def summary(self, **labels) -> Dict[str, float]:
+        counts = self._values.get(_label_key(labels))
+        if not counts or not counts[-1]:
+            return {"count": 0, "sum": 0.0, "avg": 0.0}
+        return {"count": counts[-1], "sum": counts[-2], "avg": counts[-2] / counts[-1]}
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, counts in sorted(self._values.items()):
+            for i, bound in enumerate(self.buckets):
+                lines.append(f"{self.name}_bucket{_format_labels(key, {'le': str(bound)})} {counts[i]}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, {'le': '+Inf'})} {counts[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {counts[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {counts[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds named metrics; re-registering a name returns the existing metric"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, documentation: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, documentation, **kwargs)
+                self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        return self._get_or_create(Counter, name, documentation)
+
+    def gauge(self, name: str, documentation: str) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation)
+
+    def histogram(self, name: str, documentation: str, **kwargs) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, **kwargs)
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
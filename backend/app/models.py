@@ -1,8 +1,8 @@
 """
 Database models for Social Stock Insights Platform
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, ForeignKey, JSON, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, Text, Boolean, ForeignKey, JSON, Enum, Index, LargeBinary
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from app.database import Base
 import enum
@@ -35,6 +35,7 @@ class User(Base):
     bio = Column(Text, nullable=True)
     reputation_score = Column(Float, default=0.0, index=True)
     is_verified = Column(Boolean, default=False)
+    follower_count = Column(Integer, nullable=False, default=0, server_default="0")  # Denormalized; picks the timeline fan-out path
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -55,7 +56,7 @@ class Post(Base):
     author_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     title = Column(String, nullable=False)
     content = Column(Text, nullable=False)
-    ticker = Column(String, index=True)  # Stock ticker symbol
+    ticker = Column(String)  # Stock ticker symbol (indexed with created_at below)
     insight_type = Column(Enum(InsightType), nullable=False, index=True)
     
     # LLM-generated fields
@@ -66,6 +67,9 @@ class Post(Base):
     catalyst_type = Column(String, index=True)
     risk_profile = Column(String, index=True)
     llm_explanation = Column(Text, nullable=True)  # Why this post was recommended
+    analysis_tier = Column(String, nullable=True)  # Who produced the fields above: llm, local, duplicate or fallback
+    canonical_post_id = Column(Integer, nullable=True, index=True)  # Near-duplicate of this post (shares its analysis)
+    minhash = deferred(Column(LargeBinary, nullable=True))  # Dedup signature; deferred so feeds never load it
     
     # Engagement metrics
     like_count = Column(Integer, default=0)
@@ -88,13 +92,18 @@ class Post(Base):
     reactions = relationship("Reaction", back_populates="post", cascade="all, delete-orphan")
     comments = relationship("Comment", back_populates="post", cascade="all, delete-orphan")
     comment_count = Column(Integer, default=0)  # Denormalized count for performance
+    
+    __table_args__ = (
+        # Ticker feeds: WHERE ticker = ? ORDER BY created_at DESC
+        Index("ix_posts_ticker_created_at", "ticker", "created_at"),
+    )
 
 
 class Reaction(Base):
     __tablename__ = "reactions"
     
     id = Column(Integer, primary_key=True, index=True)
-    post_id = Column(Integer, ForeignKey("posts.id"), nullable=False, index=True)
+    post_id = Column(Integer, ForeignKey("posts.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     reaction_type = Column(Enum(ReactionType), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -103,8 +112,9 @@ class Reaction(Base):
     post = relationship("Post", back_populates="reactions")
     user = relationship("User", back_populates="reactions")
     
-    # Unique constraint: one reaction type per user per post
+    # Unique constraint: one reaction type per user per post (also serves post_id lookups)
     __table_args__ = (
+        Index("uq_reactions_post_id_user_id_reaction_type", "post_id", "user_id", "reaction_type", unique=True),
         {"sqlite_autoincrement": True},
     )
 
@@ -120,6 +130,20 @@ class MarketTrend(Base):
     trend_metadata = Column(JSON, default=dict)  # Renamed from 'metadata' to avoid SQLAlchemy conflict
 
 
+class TickerFundamentals(Base):
+    """Slow-changing fundamentals and earnings calendar per ticker, refreshed daily"""
+    __tablename__ = "ticker_fundamentals"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    ticker = Column(String, unique=True, index=True, nullable=False)
+    market_cap = Column(Float, nullable=True)
+    sector = Column(String, nullable=True)
+    industry = Column(String, nullable=True)
+    fundamentals = Column(JSON, default=dict)
+    earnings_date = Column(DateTime(timezone=True), nullable=True)  # Most recent/next earnings date
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+
 class UserFeedPreference(Base):
     __tablename__ = "user_feed_preferences"
     
@@ -137,7 +161,7 @@ class Comment(Base):
     __tablename__ = "comments"
     
     id = Column(Integer, primary_key=True, index=True)
-    post_id = Column(Integer, ForeignKey("posts.id"), nullable=False, index=True)
+    post_id = Column(Integer, ForeignKey("posts.id"), nullable=False)
     author_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     parent_comment_id = Column(Integer, ForeignKey("comments.id"), nullable=True, index=True)  # For nested replies
     content = Column(Text, nullable=False)
@@ -150,6 +174,11 @@ class Comment(Base):
     author = relationship("User", back_populates="comments", foreign_keys=[author_id])
     parent_comment = relationship("Comment", remote_side=[id], backref="replies")
     reactions = relationship("CommentReaction", back_populates="comment", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Post threads: WHERE post_id = ? AND parent_comment_id IS NULL ORDER BY created_at
+        Index("ix_comments_post_id_parent_comment_id_created_at", "post_id", "parent_comment_id", "created_at"),
+    )
 
 
 class CommentReaction(Base):
@@ -157,13 +186,18 @@ class CommentReaction(Base):
     __tablename__ = "comment_reactions"
     
     id = Column(Integer, primary_key=True, index=True)
-    comment_id = Column(Integer, ForeignKey("comments.id"), nullable=False, index=True)
+    comment_id = Column(Integer, ForeignKey("comments.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     comment = relationship("Comment", back_populates="reactions")
     user = relationship("User")
+    
+    # Unique constraint: one like per user per comment
+    __table_args__ = (
+        Index("uq_comment_reactions_comment_id_user_id", "comment_id", "user_id", unique=True),
+    )
 
 
 class DirectMessage(Base):
@@ -171,7 +205,7 @@ class DirectMessage(Base):
     __tablename__ = "direct_messages"
     
     id = Column(Integer, primary_key=True, index=True)
-    sender_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    sender_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     recipient_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     content = Column(Text, nullable=False)
     is_read = Column(Boolean, default=False, index=True)
@@ -180,6 +214,11 @@ class DirectMessage(Base):
     # Relationships
     sender = relationship("User", back_populates="sent_messages", foreign_keys=[sender_id])
     recipient = relationship("User", back_populates="received_messages", foreign_keys=[recipient_id])
+    
+    __table_args__ = (
+        # Conversations: (sender, recipient) pairs in both directions ORDER BY created_at
+        Index("ix_direct_messages_sender_id_recipient_id_created_at", "sender_id", "recipient_id", "created_at"),
+    )
 
 
 class Follow(Base):
@@ -187,7 +226,7 @@ class Follow(Base):
     __tablename__ = "follows"
     
     id = Column(Integer, primary_key=True, index=True)
-    follower_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    follower_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     following_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     
@@ -195,8 +234,71 @@ class Follow(Base):
     follower = relationship("User", back_populates="following", foreign_keys=[follower_id])
     following = relationship("User", back_populates="followers", foreign_keys=[following_id])
     
-    # Unique constraint: prevent duplicate follows
+    # Unique constraint: prevent duplicate follows (also serves follower_id lookups)
     __table_args__ = (
+        Index("uq_follows_follower_id_following_id", "follower_id", "following_id", unique=True),
         {"sqlite_autoincrement": True},
     )
 
+
+
+class ConversationSummary(Base):
+    """Per-user inbox row for one conversation partner (two rows per user pair)"""
+    __tablename__ = "conversation_summaries"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    partner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    last_message_id = Column(Integer, ForeignKey("direct_messages.id"), nullable=False)
+    last_message_at = Column(DateTime(timezone=True), nullable=False)
+    unread_count = Column(Integer, nullable=False, default=0)  # Messages from partner not yet read by user
+    last_read_message_id = Column(Integer, nullable=True)  # Read cursor: partner's messages up to this id are read
+    
+    # Relationships
+    partner = relationship("User", foreign_keys=[partner_id])
+    last_message = relationship("DirectMessage", foreign_keys=[last_message_id])
+    
+    __table_args__ = (
+        # Upsert target on send/read
+        Index("uq_conversation_summaries_user_id_partner_id", "user_id", "partner_id", unique=True),
+        # Inbox: one user's conversations ORDER BY last_message_at DESC
+        Index("ix_conversation_summaries_user_id_last_message_at", "user_id", "last_message_at"),
+    )
+
+
+class TimelineEntry(Base):
+    """Post pushed into a follower's home timeline at write time (fan-out on write)"""
+    __tablename__ = "timeline_entries"
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # Timeline owner (the follower)
+    post_id = Column(Integer, ForeignKey("posts.id"), nullable=False)
+    author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    
+    __table_args__ = (
+        # Timeline page: WHERE user_id = ? AND post_id < cursor ORDER BY post_id DESC (unique keeps fan-out idempotent)
+        Index("uq_timeline_entries_user_id_post_id", "user_id", "post_id", unique=True),
+        # Unfollow: drop one author's entries from a timeline
+        Index("ix_timeline_entries_user_id_author_id", "user_id", "author_id"),
+    )
+
+
+class PostTag(Base):
+    """One row per (post, semantic tag): exact tag filters without scanning JSON"""
+    __tablename__ = "post_tags"
+    
+    post_id = Column(Integer, ForeignKey("posts.id"), primary_key=True)
+    tag = Column(String, primary_key=True)  # Lower-cased, e.g. "sector:tech"
+    
+    __table_args__ = (
+        # Posts carrying a tag, newest first (per-post checks use the primary key)
+        Index("ix_post_tags_tag_post_id", "tag", "post_id"),
+    )
+
+
+class PostMinHashBand(Base):
+    """LSH bucket of a canonical post: posts sharing any band key are near-duplicate candidates"""
+    __tablename__ = "post_minhash_bands"
+    
+    band_key = Column(BigInteger, primary_key=True)  # Band number << 32 | hash of the band's rows
+    post_id = Column(Integer, ForeignKey("posts.id"), primary_key=True)
@@ -1,41 +1,55 @@
 """
 Analytics router for dashboard metrics and insights
 """
+import json
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, desc
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy import select, func, desc
 from datetime import datetime, timedelta, timezone
 from typing import Optional, List, Dict
-from app.database import get_db
+from app.config import settings
+from app.database import get_async_read_db
 from app import models, schemas
+from app.services.explanation_service import ExplanationService
+from app.services.llm_service import LLMService
 from app.services.market_data_service import MarketDataService
+from app.services.shared import get_llm_service, get_market_service, get_explanation_service
 
 router = APIRouter()
-market_service = MarketDataService()
 
 
 @router.get("/dashboard", response_model=schemas.AnalyticsResponse)
-async def get_dashboard_analytics(db: Session = Depends(get_db)):
+async def get_dashboard_analytics(
+    db: AsyncSession = Depends(get_async_read_db),
+    market_service: MarketDataService = Depends(get_market_service)
+):
     """Get dashboard analytics including trending tickers, top insights, etc."""
     # Get trending tickers
-    trending_tickers = await get_trending_tickers(limit=10, db=db)
+    trending_tickers = await get_trending_tickers(limit=10, db=db, market_service=market_service)
     
     # Get top insights (by quality score and engagement) with author relationship
-    top_insights = db.query(models.Post).options(joinedload(models.Post.author)).order_by(
-        desc(models.Post.quality_score),
-        desc(models.Post.helpful_count)
-    ).limit(10).all()
+    top_insights = (await db.execute(
+        select(models.Post).options(joinedload(models.Post.author)).order_by(
+            desc(models.Post.quality_score),
+            desc(models.Post.helpful_count)
+        ).limit(10)
+    )).scalars().all()
     
     # Get top users by reputation
-    top_users = db.query(models.User).order_by(
-        desc(models.User.reputation_score)
-    ).limit(10).all()
+    top_users = (await db.execute(
+        select(models.User).order_by(desc(models.User.reputation_score)).limit(10)
+    )).scalars().all()
     
     # Calculate aggregated sentiment (optimized with SQL aggregation)
-    sentiment_result = db.query(
-        func.sum(models.Post.bullish_count).label('total_bullish'),
-        func.sum(models.Post.bearish_count).label('total_bearish')
-    ).first()
+    sentiment_result = (await db.execute(
+        select(
+            func.sum(models.Post.bullish_count).label('total_bullish'),
+            func.sum(models.Post.bearish_count).label('total_bearish')
+        )
+    )).first()
     
     total_bullish = sentiment_result.total_bullish or 0
     total_bearish = sentiment_result.total_bearish or 0
@@ -68,16 +82,20 @@ async def get_dashboard_analytics(db: Session = Depends(get_db)):
 
 
 @router.get("/trending-tickers", response_model=List[schemas.TrendingTicker])
-async def get_trending_tickers(limit: int = 10, db: Session = Depends(get_db)):
+async def get_trending_tickers(
+    limit: int = 10,
+    db: AsyncSession = Depends(get_async_read_db),
+    market_service: MarketDataService = Depends(get_market_service)
+):
     """Get trending tickers with parallel market data fetching"""
     from datetime import datetime, timedelta, timezone
     from concurrent.futures import ThreadPoolExecutor, as_completed
     
     # Get posts from last 24 hours
     yesterday = datetime.now(timezone.utc) - timedelta(days=1)
-    recent_posts = db.query(models.Post).filter(
-        models.Post.created_at >= yesterday
-    ).all()
+    recent_posts = (await db.execute(
+        select(models.Post).where(models.Post.created_at >= yesterday)
+    )).scalars().all()
     
     # Count posts per ticker
     ticker_counts = {}
@@ -106,13 +124,17 @@ async def get_trending_tickers(limit: int = 10, db: Session = Depends(get_db)):
             print(f"Error fetching market data for {ticker}: {e}")
             return ticker, {}
     
-    # Use ThreadPoolExecutor for parallel market data fetching
-    market_data_dict = {}
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        futures = {executor.submit(fetch_market_data, ticker): ticker for ticker, _ in top_tickers}
-        for future in as_completed(futures):
-            ticker, market_data = future.result()
-            market_data_dict[ticker] = market_data
+    # Use ThreadPoolExecutor for parallel market data fetching, off the event loop
+    def fetch_all_market_data():
+        market_data_dict = {}
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = {executor.submit(fetch_market_data, ticker): ticker for ticker, _ in top_tickers}
+            for future in as_completed(futures):
+                ticker, market_data = future.result()
+                market_data_dict[ticker] = market_data
+        return market_data_dict
+    
+    market_data_dict = await run_in_threadpool(fetch_all_market_data)
     
     # Build trending tickers list
     trending_tickers = []
@@ -145,39 +167,9 @@ async def get_trending_tickers(limit: int = 10, db: Session = Depends(get_db)):
     return trending_tickers
 
 
-@router.get("/explanation/{post_id}", response_model=schemas.ExplanationResponse)
-async def get_post_explanation(
-    post_id: int,
-    user_id: Optional[int] = None,
-    db: Session = Depends(get_db)
-):
-    """Get LLM-generated explanation for why a post is recommended"""
-    from app.services.llm_service import LLMService
-    
-    post = db.query(models.Post).options(joinedload(models.Post.author)).filter(models.Post.id == post_id).first()
-    if not post:
-        raise HTTPException(status_code=404, detail="Post not found")
-    
-    # Get market context for enhanced explanation
-    market_context = None
-    if post.ticker:
-        market_context = market_service.get_market_context([post.ticker], include_sentiment=True)
-    
-    # If explanation already exists, return it
-    if post.llm_explanation:
-        return {
-            "explanation": post.llm_explanation,
-            "factors": {
-                "quality_score": post.quality_score,
-                "author_reputation": post.author.reputation_score if post.author else 0,
-                "engagement": post.helpful_count + post.like_count
-            },
-            "confidence_score": min(post.quality_score / 100.0, 1.0)
-        }
-    
-    # Generate new explanation with market context
-    llm_service = LLMService()
-    post_data = {
+def _explanation_post_data(post: models.Post) -> Dict:
+    """Post fields the explanation prompt and the score components use"""
+    return {
         "id": post.id,
         "title": post.title,
         "content": post.content,
@@ -186,64 +178,176 @@ async def get_post_explanation(
         "quality_score": post.quality_score,
         "author_reputation_score": post.author.reputation_score if post.author else 0,
         "like_count": post.like_count,
+        "dislike_count": post.dislike_count,
+        "bullish_count": post.bullish_count,
+        "bearish_count": post.bearish_count,
         "helpful_count": post.helpful_count,
         "sector": post.sector,
-        "insight_type": post.insight_type.value if post.insight_type else None
+        "insight_type": post.insight_type.value if post.insight_type else None,
+        "created_at": post.created_at.isoformat() if post.created_at else None
+    }
+
+
+def _explanation_factors(post: models.Post, attributions: Optional[List[Dict]] = None) -> Dict:
+    factors = {
+        "quality_score": post.quality_score,
+        "author_reputation": post.author.reputation_score if post.author else 0,
+        "engagement": post.helpful_count + post.like_count
     }
+    if attributions is not None:
+        factors["attributions"] = attributions
+    return {"factors": factors, "confidence_score": min(post.quality_score / 100.0, 1.0)}
+
+
+def _explanation_stream_factory(
+    post_data: Dict,
+    user_id: Optional[int],
+    llm_service: LLMService,
+    market_service: MarketDataService
+):
+    def generate():
+        # Runs on a worker thread, once per flight
+        market_context = None
+        if post_data["ticker"]:
+            market_context = market_service.get_market_snapshot([post_data["ticker"]])
+        return llm_service.stream_explanation(
+            post_data, user_id, ranking_score=post_data["quality_score"], market_context=market_context
+        )
+    return generate
+
+
+@router.get("/explanation/{post_id}", response_model=schemas.ExplanationResponse)
+async def get_post_explanation(
+    post_id: int,
+    user_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    llm_service: LLMService = Depends(get_llm_service),
+    market_service: MarketDataService = Depends(get_market_service),
+    explanation_service: ExplanationService = Depends(get_explanation_service)
+):
+    """
+    Get the explanation for why a post is recommended. Until the LLM explanation
+    is stored, this answers at once with a template explanation built from the
+    post's score components (`source: template`) and generates the LLM one in
+    the background (the /stream variant waits for it instead).
+    """
+    post = (await db.execute(
+        select(models.Post).options(joinedload(models.Post.author)).where(models.Post.id == post_id)
+    )).scalars().first()
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found")
     
-    explanation = llm_service.generate_explanation(
-        post_data, 
-        user_id,
-        ranking_score=post.quality_score,
-        market_context=market_context
-    )
+    # If explanation already exists, return it
+    if post.llm_explanation:
+        return {"explanation": post.llm_explanation, "source": "llm", **_explanation_factors(post)}
     
-    # Save explanation
-    post.llm_explanation = explanation
-    db.commit()
+    # Template explanation from the same components that rank the post (no preferences at post level)
+    post_data = _explanation_post_data(post)
+    market_context = None
+    if post.ticker:
+        market_context = await run_in_threadpool(market_service.get_market_snapshot, [post.ticker])
+    components = llm_service.score_components(post_data, None, market_context)
+    explanation = llm_service.template_explanation(post_data, components, market_context=market_context)
+    attributions = llm_service.factor_attributions(post_data, components, market_context=market_context)
     
-    return {
-        "explanation": explanation,
-        "factors": {
-            "quality_score": post.quality_score,
-            "author_reputation": post.author.reputation_score if post.author else 0,
-            "engagement": post.helpful_count + post.like_count
-        },
-        "confidence_score": min(post.quality_score / 100.0, 1.0)
-    }
+    # LLM upgrade: shared single-flight generation, saved to the post when it finishes
+    if settings.EXPLANATION_LLM_UPGRADE:
+        explanation_service.flight(post_id, _explanation_stream_factory(post_data, user_id, llm_service, market_service))
+    
+    return {"explanation": explanation, "source": "template", **_explanation_factors(post, attributions)}
+
+
+def _sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.get("/explanation/{post_id}/stream")
+async def stream_post_explanation(
+    post_id: int,
+    user_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    llm_service: LLMService = Depends(get_llm_service),
+    market_service: MarketDataService = Depends(get_market_service),
+    explanation_service: ExplanationService = Depends(get_explanation_service)
+):
+    """
+    Server-Sent Events variant of /explanation/{post_id}: a `factors` event at
+    once, `token` events as the explanation streams in, then `done` with the
+    full text. If the LLM fails, `fallback` replaces any tokens received with the
+    template explanation (not saved; a later request tries the LLM again).
+    Concurrent viewers of a post share one generation.
+    """
+    post = (await db.execute(
+        select(models.Post).options(joinedload(models.Post.author)).where(models.Post.id == post_id)
+    )).scalars().first()
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found")
+    
+    factors = _explanation_factors(post)
+    post_data = _explanation_post_data(post)
+    stored = post.llm_explanation
+    
+    async def event_stream():
+        yield _sse("factors", factors)
+        if stored:
+            yield _sse("done", {"explanation": stored, "source": "llm", **factors})
+            return
+        flight = explanation_service.flight(
+            post_id, _explanation_stream_factory(post_data, user_id, llm_service, market_service)
+        )
+        async for fragment in flight.follow(settings.PUSH_HEARTBEAT_SECONDS):
+            yield ": ping\n\n" if fragment is None else _sse("token", {"text": fragment})
+        if flight.succeeded:
+            yield _sse("done", {"explanation": flight.text, "source": "llm", **factors})
+            return
+        market_context = None
+        if post_data["ticker"]:
+            market_context = await run_in_threadpool(market_service.get_market_snapshot, [post_data["ticker"]])
+        yield _sse("fallback", {
+            "explanation": llm_service.fallback_explanation(post_data, market_context),
+            "source": "template",
+            "detail": flight.error,
+            **factors
+        })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.post("/batch", response_model=schemas.BatchAnalyticsResponse)
 async def batch_analytics(
     request: schemas.BatchAnalyticsRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db),
+    llm_service: LLMService = Depends(get_llm_service),
+    market_service: MarketDataService = Depends(get_market_service)
 ):
     """
     Batch analytics endpoint for downstream processing.
     Enables batch analysis of posts with market data and sentiment.
     """
     import time
-    from app.services.llm_service import LLMService
     
     start_time = time.time()
-    llm_service = LLMService()
     
     # Build query
-    query = db.query(models.Post).options(joinedload(models.Post.author))
+    query = select(models.Post).options(joinedload(models.Post.author))
     
     if request.post_ids:
-        query = query.filter(models.Post.id.in_(request.post_ids))
+        query = query.where(models.Post.id.in_(request.post_ids))
     
     if request.tickers:
-        query = query.filter(models.Post.ticker.in_(request.tickers))
+        query = query.where(models.Post.ticker.in_(request.tickers))
     
     if request.start_date:
-        query = query.filter(models.Post.created_at >= request.start_date)
+        query = query.where(models.Post.created_at >= request.start_date)
     
     if request.end_date:
-        query = query.filter(models.Post.created_at <= request.end_date)
+        query = query.where(models.Post.created_at <= request.end_date)
     
-    posts = query.all()
+    posts = (await db.execute(query)).scalars().all()
     
     if not posts:
         raise HTTPException(status_code=404, detail="No posts found matching criteria")
@@ -267,7 +371,7 @@ async def batch_analytics(
     if request.include_market_data:
         top_tickers = sorted(ticker_counts.items(), key=lambda x: x[1], reverse=True)[:10]
         for ticker, count in top_tickers:
-            market_data = market_service.get_ticker_data(ticker)
+            market_data = await run_in_threadpool(market_service.get_ticker_data, ticker)
             trending_tickers.append({
                 "ticker": ticker,
                 "post_count": count,
@@ -289,7 +393,7 @@ async def batch_analytics(
     # Market trends
     market_trends = []
     if request.include_market_data and request.tickers:
-        market_trends = market_service.detect_market_trends(request.tickers)
+        market_trends = await run_in_threadpool(market_service.detect_market_trends, request.tickers)
     
     processing_time = (time.time() - start_time) * 1000  # Convert to ms
     
@@ -305,24 +409,43 @@ async def batch_analytics(
     }
 
 
+def _ranked_post_responses(
+    ranked_posts: List[Dict],
+    post_dict: Dict[int, models.Post],
+    llm_service: LLMService,
+    debug: bool
+) -> List:
+    """Posts in ranked order; with debug, as responses carrying each post's ranking score and factors"""
+    ordered_posts = []
+    for post_data in ranked_posts:
+        post = post_dict.get(post_data["id"])
+        if post is None:
+            continue
+        if debug:
+            post = schemas.PostResponse.model_validate(post).model_copy(update=llm_service.ranking_debug(post_data))
+        ordered_posts.append(post)
+    return ordered_posts
+
+
 @router.post("/rerank", response_model=schemas.ReRankResponse)
 async def rerank_posts(
     request: schemas.ReRankRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db),
+    llm_service: LLMService = Depends(get_llm_service),
+    market_service: MarketDataService = Depends(get_market_service),
+    explanation_service: ExplanationService = Depends(get_explanation_service)
 ):
     """
     Dynamically re-rank posts based on current market conditions.
     Incorporates live market data to re-rank insights, highlight timely opportunities,
     and deprioritize outdated or low-relevance posts.
     """
-    from app.services.llm_service import LLMService
-    
-    llm_service = LLMService()
-    
     # Get posts
-    posts = db.query(models.Post).options(joinedload(models.Post.author)).filter(
-        models.Post.id.in_(request.post_ids)
-    ).all()
+    posts = (await db.execute(
+        select(models.Post).options(joinedload(models.Post.author)).where(
+            models.Post.id.in_(request.post_ids)
+        )
+    )).scalars().all()
     
     if not posts:
         raise HTTPException(status_code=404, detail="No posts found")
@@ -344,6 +467,7 @@ async def rerank_posts(
             "sector": post.sector,
             "catalyst_type": post.catalyst_type,
             "risk_profile": post.risk_profile,
+            "canonical_post_id": post.canonical_post_id,
             "like_count": post.like_count,
             "dislike_count": post.dislike_count,
             "bullish_count": post.bullish_count,
@@ -353,36 +477,34 @@ async def rerank_posts(
             "created_at": post.created_at.isoformat() if post.created_at else None
         })
     
-    # Get fresh market context
-    market_context = market_service.get_market_context(list(tickers), include_sentiment=True)
+    # Get market context snapshot (rebuilt at most once per refresh interval)
+    market_context = await run_in_threadpool(market_service.get_market_snapshot, list(tickers))
     
     # Re-rank with strategy
+    strategy = request.strategy or "balanced"
     ranked_posts = llm_service.rank_posts(
         posts_data,
         request.user_preferences,
         market_context,
-        strategy=request.strategy or "balanced"
+        strategy=strategy
     )
     
-    # Generate explanations for top posts
-    explanations = {}
-    for post_data in ranked_posts[:5]:
-        explanation = llm_service.generate_explanation(
-            post_data,
-            None,
-            post_data.get("ranking_score", 0),
-            market_context=market_context
+    # Every ranked post is explained at once; the top ones also get LLM phrasing in the background
+    explanations = {
+        post_data["id"]: explanation_service.explain_now(
+            post_data, None, request.user_preferences, post_data.get("ranking_score", 0), market_context,
+            strategy=strategy, upgrade=rank < settings.EXPLANATION_LLM_TOP_N
         )
-        explanations[post_data["id"]] = explanation
+        for rank, post_data in enumerate(ranked_posts)
+    }
     
     # Get full post objects in ranked order
-    post_ids = [p["id"] for p in ranked_posts]
     post_dict = {p.id: p for p in posts}
-    ordered_posts = [post_dict[pid] for pid in post_ids if pid in post_dict]
+    ordered_posts = _ranked_post_responses(ranked_posts, post_dict, llm_service, request.debug)
     
     return {
         "ranked_posts": ordered_posts,
-        "strategy_used": request.strategy or "balanced",
+        "strategy_used": strategy,
         "market_context_applied": True,
         "explanations": explanations
     }
@@ -391,21 +513,23 @@ async def rerank_posts(
 @router.get("/strategy-experiment", response_model=Dict[str, List[schemas.PostResponse]])
 async def experiment_with_strategies(
     limit: int = 20,
-    db: Session = Depends(get_db)
+    debug: bool = False,
+    db: AsyncSession = Depends(get_async_read_db),
+    llm_service: LLMService = Depends(get_llm_service),
+    market_service: MarketDataService = Depends(get_market_service)
 ):
     """
     Experiment with different ranking strategies.
     Allows LLM to experiment with strategies that balance insight quality,
-    diversity, and real-time responsiveness.
+    diversity, and real-time responsiveness. `debug=true` adds each post's
+    ranking score and factors under each strategy.
     """
-    from app.services.llm_service import LLMService
-    
-    llm_service = LLMService()
-    
     # Get recent posts
-    posts = db.query(models.Post).options(joinedload(models.Post.author)).order_by(
-        desc(models.Post.created_at)
-    ).limit(limit).all()
+    posts = (await db.execute(
+        select(models.Post).options(joinedload(models.Post.author)).order_by(
+            desc(models.Post.created_at)
+        ).limit(limit)
+    )).scalars().all()
     
     if not posts:
         raise HTTPException(status_code=404, detail="No posts found")
@@ -425,6 +549,7 @@ async def experiment_with_strategies(
             "insight_type": post.insight_type.value if post.insight_type else None,
             "quality_score": post.quality_score,
             "sector": post.sector,
+            "canonical_post_id": post.canonical_post_id,
             "like_count": post.like_count,
             "helpful_count": post.helpful_count,
             "author_reputation_score": post.author.reputation_score if post.author else 0.0,
@@ -432,7 +557,7 @@ async def experiment_with_strategies(
         })
     
     # Get market context
-    market_context = market_service.get_market_context(list(tickers), include_sentiment=True)
+    market_context = await run_in_threadpool(market_service.get_market_snapshot, list(tickers))
     
     # Experiment with strategies
     strategy_results = llm_service.experiment_with_strategy(
@@ -446,8 +571,7 @@ async def experiment_with_strategies(
     results = {}
     
     for strategy, ranked_data in strategy_results.items():
-        post_ids = [p["id"] for p in ranked_data]
-        results[strategy] = [post_dict[pid] for pid in post_ids if pid in post_dict]
+        results[strategy] = _ranked_post_responses(ranked_data, post_dict, llm_service, debug)
     
     return results
 
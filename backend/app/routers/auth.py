@@ -2,33 +2,36 @@
 Authentication router for login and signup
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
-from app.database import get_db
+from app.database import get_async_db
 from app import models, schemas
+from app.dependencies import get_current_user
 from app.services.auth_service import (
-    verify_password,
-    get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
+    needs_rehash,
     create_access_token,
-    decode_access_token,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
 
 router = APIRouter()
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
 @router.post("/signup", response_model=schemas.TokenResponse)
 async def signup(
     user_data: schemas.UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new user account"""
     # Check if user exists
-    existing = db.query(models.User).filter(
-        (models.User.username == user_data.username) | (models.User.email == user_data.email)
-    ).first()
+    existing = (await db.execute(
+        select(models.User).where(
+            or_(models.User.username == user_data.username, models.User.email == user_data.email)
+        )
+    )).scalars().first()
     
     if existing:
         raise HTTPException(
@@ -36,8 +39,8 @@ async def signup(
             detail="Username or email already exists"
         )
     
-    # Hash password
-    hashed_password = get_password_hash(user_data.password)
+    # Hash password (bounded thread pool; bcrypt would block the event loop)
+    hashed_password = await get_password_hash_async(user_data.password)
     
     # Create user
     db_user = models.User(
@@ -48,8 +51,8 @@ async def signup(
         bio=user_data.bio
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -68,21 +71,28 @@ async def signup(
 @router.post("/login", response_model=schemas.TokenResponse)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Login and get access token"""
     # Find user by username or email
-    user = db.query(models.User).filter(
-        (models.User.username == form_data.username) | (models.User.email == form_data.username)
-    ).first()
+    user = (await db.execute(
+        select(models.User).where(
+            or_(models.User.username == form_data.username, models.User.email == form_data.username)
+        )
+    )).scalars().first()
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Upgrade hashes made with an older BCRYPT_ROUNDS while the password is at hand
+    if needs_rehash(user.hashed_password):
+        user.hashed_password = await get_password_hash_async(form_data.password)
+        await db.commit()
+    
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -98,35 +108,6 @@ async def login(
 
 
 @router.get("/me", response_model=schemas.UserResponse)
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-):
+async def get_me(current_user: models.User = Depends(get_current_user)):
     """Get current authenticated user"""
-    payload = decode_access_token(token)
-    if payload is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    user_id: str = payload.get("sub")
-    if user_id is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    user = db.query(models.User).filter(models.User.id == int(user_id)).first()
-    if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    return user
-
-
+    return current_user
@@ -2,30 +2,106 @@
 Comments router for Twitter-like replies to posts
 """
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from typing import List, Optional
-from app.database import get_db
+from sqlalchemy import select, func, literal_column, Integer
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload, noload
+from typing import Dict, List, Optional
+from app.config import settings
+from app.database import get_async_db, get_async_read_db
 from app import models, schemas
-from app.dependencies import get_current_user
+from app.dependencies import Principal, get_current_principal
+from app.services.push_service import PushService, user_channel, post_channel
+from app.services.shared import get_push_service
 
 router = APIRouter()
 
 
+def _comment_query():
+    """Select comments with author and one level of replies eagerly loaded"""
+    return select(models.Comment).options(
+        joinedload(models.Comment.author),
+        selectinload(models.Comment.replies).options(
+            joinedload(models.Comment.author),
+            noload(models.Comment.replies)
+        )
+    )
+
+
+async def _get_comment_with_author(db: AsyncSession, comment_id: int) -> Optional[models.Comment]:
+    result = await db.execute(_comment_query().where(models.Comment.id == comment_id))
+    return result.scalars().first()
+
+
+async def _load_thread(db: AsyncSession, anchor, max_depth: int) -> List[Dict]:
+    """
+    Load the comment trees rooted at `anchor` (a select of comment ids) down to
+    `max_depth` with one recursive CTE, and assemble them in a single pass.
+    """
+    anchor = anchor.subquery()
+    thread = select(anchor.c.id, literal_column("0", Integer).label("depth")).cte("thread", recursive=True)
+    thread = thread.union_all(
+        select(models.Comment.id, thread.c.depth + 1)
+        .join(thread, models.Comment.parent_comment_id == thread.c.id)
+        .where(thread.c.depth < max_depth)
+    )
+    reply_counts = (
+        select(models.Comment.parent_comment_id.label("parent_id"), func.count(models.Comment.id).label("reply_count"))
+        .where(models.Comment.parent_comment_id.in_(select(thread.c.id)))
+        .group_by(models.Comment.parent_comment_id)
+        .subquery()
+    )
+    result = await db.execute(
+        select(models.Comment, thread.c.depth, func.coalesce(reply_counts.c.reply_count, 0))
+        .join(thread, models.Comment.id == thread.c.id)
+        .outerjoin(reply_counts, reply_counts.c.parent_id == models.Comment.id)
+        .options(joinedload(models.Comment.author), noload(models.Comment.replies))
+        .order_by(thread.c.depth, models.Comment.created_at.asc(), models.Comment.id.asc())
+    )
+    
+    # Rows arrive parents-first (ordered by depth), so every parent is seen before its replies
+    nodes: Dict[int, Dict] = {}
+    roots: List[Dict] = []
+    for comment, depth, reply_count in result.all():
+        node = {
+            "id": comment.id,
+            "post_id": comment.post_id,
+            "author_id": comment.author_id,
+            "author": comment.author,
+            "parent_comment_id": comment.parent_comment_id,
+            "content": comment.content,
+            "like_count": comment.like_count or 0,
+            "created_at": comment.created_at,
+            "depth": depth,
+            "reply_count": reply_count,
+            "replies": [],
+        }
+        nodes[comment.id] = node
+        parent = nodes.get(comment.parent_comment_id) if depth > 0 else None
+        if parent is not None:
+            parent["replies"].append(node)
+        else:
+            roots.append(node)
+    return roots
+
+
 @router.post("/", response_model=schemas.CommentResponse)
 async def create_comment(
     comment: schemas.CommentCreate,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
+    push_service: PushService = Depends(get_push_service)
 ):
     """Create a comment/reply to a post or another comment"""
     # Verify post exists
-    post = db.query(models.Post).filter(models.Post.id == comment.post_id).first()
+    post = await db.get(models.Post, comment.post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     
     # Verify parent comment exists if provided
+    parent = None
     if comment.parent_comment_id:
-        parent = db.query(models.Comment).filter(models.Comment.id == comment.parent_comment_id).first()
+        parent = await db.get(models.Comment, comment.parent_comment_id)
         if not parent:
             raise HTTPException(status_code=404, detail="Parent comment not found")
     
@@ -41,14 +117,23 @@ async def create_comment(
     # Update post comment count
     post.comment_count = (post.comment_count or 0) + 1
     
-    db.commit()
-    db.refresh(db_comment)
+    await db.commit()
     
-    # Load relationships
-    db_comment = db.query(models.Comment).options(
-        joinedload(models.Comment.author),
-        joinedload(models.Comment.parent_comment)
-    ).filter(models.Comment.id == db_comment.id).first()
+    # Load relationships (a new comment has no replies yet)
+    db_comment = await _get_comment_with_author(db, db_comment.id)
+    
+    # Push to viewers of the post and to the author being replied to
+    event = {
+        "id": db_comment.id,
+        "post_id": db_comment.post_id,
+        "parent_comment_id": db_comment.parent_comment_id,
+        "author_id": db_comment.author_id,
+        "comment_count": post.comment_count
+    }
+    await push_service.publish(post_channel(post.id), "comment", event)
+    replied_to = parent.author_id if parent else post.author_id
+    if replied_to != current_user.id:
+        await push_service.publish(user_channel(replied_to), "reply", event)
     
     return db_comment
 
@@ -57,36 +142,84 @@ async def create_comment(
 async def get_post_comments(
     post_id: int,
     limit: int = 50,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get all comments for a post (top-level only)"""
-    comments = db.query(models.Comment).options(
-        joinedload(models.Comment.author),
-        joinedload(models.Comment.replies).joinedload(models.Comment.author)
-    ).filter(
+    result = await db.execute(
+        _comment_query().where(
+            models.Comment.post_id == post_id,
+            models.Comment.parent_comment_id == None
+        ).order_by(models.Comment.created_at.desc()).limit(limit)
+    )
+    comments = result.scalars().unique().all()
+    
+    return comments
+
+
+@router.get("/post/{post_id}/thread", response_model=schemas.CommentThreadResponse)
+async def get_post_thread(
+    post_id: int,
+    max_depth: int = 3,
+    limit: int = 20,
+    cursor: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Get a page of top-level comments for a post with their reply trees
+    (up to max_depth levels below each top-level comment) in one query.
+    Pages go newest first; pass the returned next_cursor to continue.
+    """
+    max_depth = max(0, min(max_depth, settings.COMMENT_THREAD_MAX_DEPTH))
+    top_level = select(models.Comment.id).where(
         models.Comment.post_id == post_id,
         models.Comment.parent_comment_id == None
-    ).order_by(models.Comment.created_at.desc()).limit(limit).all()
+    )
+    if cursor is not None:
+        top_level = top_level.where(models.Comment.id < cursor)
+    top_level = top_level.order_by(models.Comment.id.desc()).limit(limit)
     
-    return comments
+    roots = await _load_thread(db, top_level, max_depth)
+    roots.sort(key=lambda node: node["id"], reverse=True)
+    
+    return {
+        "comments": roots,
+        "next_cursor": roots[-1]["id"] if len(roots) == limit else None,
+        "max_depth": max_depth
+    }
+
+
+@router.get("/{comment_id}/thread", response_model=schemas.CommentThreadResponse)
+async def get_comment_thread(
+    comment_id: int,
+    max_depth: int = 3,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get the subtree under a comment (the comment itself at depth 0) in one query"""
+    max_depth = max(0, min(max_depth, settings.COMMENT_THREAD_MAX_DEPTH))
+    roots = await _load_thread(db, select(models.Comment.id).where(models.Comment.id == comment_id), max_depth)
+    if not roots:
+        raise HTTPException(status_code=404, detail="Comment not found")
+    
+    return {"comments": roots, "next_cursor": None, "max_depth": max_depth}
 
 
 @router.get("/{comment_id}/replies", response_model=List[schemas.CommentResponse])
 async def get_comment_replies(
     comment_id: int,
     limit: int = 20,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get replies to a specific comment"""
-    comment = db.query(models.Comment).filter(models.Comment.id == comment_id).first()
+    comment = await db.get(models.Comment, comment_id)
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
     
-    replies = db.query(models.Comment).options(
-        joinedload(models.Comment.author)
-    ).filter(
-        models.Comment.parent_comment_id == comment_id
-    ).order_by(models.Comment.created_at.asc()).limit(limit).all()
+    result = await db.execute(
+        _comment_query().where(
+            models.Comment.parent_comment_id == comment_id
+        ).order_by(models.Comment.created_at.asc()).limit(limit)
+    )
+    replies = result.scalars().all()
     
     return replies
 
@@ -94,38 +227,38 @@ async def get_comment_replies(
 @router.post("/{comment_id}/like", response_model=schemas.CommentResponse)
 async def like_comment(
     comment_id: int,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
+    push_service: PushService = Depends(get_push_service)
 ):
     """Like a comment"""
-    comment = db.query(models.Comment).options(
-        joinedload(models.Comment.author)
-    ).filter(models.Comment.id == comment_id).first()
+    comment = await _get_comment_with_author(db, comment_id)
     
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
     
-    # Check if already liked
-    existing = db.query(models.CommentReaction).filter(
-        models.CommentReaction.comment_id == comment_id,
-        models.CommentReaction.user_id == current_user.id
-    ).first()
-    
-    if existing:
-        raise HTTPException(status_code=400, detail="Comment already liked")
-    
-    # Create reaction
+    # Create reaction (the unique index rejects a second like)
     reaction = models.CommentReaction(
         comment_id=comment_id,
         user_id=current_user.id
     )
     db.add(reaction)
+    try:
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Comment already liked")
     
     # Update like count
     comment.like_count = (comment.like_count or 0) + 1
     
-    db.commit()
-    db.refresh(comment)
+    await db.commit()
+    
+    await push_service.publish(
+        post_channel(comment.post_id),
+        "comment_likes",
+        {"comment_id": comment.id, "post_id": comment.post_id, "like_count": comment.like_count}
+    )
     
     return comment
 
@@ -133,24 +266,34 @@ async def like_comment(
 @router.delete("/{comment_id}/like")
 async def unlike_comment(
     comment_id: int,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
+    push_service: PushService = Depends(get_push_service)
 ):
     """Unlike a comment"""
-    reaction = db.query(models.CommentReaction).filter(
-        models.CommentReaction.comment_id == comment_id,
-        models.CommentReaction.user_id == current_user.id
-    ).first()
+    reaction = (await db.execute(
+        select(models.CommentReaction).where(
+            models.CommentReaction.comment_id == comment_id,
+            models.CommentReaction.user_id == current_user.id
+        )
+    )).scalars().first()
     
     if not reaction:
         raise HTTPException(status_code=404, detail="Like not found")
     
-    comment = db.query(models.Comment).filter(models.Comment.id == comment_id).first()
+    comment = await db.get(models.Comment, comment_id)
     if comment and comment.like_count > 0:
         comment.like_count -= 1
     
-    db.delete(reaction)
-    db.commit()
+    await db.delete(reaction)
+    await db.commit()
+    
+    if comment:
+        await push_service.publish(
+            post_channel(comment.post_id),
+            "comment_likes",
+            {"comment_id": comment.id, "post_id": comment.post_id, "like_count": comment.like_count}
+        )
     
     return {"message": "Comment unliked"}
 
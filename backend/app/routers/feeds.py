@@ -2,16 +2,24 @@
 Feeds router for personalized feed generation
 """
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from typing import List, Optional
-from app.database import get_db
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from typing import Dict, List, Optional
+from app.database import get_async_read_db
 from app import models, schemas
+from app.config import settings
+from app.dependencies import Principal, get_current_principal
 from app.services.llm_service import LLMService
 from app.services.market_data_service import MarketDataService
+from app.services.timeline_service import TimelineService
+from app.services.explanation_service import ExplanationService
+from app.services.shared import (
+    get_llm_service, get_market_service, get_timeline_service, get_embedding_service, get_explanation_service
+)
 
 router = APIRouter()
-llm_service = LLMService()
-market_service = MarketDataService()
 
 
 @router.get("/personalized", response_model=schemas.FeedResponse)
@@ -19,15 +27,19 @@ async def get_personalized_feed(
     user_id: Optional[int] = None,
     page: int = 1,
     page_size: int = 20,
-    db: Session = Depends(get_db)
+    debug: bool = False,
+    db: AsyncSession = Depends(get_async_read_db),
+    llm_service: LLMService = Depends(get_llm_service),
+    market_service: MarketDataService = Depends(get_market_service),
+    explanation_service: ExplanationService = Depends(get_explanation_service)
 ):
-    """Get personalized feed for user"""
+    """Get personalized feed for user (`debug=true` adds each post's ranking score and factors)"""
     # Get user preferences if user_id provided
     user_preferences = None
     if user_id:
-        pref = db.query(models.UserFeedPreference).filter(
-            models.UserFeedPreference.user_id == user_id
-        ).first()
+        pref = (await db.execute(
+            select(models.UserFeedPreference).where(models.UserFeedPreference.user_id == user_id)
+        )).scalars().first()
         if pref:
             user_preferences = {
                 "preferred_sectors": pref.preferred_sectors or [],
@@ -36,8 +48,11 @@ async def get_personalized_feed(
                 "risk_tolerance": pref.risk_tolerance
             }
     
+    # Extra candidate signal: posts similar to what the user liked or wrote
+    semantic_matches = await _semantic_candidates(db, user_id) if user_id else {}
+    
     # Get all posts with author relationship loaded
-    posts = db.query(models.Post).options(joinedload(models.Post.author)).all()
+    posts = (await db.execute(select(models.Post).options(joinedload(models.Post.author)))).scalars().all()
     
     # Convert to dict format for ranking
     posts_data = []
@@ -56,6 +71,8 @@ async def get_personalized_feed(
             "sector": post.sector,
             "catalyst_type": post.catalyst_type,
             "risk_profile": post.risk_profile,
+            "semantic_similarity": semantic_matches.get(post.id, 0.0),
+            "canonical_post_id": post.canonical_post_id,
             "like_count": post.like_count,
             "dislike_count": post.dislike_count,
             "bullish_count": post.bullish_count,
@@ -66,36 +83,38 @@ async def get_personalized_feed(
         })
     
     # Get market context (includes social sentiment if available)
-    market_context = market_service.get_market_context(list(tickers), include_sentiment=True)
+    market_context = await run_in_threadpool(market_service.get_market_snapshot, list(tickers))
     
     # Rank posts
     ranked_posts = llm_service.rank_posts(posts_data, user_preferences, market_context)
     
-    # Generate explanations for top posts with market context
-    for post_data in ranked_posts[:5]:
-        post_obj = db.query(models.Post).filter(models.Post.id == post_data["id"]).first()
-        if post_obj:
-            explanation = llm_service.generate_explanation(
-                post_data,
-                user_id,
-                post_data.get("ranking_score", 0),
-                market_context=market_context
-            )
-            post_obj.llm_explanation = explanation
-            db.commit()
-    
     # Paginate
     start = (page - 1) * page_size
     end = start + page_size
     paginated_posts = ranked_posts[start:end]
     
-    # Get full post objects with author relationship loaded
-    post_ids = [p["id"] for p in paginated_posts]
-    full_posts = db.query(models.Post).options(joinedload(models.Post.author)).filter(models.Post.id.in_(post_ids)).all()
+    # Every post on the page is explained at once from its score components; the top posts also get
+    # LLM phrasing in the background, served from the explanation cache on later requests. Explanations
+    # are specific to this user and market state, so they are never written to the shared post row.
+    explanations = {
+        post_data["id"]: explanation_service.explain_now(
+            post_data, user_id, user_preferences, post_data.get("ranking_score", 0), market_context,
+            upgrade=rank < settings.EXPLANATION_LLM_TOP_N
+        )
+        for rank, post_data in enumerate(paginated_posts, start)
+    }
     
-    # Sort by ranking order
-    post_dict = {p.id: p for p in full_posts}
-    ordered_posts = [post_dict[pid] for pid in post_ids if pid in post_dict]
+    # Posts (with authors) were already loaded above; keep ranking order
+    post_dict = {p.id: p for p in posts}
+    ordered_posts = []
+    for post_data in paginated_posts:
+        post_obj = post_dict.get(post_data["id"])
+        if post_obj is None:
+            continue
+        update = {"llm_explanation": explanations[post_obj.id]}
+        if debug:
+            update.update(llm_service.ranking_debug(post_data))
+        ordered_posts.append(schemas.PostResponse.model_validate(post_obj).model_copy(update=update))
     
     return {
         "posts": ordered_posts,
@@ -106,10 +125,51 @@ async def get_personalized_feed(
     }
 
 
+async def _semantic_candidates(db: AsyncSession, user_id: int) -> Dict[int, float]:
+    """Similarity of the posts nearest to a user's recently liked or authored posts"""
+    interest_posts = settings.EMBEDDING_INTEREST_POSTS
+    liked = (await db.execute(
+        select(models.Reaction.post_id)
+        .where(
+            models.Reaction.user_id == user_id,
+            models.Reaction.reaction_type.in_([models.ReactionType.LIKE, models.ReactionType.HELPFUL])
+        )
+        .order_by(models.Reaction.id.desc())
+        .limit(interest_posts)
+    )).scalars().all()
+    authored = (await db.execute(
+        select(models.Post.id).where(models.Post.author_id == user_id).order_by(models.Post.id.desc()).limit(interest_posts)
+    )).scalars().all()
+    seed_ids = list(dict.fromkeys(list(liked) + list(authored)))[:interest_posts]
+    if not seed_ids:
+        return {}
+    try:
+        return await run_in_threadpool(
+            get_embedding_service().interest_candidates, seed_ids, settings.EMBEDDING_FEED_CANDIDATES
+        )
+    except Exception as e:
+        print(f"Error fetching semantic feed candidates for user {user_id}: {e}")
+        return {}
+
+
+@router.get("/following", response_model=schemas.TimelineResponse)
+async def get_following_feed(
+    limit: int = 20,
+    before: Optional[int] = None,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_read_db),
+    timeline_service: TimelineService = Depends(get_timeline_service)
+):
+    """Newest posts from authors the current user follows (cursor-paginated home timeline)"""
+    limit = max(1, min(limit, settings.FEED_PAGE_SIZE * 5))
+    return await timeline_service.get_timeline(db, current_user.id, limit, before)
+
+
 @router.get("/trending", response_model=List[schemas.TrendingTicker])
 async def get_trending_tickers(
     limit: int = 10,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db),
+    market_service: MarketDataService = Depends(get_market_service)
 ):
     """Get trending tickers based on post activity and market data"""
     from sqlalchemy import func
@@ -117,9 +177,9 @@ async def get_trending_tickers(
     
     # Get posts from last 24 hours
     yesterday = datetime.now(timezone.utc) - timedelta(days=1)
-    recent_posts = db.query(models.Post).filter(
-        models.Post.created_at >= yesterday
-    ).all()
+    recent_posts = (await db.execute(
+        select(models.Post).where(models.Post.created_at >= yesterday)
+    )).scalars().all()
     
     # Count posts per ticker
     ticker_counts = {}
@@ -140,7 +200,7 @@ async def get_trending_tickers(
     # Get market data for trending tickers
     trending_tickers = []
     for ticker, count in sorted(ticker_counts.items(), key=lambda x: x[1], reverse=True)[:limit]:
-        market_data = market_service.get_ticker_data(ticker)
+        market_data = await run_in_threadpool(market_service.get_ticker_data, ticker)
         
         avg_sentiment = ticker_sentiment.get(ticker, 0) / count if count > 0 else 0
         
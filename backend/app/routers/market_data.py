@@ -8,13 +8,14 @@ from datetime import datetime, timezone
 from app.database import get_db
 from app import models, schemas
 from app.services.market_data_service import MarketDataService
+from app.services.circuit_breaker import all_breaker_stats
+from app.services.shared import get_market_service
 
 router = APIRouter()
-market_service = MarketDataService()
 
 
 @router.get("/ticker/{ticker}", response_model=schemas.MarketDataResponse)
-async def get_ticker_data(ticker: str):
+async def get_ticker_data(ticker: str, market_service: MarketDataService = Depends(get_market_service)):
     """Get current market data for a ticker"""
     data = market_service.get_ticker_data(ticker)
     
@@ -43,10 +44,17 @@ async def get_ticker_data(ticker: str):
     }
 
 
+@router.get("/upstream-health")
+async def get_upstream_health():
+    """Circuit breaker state and error rates for upstream market/sentiment providers"""
+    return all_breaker_stats()
+
+
 @router.get("/trends", response_model=List[dict])
 async def get_market_trends(
     tickers: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    market_service: MarketDataService = Depends(get_market_service)
 ):
     """Detect market trends for tickers"""
     if tickers:
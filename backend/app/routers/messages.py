@@ -2,12 +2,18 @@
 Direct messages router for private chat between users
 """
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from typing import List, Optional
-from sqlalchemy import or_, and_
-from app.database import get_db
+from sqlalchemy import select, update, or_, and_
+from sqlalchemy.exc import IntegrityError
+from app.database import get_async_db, get_async_read_db
 from app import models, schemas
-from app.dependencies import get_current_user
+from app.dependencies import Principal, get_current_principal
+from app.services.conversation_service import ConversationService
+from app.services.push_service import PushService, user_channel
+from app.services.timeline_service import TimelineService
+from app.services.shared import get_conversation_service, get_push_service, get_timeline_service
 
 router = APIRouter()
 
@@ -15,12 +21,14 @@ router = APIRouter()
 @router.post("/", response_model=schemas.MessageResponse)
 async def send_message(
     message: schemas.MessageCreate,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
+    conversation_service: ConversationService = Depends(get_conversation_service),
+    push_service: PushService = Depends(get_push_service)
 ):
     """Send a direct message to another user"""
     # Verify recipient exists
-    recipient = db.query(models.User).filter(models.User.id == message.recipient_id).first()
+    recipient = await db.get(models.User, message.recipient_id)
     if not recipient:
         raise HTTPException(status_code=404, detail="Recipient not found")
     
@@ -34,133 +42,117 @@ async def send_message(
         content=message.content
     )
     db.add(db_message)
-    db.commit()
-    db.refresh(db_message)
+    await db.flush()
+    
+    # Inbox summaries for both users, in the same transaction as the message
+    await conversation_service.record_message(db, db_message)
+    await db.commit()
     
     # Load relationships
-    db_message = db.query(models.DirectMessage).options(
-        joinedload(models.DirectMessage.sender),
-        joinedload(models.DirectMessage.recipient)
-    ).filter(models.DirectMessage.id == db_message.id).first()
+    db_message = (await db.execute(
+        select(models.DirectMessage).options(
+            joinedload(models.DirectMessage.sender),
+            joinedload(models.DirectMessage.recipient)
+        ).where(models.DirectMessage.id == db_message.id)
+    )).scalars().first()
+    
+    await push_service.publish(
+        user_channel(db_message.recipient_id),
+        "message",
+        schemas.MessageResponse.model_validate(db_message).model_dump(mode="json")
+    )
     
     return db_message
 
 
 @router.get("/conversations", response_model=List[schemas.ConversationResponse])
 async def get_conversations(
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    limit: int = 50,
+    offset: int = 0,
+    db: AsyncSession = Depends(get_async_read_db),
+    conversation_service: ConversationService = Depends(get_conversation_service)
 ):
-    """Get all conversations for the current user"""
-    user_id = current_user.id
-    
-    # Get all unique conversation partners
-    sent_messages = db.query(models.DirectMessage).filter(
-        models.DirectMessage.sender_id == user_id
-    ).options(joinedload(models.DirectMessage.recipient)).all()
-    
-    received_messages = db.query(models.DirectMessage).filter(
-        models.DirectMessage.recipient_id == user_id
-    ).options(joinedload(models.DirectMessage.sender)).all()
-    
-    # Build conversation map
-    conversations = {}
-    
-    for msg in sent_messages:
-        partner_id = msg.recipient_id
-        if partner_id not in conversations:
-            conversations[partner_id] = {
-                "user": msg.recipient,
-                "last_message": msg,
-                "unread_count": 0
-            }
-        elif msg.created_at > conversations[partner_id]["last_message"].created_at:
-            conversations[partner_id]["last_message"] = msg
-    
-    for msg in received_messages:
-        partner_id = msg.sender_id
-        if partner_id not in conversations:
-            conversations[partner_id] = {
-                "user": msg.sender,
-                "last_message": msg,
-                "unread_count": 0
-            }
-        elif msg.created_at > conversations[partner_id]["last_message"].created_at:
-            conversations[partner_id]["last_message"] = msg
-        
-        if not msg.is_read:
-            conversations[partner_id]["unread_count"] += 1
-    
-    # Convert to list
-    result = []
-    for partner_id, conv in conversations.items():
-        result.append({
-            "user": conv["user"],
-            "last_message": conv["last_message"],
-            "unread_count": conv["unread_count"]
-        })
-    
-    # Sort by last message time
-    result.sort(key=lambda x: x["last_message"].created_at, reverse=True)
-    
-    return result
+    """Get conversations for the current user, most recent first"""
+    return await conversation_service.list_conversations(db, current_user.id, limit, offset)
 
 
 @router.get("/conversation/{user_id}", response_model=List[schemas.MessageResponse])
 async def get_conversation(
     user_id: int,
-    current_user: models.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     limit: int = 50,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    conversation_service: ConversationService = Depends(get_conversation_service)
 ):
     """Get messages in a conversation with a specific user"""
     current_user_id = current_user.id
     
-    messages = db.query(models.DirectMessage).options(
-        joinedload(models.DirectMessage.sender),
-        joinedload(models.DirectMessage.recipient)
-    ).filter(
-        or_(
-            and_(
-                models.DirectMessage.sender_id == current_user_id,
-                models.DirectMessage.recipient_id == user_id
-            ),
-            and_(
-                models.DirectMessage.sender_id == user_id,
-                models.DirectMessage.recipient_id == current_user_id
+    messages = (await db.execute(
+        select(models.DirectMessage).options(
+            joinedload(models.DirectMessage.sender),
+            joinedload(models.DirectMessage.recipient)
+        ).where(
+            or_(
+                and_(
+                    models.DirectMessage.sender_id == current_user_id,
+                    models.DirectMessage.recipient_id == user_id
+                ),
+                and_(
+                    models.DirectMessage.sender_id == user_id,
+                    models.DirectMessage.recipient_id == current_user_id
+                )
             )
-        )
-    ).order_by(models.DirectMessage.created_at.asc()).limit(limit).all()
+        ).order_by(models.DirectMessage.created_at.asc()).limit(limit)
+    )).scalars().all()
     
-    # Mark messages as read
-    for msg in messages:
-        if msg.recipient_id == current_user_id and not msg.is_read:
-            msg.is_read = True
-    
-    db.commit()
+    # Advance the read cursor past the partner's messages on this page (one UPDATE)
+    received_ids = [msg.id for msg in messages if msg.sender_id == user_id]
+    if received_ids:
+        await conversation_service.mark_read_up_to(db, current_user_id, user_id, max(received_ids))
+        await db.commit()
     
     return messages
 
 
+@router.post("/conversation/{user_id}/read", response_model=schemas.ReadCursorResponse)
+async def mark_conversation_read(
+    user_id: int,
+    request: Optional[schemas.MarkReadRequest] = None,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
+    conversation_service: ConversationService = Depends(get_conversation_service)
+):
+    """Mark messages from a user as read up to a message id (default: all of them)"""
+    up_to_message_id = request.up_to_message_id if request else None
+    cursor = await conversation_service.mark_read_up_to(db, current_user.id, user_id, up_to_message_id)
+    await db.commit()
+    
+    return cursor
+
+
 @router.post("/{message_id}/read")
 async def mark_message_read(
     message_id: int,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
+    conversation_service: ConversationService = Depends(get_conversation_service)
 ):
-    """Mark a message as read"""
+    """Mark a message (and everything before it in the conversation) as read"""
     user_id = current_user.id
     
-    message = db.query(models.DirectMessage).filter(
-        models.DirectMessage.id == message_id,
-        models.DirectMessage.recipient_id == user_id
-    ).first()
+    message = (await db.execute(
+        select(models.DirectMessage).where(
+            models.DirectMessage.id == message_id,
+            models.DirectMessage.recipient_id == user_id
+        )
+    )).scalars().first()
     
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
     
-    message.is_read = True
-    db.commit()
+    await conversation_service.mark_read_up_to(db, user_id, message.sender_id, message.id)
+    await db.commit()
     
     return {"message": "Message marked as read"}
 
@@ -168,8 +160,9 @@ async def mark_message_read(
 @router.post("/follow/{user_id}")
 async def follow_user(
     user_id: int,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
+    timeline_service: TimelineService = Depends(get_timeline_service)
 ):
     """Follow a user"""
     current_user_id = current_user.id
@@ -178,26 +171,29 @@ async def follow_user(
         raise HTTPException(status_code=400, detail="Cannot follow yourself")
     
     # Check if user exists
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = await db.get(models.User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Check if already following
-    existing = db.query(models.Follow).filter(
-        models.Follow.follower_id == current_user_id,
-        models.Follow.following_id == user_id
-    ).first()
-    
-    if existing:
-        raise HTTPException(status_code=400, detail="Already following this user")
-    
-    # Create follow relationship
+    # Create follow relationship (the unique index rejects duplicates)
     follow = models.Follow(
         follower_id=current_user_id,
         following_id=user_id
     )
     db.add(follow)
-    db.commit()
+    try:
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Already following this user")
+    
+    await db.execute(
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(follower_count=models.User.follower_count + 1)
+    )
+    await timeline_service.add_author(db, current_user_id, user_id)
+    await db.commit()
     
     return {"message": "User followed successfully"}
 
@@ -205,22 +201,31 @@ async def follow_user(
 @router.delete("/follow/{user_id}")
 async def unfollow_user(
     user_id: int,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
+    timeline_service: TimelineService = Depends(get_timeline_service)
 ):
     """Unfollow a user"""
     current_user_id = current_user.id
     
-    follow = db.query(models.Follow).filter(
-        models.Follow.follower_id == current_user_id,
-        models.Follow.following_id == user_id
-    ).first()
+    follow = (await db.execute(
+        select(models.Follow).where(
+            models.Follow.follower_id == current_user_id,
+            models.Follow.following_id == user_id
+        )
+    )).scalars().first()
     
     if not follow:
         raise HTTPException(status_code=404, detail="Not following this user")
     
-    db.delete(follow)
-    db.commit()
+    await db.delete(follow)
+    await db.execute(
+        update(models.User)
+        .where(models.User.id == user_id, models.User.follower_count > 0)
+        .values(follower_count=models.User.follower_count - 1)
+    )
+    await timeline_service.remove_author(db, current_user_id, user_id)
+    await db.commit()
     
     return {"message": "User unfollowed successfully"}
 
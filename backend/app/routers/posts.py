@@ -1,34 +1,53 @@
 """
 Posts router for creating, reading, and managing posts
 """
+import time
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session, joinedload
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from typing import List, Optional
-from app.database import get_db
+from app.database import get_async_db, get_async_read_db, AsyncSessionLocal
 from app import models, schemas
-from app.dependencies import get_current_user
-from app.services.llm_service import LLMService
+from app.config import settings
+from app.dependencies import Principal, get_current_principal, invalidate_principal
 from app.services.market_data_service import MarketDataService
-from app.services.reputation_service import ReputationService
+from app.services.prescore_service import record_analysis
+from app.services.push_service import PushService, FEED_CHANNEL, user_channel, post_channel
+from app.services.shared import (
+    get_llm_service, get_market_service, get_reputation_service, get_push_service, get_timeline_service,
+    get_search_service, get_embedding_service, get_dedup_service, get_prescore_service
+)
 
 router = APIRouter()
-llm_service = LLMService()
-market_service = MarketDataService()
-reputation_service = ReputationService()
+
+# LLM-derived fields a near-duplicate shares with its canonical post
+ANALYSIS_FIELDS = ("summary", "quality_score", "semantic_tags", "sector", "catalyst_type", "risk_profile")
+
+
+async def _get_post_with_author(db: AsyncSession, post_id: int) -> Optional[models.Post]:
+    result = await db.execute(
+        select(models.Post).options(joinedload(models.Post.author)).where(models.Post.id == post_id)
+    )
+    return result.scalars().first()
 
 
 @router.post("/", response_model=schemas.PostResponse)
 async def create_post(
     post: schemas.PostCreate,
     background_tasks: BackgroundTasks,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
+    market_service: MarketDataService = Depends(get_market_service),
+    push_service: PushService = Depends(get_push_service)
 ):
     """Create a new post and trigger LLM analysis"""
     # Get market data if ticker is provided
     market_price = None
     if post.ticker:
-        ticker_data = market_service.get_ticker_data(post.ticker)
+        ticker_data = await run_in_threadpool(market_service.get_ticker_data, post.ticker)
         market_price = ticker_data.get("current_price")
     
     # Create post
@@ -40,57 +59,133 @@ async def create_post(
         author_id=current_user.id,
         market_price_at_post=market_price
     )
+    
+    # Near-duplicates link to the post they copy and reuse its analysis instead of the LLM
+    dedup_service = get_dedup_service()
+    await dedup_service.link(db, db_post)
     db.add(db_post)
-    db.commit()
-    db.refresh(db_post)
+    await db.flush()
+    await dedup_service.index(db, db_post)
+    await db.commit()
     
     # Load author relationship for response
-    db_post = db.query(models.Post).options(joinedload(models.Post.author)).filter(models.Post.id == db_post.id).first()
+    db_post = await _get_post_with_author(db, db_post.id)
     
-    # Trigger LLM analysis in background
-    background_tasks.add_task(analyze_post_background, db_post.id, db)
+    # Trigger LLM analysis and follower timeline fan-out in background
+    background_tasks.add_task(analyze_post_background, db_post.id)
+    background_tasks.add_task(fan_out_post_background, db_post.id)
+    
+    # "New posts available" nudge; clients refetch their feed when they choose to
+    await push_service.publish(
+        FEED_CHANNEL,
+        "new_posts",
+        {"post_id": db_post.id, "ticker": db_post.ticker, "author_id": db_post.author_id}
+    )
     
     return db_post
 
 
-def analyze_post_background(post_id: int, db: Session):
-    """Background task to analyze post with LLM"""
-    post = db.query(models.Post).filter(models.Post.id == post_id).first()
-    if not post:
-        return
-    
-    # Analyze with LLM
-    analysis = llm_service.analyze_post(post.title, post.content, post.ticker)
-    
-    # Update post with analysis results
+async def analyze_post_background(post_id: int):
+    """Background task to analyze post with LLM (uses its own session)"""
+    llm_service = get_llm_service()
+    prescore_service = get_prescore_service()
+    async with AsyncSessionLocal() as db:
+        post = await db.get(models.Post, post_id)
+        if not post:
+            return
+        
+        start = time.perf_counter()
+        if post.canonical_post_id:
+            canonical = await db.get(models.Post, post.canonical_post_id)
+            if canonical is None or canonical.summary is None:
+                return  # Canonical still being analyzed: its task copies the result here
+            analysis = {field: getattr(canonical, field) for field in ANALYSIS_FIELDS}
+            analysis["analysis_tier"] = "duplicate"
+        else:
+            # Cheap local pass first; only promising posts are worth the LLM call
+            known_sector = None
+            if post.ticker:
+                known_sector = (await db.execute(
+                    select(models.TickerFundamentals.sector).where(models.TickerFundamentals.ticker == post.ticker)
+                )).scalar()
+            analysis = prescore_service.analyze(post.title, post.content, post.ticker, known_sector)
+            if prescore_service.needs_llm(analysis):
+                # Analyze with LLM (blocking client, so keep it off the event loop)
+                analysis = await run_in_threadpool(llm_service.analyze_post, post.title, post.content, post.ticker)
+        record_analysis(analysis["analysis_tier"], time.perf_counter() - start)
+        
+        # Update post with analysis results
+        await _apply_analysis(db, post, analysis)
+        if not post.canonical_post_id:
+            # Near-duplicates created while this post was being analyzed
+            duplicates = (await db.execute(
+                select(models.Post).where(models.Post.canonical_post_id == post.id, models.Post.summary.is_(None))
+            )).scalars().all()
+            for duplicate in duplicates:
+                await _apply_analysis(db, duplicate, {**analysis, "analysis_tier": "duplicate"})
+        
+        await db.commit()
+        
+        # Index for similar posts now that summary/tags/sector are known (duplicates would crowd results)
+        if not post.canonical_post_id:
+            await index_post_embedding(post)
+        
+        # Update author reputation
+        await update_author_reputation(post.author_id, db)
+
+
+async def _apply_analysis(db: AsyncSession, post: models.Post, analysis: dict):
+    """Store analysis results on a post and sync its search tags (same transaction)"""
     post.summary = analysis.get("summary")
     post.quality_score = analysis.get("quality_score", 0.0)
     post.semantic_tags = analysis.get("semantic_tags", [])
     post.sector = analysis.get("sector")
     post.catalyst_type = analysis.get("catalyst_type")
     post.risk_profile = analysis.get("risk_profile", "moderate")
-    
-    db.commit()
-    
-    # Update author reputation
-    update_author_reputation(post.author_id, db)
+    post.analysis_tier = analysis.get("analysis_tier")
+    await get_search_service().replace_post_tags(db, post.id, post.semantic_tags)
+
+
+async def index_post_embedding(post: models.Post):
+    """Add a post to the embedding index (numpy work, kept off the event loop)"""
+    try:
+        await run_in_threadpool(get_embedding_service().add_post, post)
+    except Exception as e:
+        print(f"Error indexing embedding for post {post.id}: {e}")
+
 
+async def fan_out_post_background(post_id: int):
+    """Background task to push a new post into followers' timelines (uses its own session)"""
+    timeline_service = get_timeline_service()
+    async with AsyncSessionLocal() as db:
+        try:
+            await timeline_service.fan_out_post(db, post_id)
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            print(f"Error fanning out post {post_id}: {e}")
 
-def update_author_reputation(author_id: int, db: Session):
+
+async def update_author_reputation(author_id: int, db: AsyncSession):
     """Update author reputation based on posts"""
-    author = db.query(models.User).filter(models.User.id == author_id).first()
+    reputation_service = get_reputation_service()
+    author = await db.get(models.User, author_id)
     if not author:
         return
     
     # Get all posts by author
-    posts = db.query(models.Post).filter(models.Post.author_id == author_id).all()
+    posts = (await db.execute(
+        select(models.Post.quality_score, models.Post.created_at).where(models.Post.author_id == author_id)
+    )).all()
     
-    # Get reactions received
-    reactions_received = {}
-    for post in posts:
-        for reaction in post.reactions:
-            rt = reaction.reaction_type.value
-            reactions_received[rt] = reactions_received.get(rt, 0) + 1
+    # Get reactions received, counted per type in SQL
+    reaction_rows = await db.execute(
+        select(models.Reaction.reaction_type, func.count(models.Reaction.id))
+        .join(models.Post, models.Reaction.post_id == models.Post.id)
+        .where(models.Post.author_id == author_id)
+        .group_by(models.Reaction.reaction_type)
+    )
+    reactions_received = {rt.value: count for rt, count in reaction_rows}
     
     # Calculate reputation
     posts_data = [
@@ -105,76 +200,106 @@ def update_author_reputation(author_id: int, db: Session):
         author_id, posts_data, reactions_received
     )
     
+    was_verified = author.is_verified
     author.reputation_score = new_reputation
     author.is_verified = reputation_service.should_be_verified(new_reputation)
-    db.commit()
+    await db.commit()
+    
+    if author.is_verified != was_verified:
+        invalidate_principal(author_id)
 
 
 @router.get("/{post_id}", response_model=schemas.PostResponse)
-async def get_post(post_id: int, db: Session = Depends(get_db)):
+async def get_post(post_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a single post by ID"""
-    post = db.query(models.Post).options(joinedload(models.Post.author)).filter(models.Post.id == post_id).first()
+    post = await _get_post_with_author(db, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     
     # Increment view count
     post.view_count += 1
-    db.commit()
+    await db.commit()
     
     return post
 
 
+@router.get("/{post_id}/similar", response_model=List[schemas.SimilarPostResponse])
+async def get_similar_posts(
+    post_id: int,
+    limit: int = 10,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Posts most similar in content to a post (nearest neighbours in the embedding index)"""
+    post = await db.get(models.Post, post_id)
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found")
+    
+    limit = max(1, min(limit, settings.EMBEDDING_SIMILAR_MAX))
+    neighbours = await run_in_threadpool(get_embedding_service().similar_posts, post, limit)
+    if not neighbours:
+        return []
+    
+    posts = {
+        p.id: p
+        for p in (await db.execute(
+            select(models.Post).options(joinedload(models.Post.author))
+            .where(models.Post.id.in_([neighbour_id for neighbour_id, _ in neighbours]))
+        )).scalars().all()
+    }
+    return [
+        {"post": posts[neighbour_id], "similarity": round(similarity, 4)}
+        for neighbour_id, similarity in neighbours
+        if neighbour_id in posts
+    ]
+
+
 @router.get("/", response_model=List[schemas.PostResponse])
 async def list_posts(
     ticker: Optional[str] = None,
     insight_type: Optional[schemas.InsightType] = None,
     sector: Optional[str] = None,
     limit: int = 50,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """List posts with optional filters"""
-    query = db.query(models.Post).options(joinedload(models.Post.author))
+    query = select(models.Post).options(joinedload(models.Post.author))
     
     if ticker:
-        query = query.filter(models.Post.ticker == ticker)
+        query = query.where(models.Post.ticker == ticker)
     if insight_type:
-        query = query.filter(models.Post.insight_type == insight_type)
+        query = query.where(models.Post.insight_type == insight_type)
     if sector:
-        query = query.filter(models.Post.sector == sector)
+        query = query.where(models.Post.sector == sector)
     
-    posts = query.order_by(models.Post.created_at.desc()).limit(limit).all()
-    return posts
+    result = await db.execute(query.order_by(models.Post.created_at.desc()).limit(limit))
+    return result.scalars().all()
 
 
 @router.post("/{post_id}/reactions", response_model=schemas.ReactionResponse)
 async def create_reaction(
     post_id: int,
     reaction: schemas.ReactionCreate,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
+    push_service: PushService = Depends(get_push_service)
 ):
     """Create a reaction to a post"""
-    post = db.query(models.Post).options(joinedload(models.Post.author)).filter(models.Post.id == post_id).first()
+    post = await db.get(models.Post, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     
-    # Check if reaction already exists
-    existing = db.query(models.Reaction).filter(
-        models.Reaction.post_id == post_id,
-        models.Reaction.user_id == current_user.id,
-        models.Reaction.reaction_type == reaction.reaction_type
-    ).first()
-    
-    if existing:
-        raise HTTPException(status_code=400, detail="Reaction already exists")
-    
-    # Create reaction
+    # Create reaction (the unique index rejects duplicates)
     db_reaction = models.Reaction(
         post_id=post_id,
         user_id=current_user.id,
         reaction_type=reaction.reaction_type
     )
     db.add(db_reaction)
+    try:
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Reaction already exists")
     
     # Update post reaction counts
     if reaction.reaction_type.value == "like":
@@ -188,11 +313,22 @@ async def create_reaction(
     elif reaction.reaction_type.value == "helpful":
         post.helpful_count += 1
     
-    db.commit()
-    db.refresh(db_reaction)
+    await db.commit()
+    await db.refresh(db_reaction)
+    
+    counts = {
+        "post_id": post.id,
+        "like_count": post.like_count,
+        "dislike_count": post.dislike_count,
+        "bullish_count": post.bullish_count,
+        "bearish_count": post.bearish_count,
+        "helpful_count": post.helpful_count
+    }
+    await push_service.publish(post_channel(post.id), "reaction_counts", counts)
+    if post.author_id != current_user.id:
+        await push_service.publish(user_channel(post.author_id), "reaction_counts", counts)
     
     # Update author reputation
-    update_author_reputation(post.author_id, db)
+    await update_author_reputation(post.author_id, db)
     
     return db_reaction
-
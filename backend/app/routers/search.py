@@ -0,0 +1,42 @@
+"""
+Search router for full-text post search
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.database import get_async_read_db
+from app import schemas
+from app.config import settings
+from app.services.search_service import SearchService, SORTS
+from app.services.shared import get_search_service
+
+router = APIRouter()
+
+
+@router.get("/posts", response_model=schemas.SearchResponse)
+async def search_posts(
+    q: str,
+    tags: Optional[str] = None,
+    ticker: Optional[str] = None,
+    sort: str = "relevance",
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    search_service: SearchService = Depends(get_search_service)
+):
+    """Search posts by text; `tags` is comma-separated, pass `next_cursor` back as `cursor`"""
+    if sort not in SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(SORTS)}")
+    limit = max(1, min(limit, settings.SEARCH_MAX_PAGE_SIZE))
+    try:
+        return await search_service.search_posts(
+            db,
+            q,
+            tags=tags.split(",") if tags else None,
+            ticker=ticker,
+            sort=sort,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
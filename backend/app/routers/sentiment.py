@@ -3,16 +3,16 @@ Sentiment router for social sentiment data from StockTwits
 Research shows sentiment can enhance short-term predictions
 Reference: https://arxiv.org/html/2411.00856v1
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from typing import List
 from app.services.stocktwits_service import StockTwitsService
+from app.services.shared import get_stocktwits_service
 
 router = APIRouter()
-stocktwits_service = StockTwitsService()
 
 
 @router.get("/stocktwits/batch")
-async def get_batch_sentiment(tickers: str):
+async def get_batch_sentiment(tickers: str, stocktwits_service: StockTwitsService = Depends(get_stocktwits_service)):
     """Get sentiment for multiple tickers (comma-separated)"""
     ticker_list = [t.strip().upper() for t in tickers.split(",")]
     sentiments = stocktwits_service.get_multiple_sentiments(ticker_list)
@@ -21,7 +21,7 @@ async def get_batch_sentiment(tickers: str):
 
 
 @router.get("/stocktwits/{ticker}")
-async def get_stocktwits_sentiment(ticker: str):
+async def get_stocktwits_sentiment(ticker: str, stocktwits_service: StockTwitsService = Depends(get_stocktwits_service)):
     """Get StockTwits sentiment for a ticker"""
     sentiment = stocktwits_service.get_sentiment(ticker)
     
@@ -0,0 +1,149 @@
+"""
+Real-time push endpoints (Server-Sent Events and WebSocket).
+
+A connection always receives its own `user:{id}` channel and the `feed` channel,
+plus `post:{id}` channels for the posts passed in `posts=1,2,3` (or, over the
+WebSocket, sent later as {"action": "subscribe"|"unsubscribe", "posts": [...]}).
+Browsers' EventSource cannot set headers, so the token may be passed as `?token=`.
+"""
+import asyncio
+import json
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.dependencies import resolve_principal
+from app.services.push_service import PushService, FEED_CHANNEL, user_channel, post_channel, push_connections
+from app.services.shared import get_push_service
+
+router = APIRouter()
+
+
+async def _authenticate(token: Optional[str]) -> Optional[int]:
+    """User id for a bearer token (short-lived session: streams must not pin a connection)"""
+    if not token:
+        return None
+    async with AsyncSessionLocal() as db:
+        try:
+            principal = await resolve_principal(token, db)
+        except HTTPException:
+            return None
+    return principal.id
+
+
+def _bearer_token(authorization: Optional[str], token: Optional[str]) -> Optional[str]:
+    if token:
+        return token
+    if authorization and authorization.lower().startswith("bearer "):
+        return authorization[7:]
+    return None
+
+
+def _post_channels(posts) -> List[str]:
+    """Post channels from a comma-separated string or a list of ids"""
+    if isinstance(posts, str):
+        posts = [p for p in posts.split(",") if p.strip()]
+    channels = []
+    for post_id in (posts or [])[:settings.PUSH_MAX_POST_CHANNELS]:
+        try:
+            channels.append(post_channel(int(post_id)))
+        except (TypeError, ValueError):
+            continue
+    return channels
+
+
+def _format_sse(message: dict) -> str:
+    return f"event: {message['event']}\ndata: {json.dumps(message, default=str)}\n\n"
+
+
+@router.get("/events")
+async def stream_events(
+    request: Request,
+    token: Optional[str] = None,
+    posts: Optional[str] = None,
+    push_service: PushService = Depends(get_push_service)
+):
+    """Server-Sent Events stream of push events for the current user"""
+    user_id = await _authenticate(_bearer_token(request.headers.get("authorization"), token))
+    if user_id is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+
+    channels = [user_channel(user_id), FEED_CHANNEL] + _post_channels(posts)
+    queue = await push_service.subscribe(channels)
+
+    async def event_stream():
+        push_connections.inc(transport="sse")
+        try:
+            yield f"retry: 3000\nevent: ready\ndata: {json.dumps({'channels': channels})}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=settings.PUSH_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield _format_sse(message)
+        finally:
+            push_service.unsubscribe(queue)
+            push_connections.inc(-1, transport="sse")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/ws")
+async def stream_websocket(
+    websocket: WebSocket,
+    token: Optional[str] = None,
+    posts: Optional[str] = None
+):
+    """WebSocket stream of push events; clients may change their post subscriptions"""
+    push_service = get_push_service()
+    user_id = await _authenticate(_bearer_token(websocket.headers.get("authorization"), token))
+    if user_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    channels = [user_channel(user_id), FEED_CHANNEL] + _post_channels(posts)
+    queue = await push_service.subscribe(channels)
+    push_connections.inc(transport="websocket")
+
+    async def receive_commands():
+        while True:
+            try:
+                command = json.loads(await websocket.receive_text())
+            except WebSocketDisconnect:
+                return
+            except (ValueError, TypeError):
+                continue
+            if not isinstance(command, dict):
+                continue
+            post_channels = _post_channels(command.get("posts"))
+            if command.get("action") == "subscribe":
+                push_service.add_channels(queue, post_channels)
+            elif command.get("action") == "unsubscribe":
+                push_service.remove_channels(queue, post_channels)
+
+    receiver = asyncio.create_task(receive_commands())
+    try:
+        await websocket.send_json({"event": "ready", "data": {"channels": channels}})
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                {getter, receiver}, timeout=settings.PUSH_HEARTBEAT_SECONDS, return_when=asyncio.FIRST_COMPLETED
+            )
+            if getter not in done:
+                getter.cancel()
+            if receiver in done:
+                break
+            await websocket.send_json(getter.result() if getter in done else {"event": "ping", "data": {}})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        push_service.unsubscribe(queue)
+        push_connections.inc(-1, transport="websocket")
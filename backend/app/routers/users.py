@@ -6,10 +6,9 @@ from sqlalchemy.orm import Session
 from typing import List
 from app.database import get_db
 from app import models, schemas
-from passlib.context import CryptContext
+from app.services.auth_service import get_password_hash_async
 
 router = APIRouter()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 @router.post("/", response_model=schemas.UserResponse)
@@ -24,7 +23,7 @@ async def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="User already exists")
     
     # Hash password
-    hashed_password = pwd_context.hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     
     # Create user
     db_user = models.User(
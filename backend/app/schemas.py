@@ -50,6 +50,10 @@ class PostResponse(PostBase):
     catalyst_type: Optional[str] = None
     risk_profile: Optional[str] = None
     llm_explanation: Optional[str] = None
+    canonical_post_id: Optional[int] = None  # Set when this post near-duplicates an earlier one
+    analysis_tier: Optional[str] = None  # llm, local (pre-scored below the LLM threshold), duplicate or fallback
+    ranking_score: Optional[float] = None  # Ranked endpoints with debug on only
+    ranking_factors: Optional[Dict[str, float]] = None  # Points per ranking signal (sum to ranking_score); debug only
     like_count: int
     dislike_count: int
     bullish_count: int
@@ -96,6 +100,21 @@ class FeedResponse(BaseModel):
     has_next: bool
 
 
+class TimelineResponse(BaseModel):
+    posts: List[PostResponse]
+    next_cursor: Optional[int] = None  # Pass as `before` to get the next page
+
+
+class SearchResponse(BaseModel):
+    posts: List[PostResponse]
+    next_cursor: Optional[str] = None  # Pass back as `cursor` for the next page
+
+
+class SimilarPostResponse(BaseModel):
+    post: PostResponse
+    similarity: float  # Cosine similarity of the posts' embeddings (0-1)
+
+
 class TrendingTicker(BaseModel):
     ticker: str
     post_count: int
@@ -130,6 +149,7 @@ class ExplanationResponse(BaseModel):
     explanation: str
     factors: Dict[str, Any]
     confidence_score: float
+    source: Optional[str] = None  # "llm" or "template" (LLM phrasing still being generated)
 
 
 class BatchAnalyticsRequest(BaseModel):
@@ -156,6 +176,7 @@ class ReRankRequest(BaseModel):
     post_ids: List[int]
     strategy: Optional[str] = "balanced"
     user_preferences: Optional[Dict[str, Any]] = None
+    debug: bool = False  # Include ranking_score and ranking_factors on each post
 
 
 class ReRankResponse(BaseModel):
@@ -187,6 +208,29 @@ class CommentResponse(BaseModel):
         from_attributes = True
 
 
+class ThreadCommentResponse(BaseModel):
+    id: int
+    post_id: int
+    author_id: int
+    author: UserResponse
+    parent_comment_id: Optional[int] = None
+    content: str
+    like_count: int
+    created_at: datetime
+    depth: int
+    reply_count: int  # Direct replies, including any beyond the depth limit
+    replies: List['ThreadCommentResponse'] = []
+    
+    class Config:
+        from_attributes = True
+
+
+class CommentThreadResponse(BaseModel):
+    comments: List[ThreadCommentResponse]
+    next_cursor: Optional[int] = None  # Pass as `cursor` for the next page of top-level comments
+    max_depth: int
+
+
 # Message schemas
 class MessageCreate(BaseModel):
     recipient_id: int
@@ -211,6 +255,17 @@ class ConversationResponse(BaseModel):
     user: UserResponse
     last_message: MessageResponse
     unread_count: int
+    last_read_message_id: Optional[int] = None
+
+
+class MarkReadRequest(BaseModel):
+    up_to_message_id: Optional[int] = None  # Defaults to the latest message in the conversation
+
+
+class ReadCursorResponse(BaseModel):
+    partner_id: int
+    last_read_message_id: Optional[int] = None
+    unread_count: int
 
 
 # Auth schemas
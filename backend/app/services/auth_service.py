@@ -1,11 +1,15 @@
 """
 Authentication service for JWT token generation and validation
 """
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
 import bcrypt
 from app.config import settings
+from app.metrics import registry
 
 # JWT Settings
 SECRET_KEY = getattr(settings, "SECRET_KEY", "your-secret-key-change-in-production-use-env-var")
@@ -32,11 +36,68 @@ def get_password_hash(password: str) -> str:
     # Handle both string and bytes
     if isinstance(password, str):
         password = password.encode('utf-8')
-    return bcrypt.hashpw(password, bcrypt.gensalt()).decode('utf-8')
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)).decode('utf-8')
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True when a stored hash uses a different cost than BCRYPT_ROUNDS"""
+    try:
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (AttributeError, IndexError, ValueError):
+        return False
+
+
+# bcrypt is CPU-bound (~100-300 ms at cost 12) but releases the GIL, so it runs on
+# a small dedicated pool: logins queue among themselves instead of stalling the
+# event loop, and cannot take over the default executor used by other blocking calls.
+_password_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+password_hash_seconds = registry.histogram(
+    "password_hash_seconds", "bcrypt hash/verify time including queueing, by operation"
+)
+
+
+def _get_password_executor() -> ThreadPoolExecutor:
+    global _password_executor
+    if _password_executor is None:
+        with _executor_lock:
+            if _password_executor is None:
+                _password_executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
+                )
+    return _password_executor
+
+
+async def _run_password_op(operation: str, fn, *args):
+    start = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_password_executor(), fn, *args)
+    finally:
+        password_hash_seconds.observe(time.perf_counter() - start, operation=operation)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the bounded password pool"""
+    return await _run_password_op("verify", verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash on the bounded password pool"""
+    return await _run_password_op("hash", get_password_hash, password)
+
+
+def shutdown_password_executor() -> None:
+    global _password_executor
+    with _executor_lock:
+        if _password_executor is not None:
+            _password_executor.shutdown(wait=False)
+            _password_executor = None
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
+    from jose import jwt
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -50,6 +111,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 def decode_access_token(token: str) -> Optional[dict]:
     """Decode and verify a JWT token"""
+    from jose import JWTError, jwt
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
@@ -0,0 +1,169 @@
+"""
+Local time-series store for OHLCV price/volume bars.
+
+Each ticker gets one flat binary file of fixed-size records that is appended to
+incrementally and read back through a NumPy memory map, so windowed metrics
+(24h change, volume spikes, averages) are computed locally instead of
+re-downloading history from the market data provider on every request.
+
+Several workers may share one store directory: writes to a ticker's file take an
+exclusive flock on a sidecar `<TICKER>.bars.lock`, so appends from different
+processes never interleave.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Any
+import numpy as np
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, so only one process may write to a store directory
+    fcntl = None
+from app.config import settings
+
+# One record per bar; ts is the bar open time in epoch seconds (UTC)
+BAR_DTYPE = np.dtype([
+    ("ts", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+
+
+class BarStore:
+    """Append-only, memory-mapped OHLCV store keyed by ticker"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or settings.MARKET_DATA_STORE_DIR
+        os.makedirs(self.root, exist_ok=True)
+        self._maps: Dict[str, np.memmap] = {}
+        self._writer_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()  # Guards the two dicts only; never held during file I/O
+
+    def _path(self, ticker: str) -> str:
+        return os.path.join(self.root, f"{ticker.upper()}.bars")
+
+    @contextmanager
+    def _write_lock(self, ticker: str) -> Iterator[None]:
+        """
+        Exclusive across threads (a per-ticker lock) and processes (flock on a
+        sidecar file). Readers never take it, so a write, or a wait on another
+        process's flock, only holds up other writers of the same ticker.
+        """
+        key = ticker.upper()
+        with self._lock:
+            writer_lock = self._writer_locks.setdefault(key, threading.Lock())
+        with writer_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self._path(key) + ".lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def bars(self, ticker: str) -> np.ndarray:
+        """Return all stored bars for a ticker (oldest first) as a read-only array"""
+        key = ticker.upper()
+        path = self._path(key)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=BAR_DTYPE)
+
+        count = os.path.getsize(path) // BAR_DTYPE.itemsize
+        if count == 0:
+            return np.empty(0, dtype=BAR_DTYPE)
+
+        with self._lock:
+            mapped = self._maps.get(key)
+            # Re-map when another writer has grown the file since we mapped it
+            if mapped is None or len(mapped) != count:
+                mapped = np.memmap(path, dtype=BAR_DTYPE, mode="r", shape=(count,))
+                self._maps[key] = mapped
+            return mapped
+
+    def last_timestamp(self, ticker: str) -> Optional[int]:
+        """Timestamp of the newest stored bar, or None if nothing is stored"""
+        bars = self.bars(ticker)
+        if len(bars) == 0:
+            return None
+        return int(bars["ts"][-1])
+
+    def append(self, ticker: str, new_bars: np.ndarray) -> int:
+        """
+        Append bars newer than the last stored timestamp.
+        A bar with the same timestamp as the last stored one replaces it, so the
+        still-forming current bar is kept up to date. Returns bars written.
+        """
+        if new_bars is None or len(new_bars) == 0:
+            return 0
+
+        new_bars = np.sort(np.asarray(new_bars, dtype=BAR_DTYPE), order="ts")
+        path = self._path(ticker)
+
+        # Read the tail and write under one lock, so concurrent writers can't duplicate or lose bars
+        with self._write_lock(ticker):
+            count = os.path.getsize(path) // BAR_DTYPE.itemsize if os.path.exists(path) else 0
+            last_ts = None
+            if count:
+                with open(path, "rb") as f:
+                    f.seek((count - 1) * BAR_DTYPE.itemsize)
+                    last_ts = int(np.frombuffer(f.read(BAR_DTYPE.itemsize), dtype=BAR_DTYPE)["ts"][0])
+
+            written = 0
+            if last_ts is not None:
+                tail = new_bars[new_bars["ts"] == last_ts]
+                if len(tail):
+                    with open(path, "r+b") as f:
+                        f.seek((count - 1) * BAR_DTYPE.itemsize)
+                        f.write(tail[-1:].tobytes())
+                    written += 1
+                new_bars = new_bars[new_bars["ts"] > last_ts]
+
+            # Drop duplicate timestamps within the batch, keeping the latest
+            if len(new_bars):
+                _, last_idx = np.unique(new_bars["ts"][::-1], return_index=True)
+                new_bars = new_bars[::-1][last_idx]
+                with open(path, "ab") as f:
+                    f.write(new_bars.tobytes())
+                written += len(new_bars)
+
+        return written
+
+    def window_metrics(self, ticker: str, volume_window: int = 20) -> Optional[Dict[str, Any]]:
+        """
+        Compute price/volume metrics from stored bars.
+        Change figures compare the newest bar to the one before it.
+        """
+        bars = self.bars(ticker)
+        if len(bars) == 0:
+            return None
+
+        close = bars["close"]
+        volume = bars["volume"]
+
+        current_price = float(close[-1])
+        prev_close = float(close[-2]) if len(bars) > 1 else current_price
+        price_change = ((current_price - prev_close) / prev_close) * 100 if prev_close else 0.0
+
+        current_volume = float(volume[-1])
+        prev_volume = float(volume[-2]) if len(bars) > 1 else current_volume
+        volume_change = ((current_volume - prev_volume) / prev_volume) * 100 if prev_volume > 0 else 0.0
+
+        # Average volume over the trailing window (excluding the current bar)
+        trailing = volume[-(volume_window + 1):-1]
+        avg_volume = float(trailing.mean()) if len(trailing) else current_volume
+
+        return {
+            "current_price": current_price,
+            "price_change_24h": price_change,
+            "volume_24h": current_volume,
+            "volume_change_24h": volume_change,
+            "avg_volume": avg_volume,
+            "volume_ratio": current_volume / avg_volume if avg_volume > 0 else 1.0,
+            "bar_count": len(bars),
+            "last_bar_ts": int(bars["ts"][-1]),
+        }
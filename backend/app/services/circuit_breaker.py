@@ -0,0 +1,177 @@
+"""
+Circuit breakers and health tracking for upstream providers (yfinance, StockTwits).
+
+When an upstream keeps failing (e.g. Yahoo rate limiting us) the breaker opens
+and callers fail fast to cached or stale data instead of sleeping through
+retries. After a cool-down one probe request is let through (half-open); a
+success closes the circuit again, a failure re-opens it.
+"""
+import enum
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Callable
+from app.config import settings
+from app.metrics import registry
+
+_requests_total = registry.counter(
+    "upstream_requests_total", "Upstream provider calls by outcome (success, failure, rejected)"
+)
+_state_gauge = registry.gauge(
+    "upstream_circuit_state", "Circuit breaker state per provider (0=closed, 1=half_open, 2=open)"
+)
+_error_rate_gauge = registry.gauge(
+    "upstream_error_rate", "Upstream failure ratio over the breaker's rolling window"
+)
+
+
+class CircuitState(str, enum.Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+_STATE_VALUES = {CircuitState.CLOSED: 0, CircuitState.HALF_OPEN: 1, CircuitState.OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open"""
+
+
+class CircuitBreaker:
+    """Per-provider circuit breaker with a rolling error-rate window"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        window_seconds: float = 60.0
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.window_seconds = window_seconds
+
+        self._state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._outcomes: deque = deque()  # (timestamp, ok)
+        self._lock = threading.Lock()
+        _state_gauge.set(0, provider=name)
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Whether a call may go upstream now; rejected calls should use stale data"""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CircuitState.CLOSED:
+                return True
+            if self._state == CircuitState.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+        _requests_total.inc(provider=self.name, outcome="rejected")
+        return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._record(True)
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+            if self._state != CircuitState.CLOSED:
+                self._set_state(CircuitState.CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._record(False)
+            self._consecutive_failures += 1
+            self._probe_in_flight = False
+            if self._state == CircuitState.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._set_state(CircuitState.OPEN)
+
+    def call(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn through the breaker, raising CircuitOpenError if rejected"""
+        if not self.allow_request():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._maybe_half_open()
+            self._trim()
+            total = len(self._outcomes)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            retry_in = 0.0
+            if self._state == CircuitState.OPEN:
+                retry_in = max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+            return {
+                "provider": self.name,
+                "state": self._state.value,
+                "consecutive_failures": self._consecutive_failures,
+                "window_requests": total,
+                "window_failures": failures,
+                "error_rate": failures / total if total else 0.0,
+                "retry_in_seconds": round(retry_in, 1),
+            }
+
+    def _maybe_half_open(self) -> None:
+        if self._state == CircuitState.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._probe_in_flight = False
+            self._set_state(CircuitState.HALF_OPEN)
+
+    def _set_state(self, state: CircuitState) -> None:
+        if state != self._state:
+            print(f"Circuit breaker '{self.name}': {self._state.value} -> {state.value}")
+        self._state = state
+        _state_gauge.set(_STATE_VALUES[state], provider=self.name)
+
+    def _record(self, ok: bool) -> None:
+        self._outcomes.append((time.monotonic(), ok))
+        self._trim()
+        _requests_total.inc(provider=self.name, outcome="success" if ok else "failure")
+        failures = sum(1 for _, good in self._outcomes if not good)
+        _error_rate_gauge.set(failures / len(self._outcomes), provider=self.name)
+
+    def _trim(self) -> None:
+        cutoff = time.monotonic() - self.window_seconds
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            self._outcomes.popleft()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Return the shared breaker for an upstream provider, creating it on first use"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                recovery_timeout=settings.CIRCUIT_BREAKER_RECOVERY_SECONDS,
+                window_seconds=settings.CIRCUIT_BREAKER_WINDOW_SECONDS,
+            )
+            _breakers[name] = breaker
+        return breaker
+
+
+def all_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every breaker created so far"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.stats() for b in breakers}
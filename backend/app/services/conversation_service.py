@@ -0,0 +1,191 @@
+"""
+Conversation summaries for the direct-message inbox.
+
+Each user has one `ConversationSummary` row per conversation partner, holding
+the last message and the number of unread messages from that partner. Rows are
+upserted in the same transaction as the message write, so the inbox is a single
+indexed range scan instead of a fold over every message the user ever exchanged.
+"""
+from typing import Dict, List, Optional
+from sqlalchemy import select, update, case, func, literal, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from app import models
+
+
+class ConversationService:
+    """Maintains and reads per-user conversation summaries"""
+
+    async def record_message(self, db: AsyncSession, message: models.DirectMessage) -> None:
+        """Upsert both participants' summaries for a newly flushed message"""
+        # (user, partner, unread increment): only the recipient gains an unread message
+        sides = [
+            (message.sender_id, message.recipient_id, 0),
+            (message.recipient_id, message.sender_id, 1),
+        ]
+        for user_id, partner_id, unread in sides:
+            await self._upsert(db, message.id, user_id, partner_id, unread)
+
+    async def mark_read_up_to(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        partner_id: int,
+        up_to_message_id: Optional[int] = None
+    ) -> Dict:
+        """Mark partner's messages up to an id (default: all) as read and advance the read cursor"""
+        dm = models.DirectMessage
+        summary = models.ConversationSummary
+        from_partner = (dm.sender_id == partner_id, dm.recipient_id == user_id)
+
+        if up_to_message_id is None:
+            cursor = select(func.max(dm.id)).where(*from_partner).scalar_subquery()
+        else:
+            cursor = literal(up_to_message_id)
+
+        # One statement for the whole range instead of one dirty object per message
+        conditions = [*from_partner, or_(dm.is_read == False, dm.is_read == None)]
+        if up_to_message_id is not None:
+            conditions.append(dm.id <= up_to_message_id)
+        result = await db.execute(update(dm).where(*conditions).values(is_read=True))
+        newly_read = result.rowcount or 0
+
+        await db.execute(
+            update(summary)
+            .where(summary.user_id == user_id, summary.partner_id == partner_id)
+            .values(
+                unread_count=case(
+                    (summary.unread_count > newly_read, summary.unread_count - newly_read),
+                    else_=0
+                ),
+                # The cursor only moves forward
+                last_read_message_id=case(
+                    (func.coalesce(summary.last_read_message_id, 0) < cursor, cursor),
+                    else_=summary.last_read_message_id
+                )
+            )
+        )
+
+        row = (await db.execute(
+            select(summary.last_read_message_id, summary.unread_count)
+            .where(summary.user_id == user_id, summary.partner_id == partner_id)
+        )).first()
+        return {
+            "partner_id": partner_id,
+            "last_read_message_id": row.last_read_message_id if row else None,
+            "unread_count": row.unread_count if row else 0
+        }
+
+    async def list_conversations(self, db: AsyncSession, user_id: int, limit: int, offset: int = 0) -> List[Dict]:
+        """Inbox entries, most recent conversation first"""
+        summaries = (await db.execute(
+            select(models.ConversationSummary).options(
+                joinedload(models.ConversationSummary.partner),
+                joinedload(models.ConversationSummary.last_message).options(
+                    joinedload(models.DirectMessage.sender),
+                    joinedload(models.DirectMessage.recipient)
+                )
+            ).where(
+                models.ConversationSummary.user_id == user_id
+            ).order_by(
+                models.ConversationSummary.last_message_at.desc(),
+                models.ConversationSummary.last_message_id.desc()
+            ).offset(offset).limit(limit)
+        )).scalars().all()
+
+        if not summaries and offset == 0:
+            # No summary rows yet (e.g. messages written before the table existed)
+            return await self.list_conversations_from_messages(db, user_id, limit, offset)
+
+        return [
+            {
+                "user": s.partner,
+                "last_message": s.last_message,
+                "unread_count": s.unread_count,
+                "last_read_message_id": s.last_read_message_id
+            }
+            for s in summaries
+        ]
+
+    async def list_conversations_from_messages(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        limit: int,
+        offset: int = 0
+    ) -> List[Dict]:
+        """Inbox entries computed from direct_messages with a window function"""
+        dm = models.DirectMessage
+        partner_id = case((dm.sender_id == user_id, dm.recipient_id), else_=dm.sender_id)
+        is_unread = case(
+            (and_(dm.recipient_id == user_id, or_(dm.is_read == False, dm.is_read == None)), 1),
+            else_=0
+        )
+        ranked = select(
+            dm.id.label("message_id"),
+            dm.created_at.label("created_at"),
+            partner_id.label("partner_id"),
+            func.row_number().over(
+                partition_by=partner_id,
+                order_by=(dm.created_at.desc(), dm.id.desc())
+            ).label("rn"),
+            func.sum(is_unread).over(partition_by=partner_id).label("unread_count"),
+        ).where(
+            or_(dm.sender_id == user_id, dm.recipient_id == user_id)
+        ).subquery()
+
+        latest = (await db.execute(
+            select(ranked.c.message_id, ranked.c.unread_count)
+            .where(ranked.c.rn == literal(1))
+            .order_by(ranked.c.created_at.desc(), ranked.c.message_id.desc())
+            .offset(offset).limit(limit)
+        )).all()
+        if not latest:
+            return []
+
+        messages = {
+            msg.id: msg
+            for msg in (await db.execute(
+                select(dm).options(
+                    joinedload(dm.sender),
+                    joinedload(dm.recipient)
+                ).where(dm.id.in_([row.message_id for row in latest]))
+            )).scalars().all()
+        }
+
+        result = []
+        for row in latest:
+            msg = messages[row.message_id]
+            result.append({
+                "user": msg.recipient if msg.sender_id == user_id else msg.sender,
+                "last_message": msg,
+                "unread_count": int(row.unread_count or 0)
+            })
+        return result
+
+    async def _upsert(self, db: AsyncSession, message_id: int, user_id: int, partner_id: int, unread: int) -> None:
+        summary = models.ConversationSummary
+        source = select(
+            literal(user_id), literal(partner_id), models.DirectMessage.id,
+            models.DirectMessage.created_at, literal(unread)
+        ).where(models.DirectMessage.id == message_id)
+        columns = ["user_id", "partner_id", "last_message_id", "last_message_at", "unread_count"]
+
+        # Both supported backends (PostgreSQL, SQLite) have INSERT ... ON CONFLICT
+        if db.get_bind().dialect.name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+
+        stmt = insert(summary).from_select(columns, source)
+        # Message ids only grow, so a late-committing older message never replaces a newer one
+        is_newer = stmt.excluded.last_message_id > summary.last_message_id
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=["user_id", "partner_id"],
+            set_={
+                "last_message_id": case((is_newer, stmt.excluded.last_message_id), else_=summary.last_message_id),
+                "last_message_at": case((is_newer, stmt.excluded.last_message_at), else_=summary.last_message_at),
+                "unread_count": summary.unread_count + stmt.excluded.unread_count,
+            }
+        ))
+
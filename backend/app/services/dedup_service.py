@@ -0,0 +1,109 @@
+"""
+Near-duplicate post detection with MinHash and banded LSH.
+
+Each post's title and content are reduced to word shingles and a NUM_PERM-value
+MinHash signature (stored in posts.minhash), whose BANDS bands are hashed into
+`post_minhash_bands` keys. A new post looks up its band keys (one indexed
+query), estimates Jaccard similarity against the few canonical posts it
+collides with, and either links to the best match above DEDUP_THRESHOLD or
+becomes a canonical post itself (one more insert). Only canonical posts are
+indexed, so buckets stay small as copies accumulate.
+"""
+import re
+import zlib
+from typing import List, Optional, Tuple
+import numpy as np
+from sqlalchemy import select, insert, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app import models
+
+# Changing these invalidates stored signatures and band keys
+NUM_PERM = 64
+BANDS = 16  # 16 bands x 4 rows: pairs above ~0.5 Jaccard almost always collide
+SHINGLE_SIZE = 3  # Words per shingle
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+_rng = np.random.default_rng(1_000_003)  # Fixed: every process must use the same permutations
+_PERM_A = _rng.integers(1, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def shingles(text: str) -> List[str]:
+    words = TOKEN_RE.findall((text or "").lower())
+    if len(words) < SHINGLE_SIZE:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+
+
+class DedupService:
+    """MinHash signatures plus an LSH band index of canonical posts"""
+
+    def __init__(self):
+        self.threshold = settings.DEDUP_THRESHOLD
+        self.rows_per_band = NUM_PERM // BANDS
+        # Built once: both run on every post creation
+        self._candidates_statement = select(models.Post.id, models.Post.minhash).where(
+            models.Post.id.in_(
+                select(models.PostMinHashBand.post_id)
+                .where(models.PostMinHashBand.band_key.in_(bindparam("band_keys", expanding=True)))
+            )
+        )
+        self._insert_bands = insert(models.PostMinHashBand)
+
+    def signature(self, title: str, content: str) -> Optional[np.ndarray]:
+        """MinHash signature (NUM_PERM uint32 values), or None for a post without words"""
+        unique = set(shingles(f"{title}\n{content}"))
+        if not unique:
+            return None
+        hashes = np.fromiter((zlib.crc32(s.encode()) for s in unique), dtype=np.uint64, count=len(unique))
+        permuted = (hashes[:, None] * _PERM_A + _PERM_B) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def band_keys(self, signature: np.ndarray) -> List[int]:
+        """One key per band: band number in the high bits, hash of its rows in the low 32"""
+        bands = signature.reshape(BANDS, self.rows_per_band)
+        return [(band << 32) | zlib.crc32(bands[band].tobytes()) for band in range(BANDS)]
+
+    def similarity(self, a: np.ndarray, b: np.ndarray) -> float:
+        """Estimated Jaccard similarity of the two posts' shingle sets"""
+        return float(np.mean(a == b))
+
+    def candidates(self, signature: np.ndarray) -> Tuple:
+        """(statement, parameters) selecting canonical posts that share a band with this one"""
+        return self._candidates_statement, {"band_keys": self.band_keys(signature)}
+
+    def best_match(self, signature: np.ndarray, candidates) -> Optional[int]:
+        """Id of the most similar candidate at or above the threshold"""
+        best_id, best_score = None, self.threshold
+        for post_id, stored in candidates:
+            score = self.similarity(signature, np.frombuffer(stored, dtype=np.uint32))
+            if score >= best_score:
+                best_id, best_score = post_id, score
+        return best_id
+
+    def bands(self, post: models.Post) -> Tuple:
+        """(statement, parameters) indexing a flushed canonical post's bands"""
+        signature = np.frombuffer(post.minhash, dtype=np.uint32)
+        return self._insert_bands, [{"band_key": key, "post_id": post.id} for key in set(self.band_keys(signature))]
+
+    async def link(self, db: AsyncSession, post: models.Post) -> Optional[int]:
+        """
+        Sign a new (not yet flushed) post and point canonical_post_id at the
+        canonical post it near-duplicates, if any; returns that id.
+        """
+        signature = self.signature(post.title, post.content)
+        if signature is None:
+            post.minhash = None
+            return None
+        post.minhash = signature.tobytes()
+        post.canonical_post_id = self.best_match(signature, (await db.execute(*self.candidates(signature))).all())
+        return post.canonical_post_id
+
+    async def index(self, db: AsyncSession, post: models.Post) -> None:
+        """After the post is flushed: make it matchable, unless it is itself a duplicate"""
+        if post.minhash is not None and post.canonical_post_id is None:
+            await db.execute(*self.bands(post))  # Core executemany: no ORM unit of work per band row
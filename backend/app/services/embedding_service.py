@@ -0,0 +1,342 @@
+"""
+Local post embeddings and approximate nearest-neighbour search (CPU only).
+
+Posts are embedded as hashed TF-IDF vectors: title, summary, content, tags,
+ticker and sector tokens (plus word bigrams) are hashed into EMBEDDING_DIM
+signed buckets, weighted by bucket IDF and L2-normalized, so cosine similarity
+is a dot product and no model has to be downloaded or loaded.
+
+Vectors are appended to one flat float32 record file per dimension and read
+back through a NumPy memory map (like the bar store), so every worker shares
+the same index and new posts are picked up incrementally. Lookups use
+random-hyperplane LSH tables (with query-directed multi-probe) to pick
+candidates and rerank them exactly; rows appended since the tables were built
+are scanned.
+"""
+import math
+import os
+import re
+import threading
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from app.config import settings
+
+TOKEN_RE = re.compile(r"[a-z0-9$]+")
+STOPWORDS = frozenset(
+    "a an and are as at be been but by for from has have in into is it its of on or that the "
+    "their this to was were will with we i you they our not so if than then there".split()
+)
+FIELD_WEIGHTS = {"title": 2.0, "summary": 1.0, "content": 1.0}
+LSH_SEED = 20261019  # Fixed: every process must draw the same hyperplanes
+
+
+def record_dtype(dim: int) -> np.dtype:
+    return np.dtype([("post_id", "<i8"), ("vector", "<f4", (dim,))])
+
+
+def _tokens(text: Optional[str]) -> List[str]:
+    words = [w for w in TOKEN_RE.findall((text or "").lower()) if len(w) > 1 and w not in STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def post_terms(post: Dict[str, Any]) -> Dict[str, float]:
+    """Weighted term counts for a post dict (title, summary, content, semantic_tags, ticker, sector)"""
+    terms: Dict[str, float] = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        for token in _tokens(post.get(field)):
+            terms[token] = terms.get(token, 0.0) + weight
+    for tag in post.get("semantic_tags") or []:
+        if isinstance(tag, str) and tag.strip():
+            terms[f"tag:{tag.strip().lower()}"] = 1.5
+    if post.get("ticker"):
+        terms[f"${post['ticker'].lower()}"] = 2.0
+    if post.get("sector"):
+        terms[f"sector:{post['sector'].lower()}"] = 1.0
+    return terms
+
+
+def post_embedding_fields(post) -> Dict[str, Any]:
+    """The fields the embedder reads, from a post dict or a loaded Post model"""
+    if isinstance(post, dict):
+        return post
+    return {
+        "id": post.id,
+        "title": post.title,
+        "summary": post.summary,
+        "content": post.content,
+        "semantic_tags": post.semantic_tags,
+        "ticker": post.ticker,
+        "sector": post.sector,
+    }
+
+
+class PostVectorIndex:
+    """Append-only, memory-mapped post vectors with LSH candidate tables"""
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        dim: Optional[int] = None,
+        tables: Optional[int] = None,
+        bits: Optional[int] = None
+    ):
+        self.root = root or settings.EMBEDDING_INDEX_DIR
+        self.dim = dim or settings.EMBEDDING_DIM
+        self.tables = tables or settings.EMBEDDING_LSH_TABLES
+        self.bits = bits or settings.EMBEDDING_LSH_BITS
+        self.dtype = record_dtype(self.dim)
+        self.path = os.path.join(self.root, f"posts_{self.dim}.vec")
+        os.makedirs(self.root, exist_ok=True)
+
+        planes = np.random.default_rng(LSH_SEED).standard_normal((self.dim, self.tables * self.bits))
+        self._planes = planes.astype(np.float32)
+        self._bit_values = (1 << np.arange(self.bits, dtype=np.int64))
+        # Keys are stored as uint16 and rows as int32: about 6 bytes per post per table
+        if self.bits > 16:
+            raise ValueError("EMBEDDING_LSH_BITS must be at most 16")
+
+        self._lock = threading.Lock()
+        self._inode: Optional[int] = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self._records: Optional[np.memmap] = None
+        self._count = 0                              # Rows read from the file so far
+        self._latest: Dict[int, int] = {}            # post id -> newest row
+        self._alive = np.zeros(0, dtype=bool)        # False for rows superseded by a newer one
+        self._signatures = np.zeros((0, self.tables), dtype=np.uint16)
+        self._df = np.zeros(self.dim, dtype=np.int64)  # Live rows with a non-zero bucket
+        # Per table: signatures sorted, with their rows; rows past _tabled are scanned
+        self._sorted_keys: List[np.ndarray] = []
+        self._sorted_rows: List[np.ndarray] = []
+        self._tabled = 0
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._latest)
+
+    def idf(self) -> np.ndarray:
+        self.refresh()
+        return np.log((1.0 + len(self._latest)) / (1.0 + self._df)) + 1.0
+
+    def append(self, post_id: int, vector: np.ndarray) -> None:
+        """Store (or replace) a post's vector"""
+        record = np.zeros(1, dtype=self.dtype)
+        record["post_id"] = post_id
+        record["vector"] = vector
+        with self._lock:
+            # One write per record in append mode, so concurrent workers do not interleave
+            with open(self.path, "ab") as f:
+                f.write(record.tobytes())
+        self.refresh()
+
+    def vector(self, post_id: int) -> Optional[np.ndarray]:
+        self.refresh()
+        row = self._latest.get(post_id)
+        return None if row is None else np.array(self._records["vector"][row])
+
+    def rewrite(self, batches: Iterable[Tuple[np.ndarray, np.ndarray]]) -> int:
+        """Replace the whole index with (post ids, vectors) batches; returns rows written"""
+        tmp_path = f"{self.path}.tmp"
+        written = 0
+        with open(tmp_path, "wb") as f:
+            for post_ids, vectors in batches:
+                records = np.zeros(len(post_ids), dtype=self.dtype)
+                records["post_id"] = post_ids
+                records["vector"] = vectors
+                f.write(records.tobytes())
+                written += len(records)
+        # Atomic swap; workers notice the new file on their next lookup
+        os.replace(tmp_path, self.path)
+        self.refresh()
+        return written
+
+    def refresh(self) -> None:
+        """Pick up rows appended (by any process) since the last call"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        count = stat.st_size // self.dtype.itemsize
+        if count == self._count and stat.st_ino == self._inode:
+            return
+        with self._lock:
+            if stat.st_ino != self._inode:
+                self._reset()  # Rewritten by a rebuild: reload from scratch
+                self._inode = stat.st_ino
+            if count <= self._count:
+                return
+            records = np.memmap(self.path, dtype=self.dtype, mode="r", shape=(count,))
+            new = records[self._count:count]
+            vectors = np.asarray(new["vector"], dtype=np.float32)
+
+            alive = np.ones(count, dtype=bool)
+            alive[:self._count] = self._alive
+            for offset, post_id in enumerate(new["post_id"].tolist()):
+                row = self._count + offset
+                previous = self._latest.get(post_id)
+                if previous is not None:
+                    alive[previous] = False
+                    self._df -= (records["vector"][previous] != 0)
+                self._latest[post_id] = row
+            self._df += (vectors != 0).sum(axis=0)
+
+            self._signatures = np.concatenate([self._signatures, self._signature(vectors)])
+            self._alive = alive
+            self._records = records
+            self._count = count
+            if count - self._tabled > settings.EMBEDDING_REINDEX_PENDING:
+                self._build_tables()
+
+    def nearest(
+        self,
+        vector: np.ndarray,
+        k: int,
+        exclude: Iterable[int] = ()
+    ) -> List[Tuple[int, float]]:
+        """Up to k (post id, cosine similarity) pairs, most similar first"""
+        self.refresh()
+        with self._lock:
+            if not self._count:
+                return []
+            query = np.asarray(vector, dtype=np.float32)
+            rows = self._candidates(query)
+            rows = rows[self._alive[rows]]
+            if not len(rows):
+                return []
+            scores = self._records["vector"][rows] @ query
+            excluded = set(exclude)
+            top = np.argsort(-scores)[:k + len(excluded)]
+            post_ids = self._records["post_id"][rows[top]]
+        results = []
+        for post_id, score in zip(post_ids.tolist(), scores[top].tolist()):
+            if post_id in excluded or score <= 0:
+                continue
+            results.append((post_id, score))
+            if len(results) == k:
+                break
+        return results
+
+    def _signature(self, vectors: np.ndarray) -> np.ndarray:
+        """One LSH key per table: the sign bits of `bits` random projections"""
+        signs = (np.atleast_2d(vectors) @ self._planes) > 0
+        keys = signs.reshape(len(signs), self.tables, self.bits).astype(np.int64) @ self._bit_values
+        return keys.astype(np.uint16)
+
+    def _build_tables(self) -> None:
+        signatures = self._signatures[:self._count]
+        self._sorted_keys, self._sorted_rows = [], []
+        for table in range(self.tables):
+            order = np.argsort(signatures[:, table], kind="stable").astype(np.int32)
+            self._sorted_keys.append(signatures[order, table])
+            self._sorted_rows.append(order)
+        self._tabled = self._count
+
+    def _candidates(self, query: np.ndarray) -> np.ndarray:
+        """
+        Rows in the query's LSH buckets, nearest buckets first, plus untabled rows.
+        Query-directed multi-probe: besides its own bucket in each table, probe the
+        buckets that differ in one or two of the bits whose projections were
+        closest to zero (the likeliest to have flipped for a near neighbour),
+        cheapest first across all tables, until the candidate budget is spent.
+        """
+        if self._count <= settings.EMBEDDING_MAX_CANDIDATES:
+            return np.arange(self._count)
+
+        budget = settings.EMBEDDING_MAX_CANDIDATES
+        chosen = [np.arange(self._tabled, self._count)]
+        total = len(chosen[0])
+        if self._tabled:
+            for _, table, start, end in self._probes(query):
+                if total >= budget:
+                    break
+                if end > start:
+                    chosen.append(self._sorted_rows[table][start:min(end, start + budget - total)])
+                    total += len(chosen[-1])
+        # Dedupe with a mask: cheaper than sorting, and yields rows in file order for the gather
+        mask = np.zeros(self._count, dtype=bool)
+        for rows in chosen:
+            mask[rows] = True
+        return np.flatnonzero(mask)
+
+    def _probes(self, query: np.ndarray) -> List[Tuple[float, int, int, int]]:
+        """(cost, table, start, end) bucket ranges; cost = summed |projection| of flipped bits"""
+        projections = (query @ self._planes).reshape(self.tables, self.bits)
+        keys = (projections > 0).astype(np.int64) @ self._bit_values
+        margins = np.abs(projections)
+        probes = []
+        for table in range(self.tables):
+            uncertain = np.argsort(margins[table])[:settings.EMBEDDING_PROBE_BITS].tolist()
+            flips = [(0.0, 0)]
+            for i, first in enumerate(uncertain):
+                flips.append((margins[table, first], 1 << first))
+                for second in uncertain[i + 1:]:
+                    flips.append((margins[table, first] + margins[table, second], (1 << first) | (1 << second)))
+            probe_keys = np.array([keys[table] ^ mask for _, mask in flips], dtype=np.uint16)
+            starts = np.searchsorted(self._sorted_keys[table], probe_keys, side="left")
+            ends = np.searchsorted(self._sorted_keys[table], probe_keys, side="right")
+            probes.extend(
+                (cost, table, start, end)
+                for (cost, _), start, end in zip(flips, starts.tolist(), ends.tolist())
+            )
+        probes.sort()
+        return probes
+
+
+class EmbeddingService:
+    """Hashed TF-IDF post embeddings with a shared nearest-neighbour index"""
+
+    def __init__(self, index: Optional[PostVectorIndex] = None):
+        self.index = index or PostVectorIndex()
+        self.dim = self.index.dim
+
+    def hashed_terms(self, post: Dict[str, Any]) -> List[Tuple[int, float]]:
+        """(bucket, signed sublinear term weight) for each of a post's terms"""
+        hashed = []
+        for term, weight in post_terms(post).items():
+            digest = zlib.crc32(term.encode())  # Stable across processes, unlike hash()
+            sign = 1.0 if (digest // self.dim) & 1 else -1.0
+            hashed.append((digest % self.dim, sign * (1.0 + math.log(weight))))
+        return hashed
+
+    def embed(self, post: Dict[str, Any], idf: Optional[np.ndarray] = None) -> np.ndarray:
+        """Unit-length vector for a post (zero vector if it has no terms)"""
+        if idf is None:
+            idf = self.index.idf()
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for bucket, value in self.hashed_terms(post):
+            vector[bucket] += value * idf[bucket]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def add_post(self, post) -> None:
+        """Index (or re-index) a post; call after analysis fills summary/tags/sector"""
+        post = post_embedding_fields(post)
+        vector = self.embed(post)
+        if np.any(vector):
+            self.index.append(post["id"], vector)
+
+    def similar_posts(self, post, limit: int = 10) -> List[Tuple[int, float]]:
+        """(post id, similarity) of the posts nearest to a post, itself excluded"""
+        post = post_embedding_fields(post)
+        vector = self.index.vector(post["id"])
+        if vector is None:
+            vector = self.embed(post)
+        return self.index.nearest(vector, limit, exclude=[post["id"]])
+
+    def interest_candidates(
+        self,
+        post_ids: List[int],
+        limit: int,
+        exclude: Iterable[int] = ()
+    ) -> Dict[int, float]:
+        """Posts nearest to the centroid of the given posts (e.g. a user's liked posts)"""
+        vectors = [v for v in (self.index.vector(post_id) for post_id in post_ids) if v is not None]
+        if not vectors:
+            return {}
+        centroid = np.mean(vectors, axis=0)
+        norm = np.linalg.norm(centroid)
+        if not norm:
+            return {}
+        return dict(self.index.nearest(centroid / norm, limit, exclude=set(post_ids) | set(exclude)))
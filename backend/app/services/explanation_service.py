@@ -0,0 +1,286 @@
+"""
+Recommendation explanations: instant template explanations with a cached LLM
+upgrade for ranked feeds, and single-flight streaming of a post's stored
+explanation.
+
+Every ranked post gets an explanation at once from the template engine, which
+words the score components that actually ranked it (LLMService.template_explanation).
+The LLM phrasing is an upgrade generated in the background and cached; later
+requests in the same context get it instead of the template. Feed explanations
+depend on who is looking and when, so they are never written to
+Post.llm_explanation. They are cached under (post, preference profile hash,
+ranking strategy, bucketed ranking factors, bucketed market state) with TTL and
+LRU eviction: identical contexts reuse the text, and only a real change (a
+preference edit, another strategy, a factor or the post's engagement moving a
+bucket, a price move or volume spike) costs another LLM call.
+
+For streaming, the first viewer of a post without a stored explanation starts one streaming
+LLM completion; everyone who asks for the same post while it runs follows that
+same generation (late joiners first get the text so far). The finished text is
+saved to Post.llm_explanation, so later viewers read it without an LLM call;
+a failed generation is not saved.
+The generation belongs to the service, not to the request that started it: if
+that viewer disconnects, the others keep streaming and the result is still
+saved. Single-flight is per process; workers do not share generations.
+"""
+import asyncio
+import hashlib
+import json
+import math
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import update
+from app.cache import TTLCache
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.metrics import registry
+from app import models
+from app.services.shared import get_llm_service
+
+explanation_cache_total = registry.counter(
+    "explanation_cache_total", "Feed explanation lookups by result (hit, shared, miss, template)"
+)
+
+
+class ExplanationFlight:
+    """One in-progress generation: its fragments so far and whether it has finished"""
+    
+    def __init__(self):
+        self.fragments: List[str] = []
+        self.done = False
+        self.error: Optional[str] = None
+        self._changed = asyncio.Event()
+    
+    @property
+    def text(self) -> str:
+        return "".join(self.fragments)
+    
+    def append(self, fragment: str) -> None:
+        self.fragments.append(fragment)
+        self._notify()
+    
+    @property
+    def succeeded(self) -> bool:
+        """Finished with a complete model explanation (a failed flight's fragments are partial at best)"""
+        return self.done and self.error is None
+    
+    def finish(self, error: Optional[str] = None) -> None:
+        self.done = True
+        self.error = error
+        self._notify()
+    
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+    
+    async def follow(self, heartbeat_seconds: float) -> AsyncIterator[Optional[str]]:
+        """Every fragment from the start, then new ones as they arrive; None on idle heartbeats"""
+        position = 0
+        while True:
+            changed = self._changed
+            while position < len(self.fragments):
+                yield self.fragments[position]
+                position += 1
+            if self.done:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=heartbeat_seconds)
+            except asyncio.TimeoutError:
+                yield None
+
+
+def preference_hash(user_preferences: Optional[Dict[str, Any]]) -> str:
+    """Stable digest of a preference profile (users with identical profiles share explanations)"""
+    if not user_preferences:
+        return "none"
+    canonical = {
+        key: sorted(value) if isinstance(value, list) else value
+        for key, value in user_preferences.items()
+    }
+    return hashlib.sha1(json.dumps(canonical, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _log_bucket(count: Optional[int]) -> int:
+    """0, 1, 2-3, 4-7, ... : engagement only matters by order of magnitude"""
+    return int(math.log2(count)) + 1 if count and count > 0 else 0
+
+
+class ExplanationService:
+    """Cached per-context explanations and single-flight streaming of per-post explanations"""
+    
+    def __init__(self):
+        self._flights: Dict[int, ExplanationFlight] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._cache = TTLCache(maxsize=settings.EXPLANATION_CACHE_SIZE, ttl=settings.EXPLANATION_CACHE_TTL_SECONDS)
+        self._pending: Dict[Tuple, asyncio.Future] = {}
+        self._upgrades: Set[asyncio.Task] = set()
+    
+    def context_key(
+        self,
+        post: Dict[str, Any],
+        user_preferences: Optional[Dict[str, Any]],
+        ranking_score: float,
+        market_context: Any,
+        strategy: str = "balanced"
+    ) -> Tuple:
+        """Cache key: everything the explanation prompt depends on, coarsened to what changes its wording"""
+        ticker = post.get("ticker")
+        market_state: Tuple = ()
+        if market_context and ticker:
+            data = get_llm_service()._get_ticker_market_data(market_context, ticker) or {}
+            market_state = (
+                int((data.get("price_change_24h") or 0) // settings.EXPLANATION_PRICE_BUCKET_PCT),
+                bool(data.get("volume_spike")),
+                bool(data.get("earnings_release")),
+            )
+        # The prompt cites the strategy-weighted breakdown, so each factor is bucketed to whole points
+        factors = post.get("ranking_factors")
+        ranking_state = (
+            tuple(sorted((factor, int(points)) for factor, points in factors.items()))
+            if factors else int(ranking_score or 0)
+        )
+        return (
+            post.get("id"),
+            preference_hash(user_preferences),
+            strategy,
+            int((post.get("quality_score") or 0) // 10),
+            int((post.get("author_reputation_score") or 0) // 10),
+            _log_bucket(post.get("like_count")),
+            _log_bucket(post.get("helpful_count")),
+            ranking_state,
+            market_state,
+        )
+    
+    def explain_now(
+        self,
+        post: Dict[str, Any],
+        user_id: Optional[int],
+        user_preferences: Optional[Dict[str, Any]],
+        ranking_score: float,
+        market_context: Any = None,
+        strategy: str = "balanced",
+        upgrade: bool = False
+    ) -> str:
+        """
+        Explanation for one ranked post without waiting on the LLM: the cached LLM
+        text for this context if there is one, else the template explanation. With
+        `upgrade`, a miss also starts the LLM explanation in the background.
+        """
+        key = self.context_key(post, user_preferences, ranking_score, market_context, strategy)
+        cached = self._cache.get(key)
+        if cached is not None:
+            explanation_cache_total.inc(result="hit")
+            return cached
+        
+        explanation_cache_total.inc(result="template")
+        if upgrade and settings.EXPLANATION_LLM_UPGRADE and key not in self._pending:
+            task = asyncio.create_task(
+                self._upgrade(post, user_id, user_preferences, ranking_score, market_context, strategy)
+            )
+            self._upgrades.add(task)
+            task.add_done_callback(self._upgrades.discard)
+        
+        # Ranked posts carry the ranker's factor vector; score anything else here
+        llm_service = get_llm_service()
+        components = post.get("ranking_factors") or llm_service.score_components(
+            post, user_preferences, market_context, strategy
+        )
+        return llm_service.template_explanation(post, components, user_preferences, market_context, strategy)
+    
+    async def _upgrade(
+        self,
+        post: Dict[str, Any],
+        user_id: Optional[int],
+        user_preferences: Optional[Dict[str, Any]],
+        ranking_score: float,
+        market_context: Any,
+        strategy: str
+    ) -> None:
+        try:
+            await self.explain(post, user_id, user_preferences, ranking_score, market_context, strategy)
+        except Exception as e:
+            print(f"Error generating explanation for post {post.get('id')}: {e}")
+    
+    async def explain(
+        self,
+        post: Dict[str, Any],
+        user_id: Optional[int],
+        user_preferences: Optional[Dict[str, Any]],
+        ranking_score: float,
+        market_context: Any = None,
+        strategy: str = "balanced"
+    ) -> str:
+        """LLM explanation for one ranked post, from the cache unless its context changed"""
+        key = self.context_key(post, user_preferences, ranking_score, market_context, strategy)
+        cached = self._cache.get(key)
+        if cached is not None:
+            explanation_cache_total.inc(result="hit")
+            return cached
+        
+        pending = self._pending.get(key)
+        if pending is not None:
+            # Same context already being generated (e.g. concurrent feed requests)
+            explanation_cache_total.inc(result="shared")
+            return await asyncio.shield(pending)
+        
+        explanation_cache_total.inc(result="miss")
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            explanation = await run_in_threadpool(
+                get_llm_service().generate_explanation, post, user_id, ranking_score, market_context=market_context
+            )
+            self._cache.set(key, explanation)
+            future.set_result(explanation)
+            return explanation
+        except Exception as e:
+            # Failures are not cached: the template keeps being served and a later request retries
+            future.set_exception(e)
+            future.exception()  # Retrieved here, so an unshared failure isn't logged as never retrieved
+            raise
+        finally:
+            self._pending.pop(key, None)
+    
+    def flight(self, post_id: int, stream_factory: Callable[[], Any]) -> ExplanationFlight:
+        """
+        The running generation for a post, or a new one fed by `stream_factory`
+        (a blocking callable returning an iterator of text fragments).
+        """
+        flight = self._flights.get(post_id)
+        if flight is None:
+            flight = ExplanationFlight()
+            self._flights[post_id] = flight
+            self._tasks[post_id] = asyncio.create_task(self._generate(post_id, flight, stream_factory))
+        return flight
+    
+    async def _generate(self, post_id: int, flight: ExplanationFlight, stream_factory: Callable[[], Any]) -> None:
+        loop = asyncio.get_running_loop()
+        
+        def run():
+            # Blocking OpenAI stream on a worker thread; fragments are handed back to the loop
+            for fragment in stream_factory():
+                loop.call_soon_threadsafe(flight.append, fragment)
+        
+        try:
+            await loop.run_in_executor(None, run)
+        except Exception as e:
+            # Nothing is saved, so the next viewer starts a new generation
+            print(f"Error streaming explanation for post {post_id}: {e}")
+            flight.finish(error="Explanation generation failed")
+        else:
+            flight.finish()
+            await self._save(post_id, flight.text)
+        finally:
+            # Viewers arriving from here on read the saved text (or start a new generation)
+            self._flights.pop(post_id, None)
+            self._tasks.pop(post_id, None)
+    
+    async def _save(self, post_id: int, text: str) -> None:
+        if not text:
+            return
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(update(models.Post).where(models.Post.id == post_id).values(llm_explanation=text))
+                await db.commit()
+        except Exception as e:
+            print(f"Error saving explanation for post {post_id}: {e}")
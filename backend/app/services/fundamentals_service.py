@@ -0,0 +1,165 @@
+"""
+Fundamentals and earnings calendar store.
+
+`stock.info` and `stock.calendar` are the slowest and most rate-limited yfinance
+calls (fetched through the configured provider), but the data changes at most daily. This service keeps it in the
+`ticker_fundamentals` table behind an in-process cache, refreshes it on its own
+schedule (see scripts/refresh_fundamentals.py), and never blocks the price path:
+lookups return what is cached and queue a background load on a miss.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Any
+from app.cache import TTLCache
+from app.config import settings
+from app.database import SessionLocal
+from app.services.circuit_breaker import get_breaker
+from app.services.market_data_providers import get_provider
+from app import models
+
+# Shared by every service instance so each router sees the same cache
+_cache = TTLCache(maxsize=4096, ttl=settings.FUNDAMENTALS_REFRESH_SECONDS * 2)
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fundamentals")
+_pending: set = set()
+_pending_lock = threading.Lock()
+
+
+class FundamentalsService:
+    """Slow-path store for ticker fundamentals and earnings dates"""
+
+    def __init__(self):
+        self.refresh_interval = timedelta(seconds=settings.FUNDAMENTALS_REFRESH_SECONDS)
+        self.provider = get_provider(settings.MARKET_DATA_PROVIDER)
+
+    def get(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """
+        Return cached fundamentals for a ticker without blocking.
+        Missing or stale entries are loaded in the background; a miss returns None.
+        """
+        key = ticker.upper()
+        record = _cache.get(key)
+        if record is None or self._is_stale(record["refreshed_at"]):
+            self._schedule_load(key)
+        return record
+
+    def get_many(self, tickers: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Non-blocking lookup for several tickers"""
+        return {ticker: self.get(ticker) for ticker in tickers}
+
+    def refresh(self, tickers: List[str]) -> int:
+        """
+        Fetch fundamentals from upstream and upsert them (blocking).
+        Used by the daily refresh job. Returns the number of tickers refreshed; a
+        ticker that fails is logged and skipped so the rest are still refreshed.
+        """
+        refreshed = 0
+        db = SessionLocal()
+        try:
+            for ticker in tickers:
+                try:
+                    row = self._refresh_row(db, ticker.upper())
+                except Exception as e:
+                    db.rollback()
+                    print(f"Error refreshing fundamentals for {ticker}: {e}")
+                    continue
+                if row is not None:
+                    _cache.set(row.ticker, self._row_to_record(row))
+                    refreshed += 1
+        finally:
+            db.close()
+        return refreshed
+
+    def known_tickers(self) -> List[str]:
+        """Tickers with stored fundamentals or mentioned in any post"""
+        db = SessionLocal()
+        try:
+            stored = {t for (t,) in db.query(models.TickerFundamentals.ticker).all()}
+            posted = {
+                t.upper() for (t,) in db.query(models.Post.ticker).filter(models.Post.ticker != None).distinct()
+            }
+            return sorted(stored | posted)
+        finally:
+            db.close()
+
+    def _is_stale(self, refreshed_at: Optional[datetime]) -> bool:
+        if refreshed_at is None:
+            return True
+        if refreshed_at.tzinfo is None:
+            refreshed_at = refreshed_at.replace(tzinfo=timezone.utc)
+        return datetime.now(timezone.utc) - refreshed_at > self.refresh_interval
+
+    def _schedule_load(self, ticker: str) -> None:
+        with _pending_lock:
+            if ticker in _pending:
+                return
+            _pending.add(ticker)
+        _executor.submit(self._load, ticker)
+
+    def _load(self, ticker: str) -> None:
+        """Load a ticker from the table, refreshing from upstream if stale"""
+        db = SessionLocal()
+        try:
+            row = db.query(models.TickerFundamentals).filter(
+                models.TickerFundamentals.ticker == ticker
+            ).first()
+            if row is None or self._is_stale(row.refreshed_at):
+                row = self._refresh_row(db, ticker) or row
+            if row is not None:
+                _cache.set(ticker, self._row_to_record(row))
+        except Exception as e:
+            print(f"Error loading fundamentals for {ticker}: {e}")
+        finally:
+            db.close()
+            with _pending_lock:
+                _pending.discard(ticker)
+
+    def _refresh_row(self, db, ticker: str) -> Optional[models.TickerFundamentals]:
+        """Fetch fundamentals and earnings date from the provider and upsert the table row"""
+        breaker = get_breaker(self.provider.name)
+        if not breaker.allow_request():
+            return None
+        try:
+            record = self.provider.fetch_fundamentals(ticker)
+        except Exception as e:
+            breaker.record_failure()
+            print(f"Warning: Could not fetch info for {ticker}: {e}")
+            return None
+        breaker.record_success()
+
+        row = db.query(models.TickerFundamentals).filter(
+            models.TickerFundamentals.ticker == ticker
+        ).first()
+        if row is None:
+            row = models.TickerFundamentals(ticker=ticker)
+            db.add(row)
+
+        row.market_cap = record.get("market_cap")
+        row.sector = record.get("sector")
+        row.industry = record.get("industry")
+        row.fundamentals = record.get("fundamentals") or {}
+        row.earnings_date = record.get("earnings_date")
+        row.refreshed_at = datetime.now(timezone.utc)
+        db.commit()
+        db.refresh(row)
+        return row
+
+    def _row_to_record(self, row: models.TickerFundamentals) -> Dict[str, Any]:
+        return {
+            "market_cap": row.market_cap,
+            "sector": row.sector,
+            "industry": row.industry,
+            "fundamentals": row.fundamentals or {},
+            "earnings_date": row.earnings_date,
+            "refreshed_at": row.refreshed_at,
+        }
+
+    @staticmethod
+    def is_recent_earnings(earnings_date: Optional[datetime], days: int = 7) -> bool:
+        """Check if an earnings date falls within the last `days` days (upcoming dates are not recent)"""
+        if earnings_date is None:
+            return False
+        if earnings_date.tzinfo is None:
+            earnings_date = earnings_date.replace(tzinfo=timezone.utc)
+        elapsed = datetime.now(timezone.utc) - earnings_date
+        return timedelta(0) <= elapsed <= timedelta(days=days)
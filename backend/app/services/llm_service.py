@@ -3,21 +3,62 @@ LLM service for content analysis, tagging, and ranking
 """
 import json
 import time
-from typing import List, Dict, Any, Optional
-from openai import OpenAI
+from typing import Iterator, List, Dict, Any, Optional, Union, TYPE_CHECKING
 from app.config import settings
-import httpx
+from app.metrics import registry
+
+if TYPE_CHECKING:
+    from app.services.market_snapshot import MarketSnapshot
+
+llm_analysis_tokens = registry.counter("llm_analysis_tokens_total", "Tokens used by LLM post analyses (prompt, completion)")
+
+# Ranking strategy weights: the most points each signal can add to a post's score
+STRATEGY_WEIGHTS = {
+    "balanced": {
+        "quality": 40, "engagement": 20, "reputation": 15,
+        "preference": 15, "market": 10, "recency": 5
+    },
+    "quality_focused": {
+        "quality": 60, "engagement": 10, "reputation": 15,
+        "preference": 10, "market": 5, "recency": 5
+    },
+    "trending": {
+        "quality": 25, "engagement": 15, "reputation": 10,
+        "preference": 10, "market": 30, "recency": 10
+    },
+    "diverse": {
+        "quality": 30, "engagement": 20, "reputation": 10,
+        "preference": 20, "market": 10, "recency": 10
+    },
+    "expert": {
+        "quality": 35, "engagement": 10, "reputation": 35,
+        "preference": 10, "market": 5, "recency": 5
+    }
+}
+
+# Score components named in a template explanation: at most this many, each scoring at least
+# this fraction of its strategy weight (the top component is named regardless)
+EXPLANATION_MAX_FACTORS = 3
+EXPLANATION_MIN_STRENGTH = 0.4
 
 
 class LLMService:
     """Service for LLM-powered content analysis and ranking"""
     
     def __init__(self):
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self._client = None
         self.model = settings.OPENAI_MODEL
         self.max_tokens = settings.LLM_MAX_TOKENS
         self.temperature = settings.LLM_TEMPERATURE
     
+    @property
+    def client(self):
+        """OpenAI client, created on first use (importing openai is slow)"""
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        return self._client
+    
     def analyze_post(
         self,
         title: str,
@@ -42,6 +83,9 @@ class LLMService:
                 response_format={"type": "json_object"}
             )
             
+            if response.usage:
+                llm_analysis_tokens.inc(response.usage.prompt_tokens, kind="prompt")
+                llm_analysis_tokens.inc(response.usage.completion_tokens, kind="completion")
             result = json.loads(response.choices[0].message.content)
             return {
                 "summary": result.get("summary", ""),
@@ -53,7 +97,8 @@ class LLMService:
                 "insight_type": result.get("insight_type"),
                 "key_points": result.get("key_points", []),
                 "forward_looking": result.get("forward_looking", False),
-                "fundamental_focus": result.get("fundamental_focus", False)
+                "fundamental_focus": result.get("fundamental_focus", False),
+                "analysis_tier": "llm"
             }
         except Exception as e:
             # Fallback to basic analysis
@@ -104,14 +149,15 @@ that incorporate fundamental data and forward projections."""
             "insight_type": "macro_commentary",
             "key_points": [],
             "forward_looking": False,
-            "fundamental_focus": False
+            "fundamental_focus": False,
+            "analysis_tier": "fallback"
         }
     
     def rank_posts(
         self,
         posts: List[Dict[str, Any]],
         user_preferences: Optional[Dict[str, Any]] = None,
-        market_context: Optional[Dict[str, Any]] = None,
+        market_context: Optional[Union[Dict[str, Any], "MarketSnapshot"]] = None,
         strategy: str = "balanced"
     ) -> List[Dict[str, Any]]:
         """
@@ -127,35 +173,14 @@ that incorporate fundamental data and forward projections."""
         """
         if not posts:
             return []
-        
-        # Calculate scores for each post with strategy
-        scored_posts = []
-        for post in posts:
-            score = self._calculate_post_score(
-                post, 
-                user_preferences, 
-                market_context,
-                strategy=strategy
-            )
-            scored_posts.append({**post, "ranking_score": score})
-        
-        # Sort by ranking score
-        ranked = sorted(scored_posts, key=lambda x: x["ranking_score"], reverse=True)
-        
-        # Apply diversity boost (ensure variety in top results)
-        if strategy != "diverse":
-            ranked = self._apply_diversity_boost(ranked)
-        else:
-            # For diverse strategy, apply stronger diversity boost
-            ranked = self._apply_diversity_boost(ranked, boost_multiplier=2.0)
-        
-        return ranked
+        signals = [self._ranking_signals(post, user_preferences, market_context) for post in posts]
+        return self._rank(posts, signals, strategy)
     
     def experiment_with_strategy(
         self,
         posts: List[Dict[str, Any]],
         user_preferences: Optional[Dict[str, Any]] = None,
-        market_context: Optional[Dict[str, Any]] = None
+        market_context: Optional[Union[Dict[str, Any], "MarketSnapshot"]] = None
     ) -> Dict[str, List[Dict[str, Any]]]:
         """
         Experiment with different ranking strategies and return results.
@@ -165,22 +190,56 @@ that incorporate fundamental data and forward projections."""
         strategies = ["balanced", "quality_focused", "trending", "diverse", "expert"]
         results = {}
         
+        # Signals don't depend on the strategy; compute them once and only re-weigh per strategy
+        signals = [self._ranking_signals(post, user_preferences, market_context) for post in posts]
         for strategy in strategies:
-            ranked = self.rank_posts(
-                posts.copy(),
-                user_preferences,
-                market_context,
-                strategy=strategy
-            )
+            ranked = self._rank(posts, signals, strategy)
             results[strategy] = ranked[:10]  # Top 10 for each strategy
         
         return results
     
+    def _rank(
+        self,
+        posts: List[Dict[str, Any]],
+        signals: List[Dict[str, float]],
+        strategy: str
+    ) -> List[Dict[str, Any]]:
+        """Score, sort, collapse duplicates and diversify; each post gets ranking_score and ranking_factors"""
+        # Calculate scores for each post with strategy
+        scored_posts = []
+        for post, post_signals in zip(posts, signals):
+            components = self._weigh_signals(post_signals, strategy)
+            score = sum(components.values())
+            components["diversity"] = 0.0  # Set by the diversity boost below
+            scored_posts.append({**post, "ranking_score": score, "ranking_factors": components})
+        
+        # Sort by ranking score
+        ranked = sorted(scored_posts, key=lambda x: x["ranking_score"], reverse=True)
+        
+        # Show each near-duplicate group once
+        ranked = self._collapse_duplicates(ranked)
+        
+        # Apply diversity boost (ensure variety in top results)
+        if strategy != "diverse":
+            ranked = self._apply_diversity_boost(ranked)
+        else:
+            # For diverse strategy, apply stronger diversity boost
+            ranked = self._apply_diversity_boost(ranked, boost_multiplier=2.0)
+        
+        return ranked
+    
+    def ranking_debug(self, ranked_post: Dict[str, Any]) -> Dict[str, Any]:
+        """A ranked post's score and factor vector, rounded for API debug output and offline analysis"""
+        return {
+            "ranking_score": round(ranked_post["ranking_score"], 3),
+            "ranking_factors": {factor: round(points, 3) for factor, points in ranked_post["ranking_factors"].items()}
+        }
+    
     def _calculate_post_score(
         self,
         post: Dict[str, Any],
         user_preferences: Optional[Dict[str, Any]],
-        market_context: Optional[Dict[str, Any]],
+        market_context: Optional[Union[Dict[str, Any], "MarketSnapshot"]],
         strategy: str = "balanced"
     ) -> float:
         """
@@ -190,36 +249,17 @@ that incorporate fundamental data and forward projections."""
         - Historical accuracy (via reputation)
         - Expert-tagged insights (via quality scores)
         """
-        # Strategy weights
-        weights = {
-            "balanced": {
-                "quality": 40, "engagement": 20, "reputation": 15,
-                "preference": 15, "market": 10, "recency": 5
-            },
-            "quality_focused": {
-                "quality": 60, "engagement": 10, "reputation": 15,
-                "preference": 10, "market": 5, "recency": 5
-            },
-            "trending": {
-                "quality": 25, "engagement": 15, "reputation": 10,
-                "preference": 10, "market": 30, "recency": 10
-            },
-            "diverse": {
-                "quality": 30, "engagement": 20, "reputation": 10,
-                "preference": 20, "market": 10, "recency": 10
-            },
-            "expert": {
-                "quality": 35, "engagement": 10, "reputation": 35,
-                "preference": 10, "market": 5, "recency": 5
-            }
-        }
-        
-        w = weights.get(strategy, weights["balanced"])
-        score = 0.0
-        
+        return sum(self.score_components(post, user_preferences, market_context, strategy).values())
+    
+    def _ranking_signals(
+        self,
+        post: Dict[str, Any],
+        user_preferences: Optional[Dict[str, Any]],
+        market_context: Optional[Union[Dict[str, Any], "MarketSnapshot"]]
+    ) -> Dict[str, Optional[float]]:
+        """Strategy-independent inputs of the ranking score (market is None without a market context)"""
         # Base quality score (0-100) -> normalized
         quality_score = post.get("quality_score", 0.0)
-        score += (quality_score / 100.0) * w["quality"]
         
         # Engagement signals (community sentiment)
         engagement = (
@@ -229,27 +269,33 @@ that incorporate fundamental data and forward projections."""
             post.get("bearish_count", 0) * 0.3 -
             post.get("dislike_count", 0) * 0.5
         )
-        score += min(engagement / 10.0, w["engagement"])
-        
-        # Author reputation (historical accuracy proxy)
-        author_reputation = post.get("author_reputation_score", 0.0)
-        score += min(author_reputation / 10.0, w["reputation"])
         
-        # User preference match
-        if user_preferences:
-            preference_score = self._calculate_preference_match(post, user_preferences)
-            score += preference_score * w["preference"]
+        # User preference match (saved preferences, plus similarity to posts the user liked)
+        preference_score = self._calculate_preference_match(post, user_preferences) if user_preferences else 0.0
         
-        # Market relevance (real-time responsiveness)
-        if market_context:
-            market_score = self._calculate_market_relevance(post, market_context)
-            score += market_score * w["market"]
-        
-        # Recency boost (timeliness)
-        recency_score = self._calculate_recency_score(post)
-        score += recency_score * (w["recency"] / 5.0) * 5
-        
-        return score
+        return {
+            "quality": quality_score / 100.0,
+            "engagement": engagement / 10.0,
+            # Author reputation (historical accuracy proxy)
+            "reputation": post.get("author_reputation_score", 0.0) / 10.0,
+            "preference": min(preference_score + post.get("semantic_similarity", 0.0), 1.0),
+            # Market relevance (real-time responsiveness)
+            "market": self._calculate_market_relevance(post, market_context) if market_context else None,
+            # Recency boost (timeliness)
+            "recency": self._calculate_recency_score(post),
+        }
+    
+    def _weigh_signals(self, signals: Dict[str, Optional[float]], strategy: str) -> Dict[str, float]:
+        """Apply a strategy's weights (engagement and reputation are capped at theirs)"""
+        w = STRATEGY_WEIGHTS.get(strategy, STRATEGY_WEIGHTS["balanced"])
+        return {
+            "quality": signals["quality"] * w["quality"],
+            "engagement": min(signals["engagement"], w["engagement"]),
+            "reputation": min(signals["reputation"], w["reputation"]),
+            "preference": signals["preference"] * w["preference"],
+            "market": signals["market"] * w["market"] if signals["market"] is not None else 0.0,
+            "recency": signals["recency"] * (w["recency"] / 5.0) * 5,
+        }
     
     def _calculate_preference_match(
         self,
@@ -276,7 +322,7 @@ that incorporate fundamental data and forward projections."""
     def _calculate_market_relevance(
         self,
         post: Dict[str, Any],
-        market_context: Dict[str, Any]
+        market_context: Union[Dict[str, Any], "MarketSnapshot"]
     ) -> float:
         """
         Calculate relevance based on current market conditions.
@@ -288,6 +334,10 @@ that incorporate fundamental data and forward projections."""
         if not ticker:
             return 0.0
         
+        # Snapshots carry relevance precomputed per ticker
+        if not isinstance(market_context, dict):
+            return market_context.market_relevance(ticker)
+        
         ticker_data = market_context.get("tickers", {}).get(ticker, {})
         
         # Volume spike boost
@@ -316,6 +366,16 @@ that incorporate fundamental data and forward projections."""
         
         return min(relevance, 1.0)
     
+    def _get_ticker_market_data(
+        self,
+        market_context: Union[Dict[str, Any], "MarketSnapshot"],
+        ticker: str
+    ) -> Dict[str, Any]:
+        """Per-ticker market data from either a context dict or a snapshot"""
+        if not isinstance(market_context, dict):
+            return market_context.ticker_data(ticker)
+        return market_context.get("tickers", {}).get(ticker, {})
+    
     def _calculate_recency_score(self, post: Dict[str, Any]) -> float:
         """Calculate recency boost (newer posts get higher score)"""
         from datetime import datetime, timezone
@@ -343,6 +403,19 @@ that incorporate fundamental data and forward projections."""
         else:
             return 0.1
     
+    def _collapse_duplicates(self, ranked_posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keep only the best-ranked post of each canonical post and its near-duplicates"""
+        seen_groups = set()
+        collapsed = []
+        for post in ranked_posts:
+            group = post.get("canonical_post_id") or post.get("id")
+            if group is not None:
+                if group in seen_groups:
+                    continue
+                seen_groups.add(group)
+            collapsed.append(post)
+        return collapsed
+    
     def _apply_diversity_boost(
         self, 
         ranked_posts: List[Dict[str, Any]], 
@@ -360,13 +433,19 @@ that incorporate fundamental data and forward projections."""
             ticker = post.get("ticker")
             sector = post.get("sector")
             
+            boost = 0.0
             if ticker and ticker not in seen_tickers:
                 post["ranking_score"] += 2.0 * boost_multiplier
+                boost += 2.0 * boost_multiplier
                 seen_tickers.add(ticker)
             
             if sector and sector not in seen_sectors:
                 post["ranking_score"] += 1.0 * boost_multiplier
+                boost += 1.0 * boost_multiplier
                 seen_sectors.add(sector)
+            
+            if "ranking_factors" in post:
+                post["ranking_factors"]["diversity"] = boost
         
         # Re-sort after diversity boost
         return sorted(ranked_posts, key=lambda x: x["ranking_score"], reverse=True)
@@ -376,12 +455,64 @@ that incorporate fundamental data and forward projections."""
         post: Dict[str, Any],
         user_id: Optional[int] = None,
         ranking_score: float = 0.0,
-        market_context: Optional[Dict[str, Any]] = None
+        market_context: Optional[Union[Dict[str, Any], "MarketSnapshot"]] = None
     ) -> str:
         """
         Generate natural language explanation for why a post is recommended.
-        Uses LLM to create transparent, contextual explanations.
+        Uses LLM to create transparent, contextual explanations. Raises if the LLM
+        fails or returns nothing, so a template is never mistaken for (and cached
+        as) model text; use fallback_explanation then.
+        """
+        response = self.client.chat.completions.create(
+            **self._explanation_request(post, ranking_score, market_context)
+        )
+        
+        explanation = (response.choices[0].message.content or "").strip()
+        if not explanation:
+            raise ValueError("LLM returned an empty explanation")
+        return explanation
+    
+    def stream_explanation(
+        self,
+        post: Dict[str, Any],
+        user_id: Optional[int] = None,
+        ranking_score: float = 0.0,
+        market_context: Optional[Union[Dict[str, Any], "MarketSnapshot"]] = None
+    ) -> Iterator[str]:
         """
+        Same explanation as generate_explanation, yielded as text fragments while
+        the completion streams in. Only model text is yielded: a failed request, an
+        error mid-stream or an empty completion is raised, so callers can tell a
+        real explanation from a missing one (see fallback_explanation).
+        """
+        stream = self.client.chat.completions.create(
+            **self._explanation_request(post, ranking_score, market_context), stream=True
+        )
+        streamed = False
+        for chunk in stream:
+            text = chunk.choices[0].delta.content if chunk.choices else None
+            if text:
+                streamed = True
+                yield text
+        if not streamed:
+            raise ValueError("LLM returned an empty explanation")
+    
+    def fallback_explanation(
+        self,
+        post: Dict[str, Any],
+        market_context: Optional[Union[Dict[str, Any], "MarketSnapshot"]] = None
+    ) -> str:
+        """Template explanation for when no LLM explanation is available"""
+        components = post.get("ranking_factors") or self.score_components(post, None, market_context)
+        return self.template_explanation(post, components, market_context=market_context)
+    
+    def _explanation_request(
+        self,
+        post: Dict[str, Any],
+        ranking_score: float,
+        market_context: Optional[Union[Dict[str, Any], "MarketSnapshot"]]
+    ) -> Dict[str, Any]:
+        """Chat completion arguments for a recommendation explanation"""
         # Build context for explanation
         quality_score = post.get("quality_score", 0.0)
         author_reputation = post.get("author_reputation_score", 0.0)
@@ -394,7 +525,7 @@ that incorporate fundamental data and forward projections."""
         # Market context if available
         market_info = ""
         if market_context and ticker:
-            ticker_data = market_context.get("tickers", {}).get(ticker, {})
+            ticker_data = self._get_ticker_market_data(market_context, ticker)
             if ticker_data:
                 price_change = ticker_data.get("price_change_24h", 0)
                 volume_spike = ticker_data.get("volume_spike", False)
@@ -408,6 +539,16 @@ that incorporate fundamental data and forward projections."""
                 if earnings_release:
                     market_info += " Recent earnings release"
         
+        # The ranker's own breakdown, so the explanation credits the factors that actually ranked the post
+        factors_info = ""
+        if post.get("ranking_factors"):
+            breakdown = ", ".join(
+                f"{factor} {points:.1f}"
+                for factor, points in sorted(post["ranking_factors"].items(), key=lambda item: item[1], reverse=True)
+                if points > 0
+            )
+            factors_info = f"\nScore Breakdown (points): {breakdown}"
+        
         prompt = f"""Explain why this stock analysis post is recommended to a user. 
 Be transparent, concise (2-3 sentences), and highlight the key factors that make this post valuable.
 
@@ -418,49 +559,123 @@ Author Reputation: {author_reputation}/100
 Engagement: {like_count} likes, {helpful_count} helpful marks
 Sector: {sector or 'N/A'}
 Insight Type: {insight_type or 'N/A'}
-Ranking Score: {ranking_score:.2f}{market_info}
+Ranking Score: {ranking_score:.2f}{factors_info}{market_info}
 
 Generate a natural, conversational explanation that helps the user understand why this post is recommended. 
 Focus on what makes it valuable: analytical quality, author credibility, community validation, market relevance, or timeliness.
 """
         
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that explains content recommendations in a clear, transparent way."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=200,
-                temperature=0.7
-            )
-            
-            explanation = response.choices[0].message.content.strip()
-            return explanation
-        except Exception as e:
-            # Fallback to rule-based explanation
-            print(f"Error generating LLM explanation: {e}")
-            factors = []
-            
-            if quality_score > 70:
-                factors.append("high-quality analysis")
-            
-            if author_reputation > 50:
-                factors.append("reputable author")
-            
-            if like_count > 10:
-                factors.append("strong community engagement")
-            
-            if helpful_count > 5:
-                factors.append("marked as helpful by users")
-            
-            if ticker:
-                factors.append(f"relevant to {ticker}")
-            
-            if not factors:
-                factors.append("relevant content")
-            
-            return f"This post is recommended because it features {', '.join(factors[:3])}."
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": "You are a helpful assistant that explains content recommendations in a clear, transparent way."},
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": 200,
+            "temperature": 0.7
+        }
+    
+    def score_components(
+        self,
+        post: Dict[str, Any],
+        user_preferences: Optional[Dict[str, Any]],
+        market_context: Optional[Union[Dict[str, Any], "MarketSnapshot"]],
+        strategy: str = "balanced"
+    ) -> Dict[str, float]:
+        """
+        Points each signal adds to a post's ranking score (they sum to the score).
+        Ranked posts already carry these as `ranking_factors`.
+        """
+        return self._weigh_signals(self._ranking_signals(post, user_preferences, market_context), strategy)
+    
+    def factor_attributions(
+        self,
+        post: Dict[str, Any],
+        components: Dict[str, float],
+        user_preferences: Optional[Dict[str, Any]] = None,
+        market_context: Optional[Union[Dict[str, Any], "MarketSnapshot"]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Score components as attributions, largest first: the points each signal
+        added, its share of the score, and the reason in words.
+        """
+        total = sum(components.values()) or 1.0
+        attributions = []
+        for factor, points in sorted(components.items(), key=lambda item: item[1], reverse=True):
+            attributions.append({
+                "factor": factor,
+                "points": round(points, 2),
+                "share": round(points / total, 3),
+                "reason": self._factor_reason(factor, post, user_preferences, market_context)
+            })
+        return attributions
+    
+    def template_explanation(
+        self,
+        post: Dict[str, Any],
+        components: Dict[str, float],
+        user_preferences: Optional[Dict[str, Any]] = None,
+        market_context: Optional[Union[Dict[str, Any], "MarketSnapshot"]] = None,
+        strategy: str = "balanced"
+    ) -> str:
+        """Explanation from the signals that scored the post (no LLM call; a few microseconds)"""
+        weights = STRATEGY_WEIGHTS.get(strategy, STRATEGY_WEIGHTS["balanced"])
+        reasons = []
+        for factor, points in sorted(components.items(), key=lambda item: item[1], reverse=True):
+            if points <= 0 or len(reasons) == EXPLANATION_MAX_FACTORS:
+                break
+            if reasons and points < weights.get(factor, 0) * EXPLANATION_MIN_STRENGTH:
+                continue
+            reason = self._factor_reason(factor, post, user_preferences, market_context)
+            if reason:
+                reasons.append(reason)
+        
+        if not reasons:
+            ticker = post.get("ticker")
+            return f"Recommended as community discussion of {ticker}." if ticker else "Recommended as community discussion."
+        if len(reasons) > 1:
+            reasons[-1] = f"and {reasons[-1]}"
+        return f"Recommended for {(', ' if len(reasons) > 2 else ' ').join(reasons)}."
+    
+    def _factor_reason(
+        self,
+        factor: str,
+        post: Dict[str, Any],
+        user_preferences: Optional[Dict[str, Any]],
+        market_context: Optional[Union[Dict[str, Any], "MarketSnapshot"]]
+    ) -> Optional[str]:
+        """Why one score component is high for this post, in words"""
+        ticker = post.get("ticker")
+        if factor == "quality":
+            return f"its analysis quality ({post.get('quality_score') or 0:.0f}/100)"
+        if factor == "engagement":
+            return f"community validation ({post.get('like_count') or 0} likes, {post.get('helpful_count') or 0} helpful)"
+        if factor == "reputation":
+            return f"an author with reputation {post.get('author_reputation_score') or 0:.0f}"
+        if factor == "preference":
+            preferences = user_preferences or {}
+            if ticker and ticker in preferences.get("followed_tickers", []):
+                return f"coverage of {ticker} (a ticker you follow)"
+            if post.get("sector") and post["sector"] in preferences.get("preferred_sectors", []):
+                return f"your interest in {post['sector']}"
+            if post.get("insight_type") and post["insight_type"] in preferences.get("preferred_insight_types", []):
+                return f"the {post['insight_type'].replace('_', ' ')} you prefer"
+            if post.get("semantic_similarity"):
+                return "similarity to posts you liked"
+            return None
+        if factor == "market":
+            ticker_data = self._get_ticker_market_data(market_context, ticker) if market_context and ticker else {}
+            events = []
+            if ticker_data.get("price_change_24h"):
+                events.append(f"{ticker_data['price_change_24h']:+.2f}% in 24h")
+            if ticker_data.get("volume_spike"):
+                events.append("volume spike")
+            if ticker_data.get("earnings_release"):
+                events.append("earnings release")
+            return f"market activity in {ticker} ({', '.join(events)})" if events else f"market activity in {ticker}"
+        if factor == "recency":
+            return "its freshness"
+        return None
     
     def detect_trends(
         self,
@@ -492,7 +707,7 @@ Focus on what makes it valuable: analytical quality, author credibility, communi
                 "ticker": ticker,
                 "post_count": count,
                 "sentiment": ticker_sentiment.get(ticker, 0) / count if count > 0 else 0,
-                "market_data": market_data.get("tickers", {}).get(ticker, {})
+                "market_data": self._get_ticker_market_data(market_data, ticker)
             })
         
         return trends
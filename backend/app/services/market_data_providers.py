@@ -0,0 +1,322 @@
+"""
+Pluggable market data providers.
+
+`MarketDataService` talks to upstream through this interface, selected by
+`settings.MARKET_DATA_PROVIDER`:
+- "yfinance": live Yahoo Finance data (default)
+- "replay": deterministic offline data recorded to local files (see
+  scripts/record_market_data.py), for benchmarks and load tests without network
+
+Providers return bars as `BAR_DTYPE` arrays and raise on upstream failure so the
+caller's circuit breaker can count it.
+"""
+import asyncio
+import csv
+import json
+import os
+import zlib
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Any
+import numpy as np
+from app.config import settings
+from app.services.bar_store import BAR_DTYPE
+
+
+class MarketDataProvider(ABC):
+    """Base interface for market data backends (subclasses must implement the abstract methods)"""
+
+    name = "base"
+
+    @abstractmethod
+    def fetch_bars(self, ticker: str, since_ts: Optional[int] = None) -> np.ndarray:
+        """
+        Fetch OHLCV bars for a ticker. With since_ts, return bars at or after it
+        (the bar at since_ts is included so a still-forming bar can be updated);
+        without it, return the provider's default backfill window.
+        """
+
+    def fetch_bars_bulk(self, since: Dict[str, Optional[int]]) -> Dict[str, np.ndarray]:
+        """Fetch bars for several tickers, keyed by ticker -> since_ts"""
+        return {ticker: self.fetch_bars(ticker, since_ts) for ticker, since_ts in since.items()}
+
+    @abstractmethod
+    def fetch_fundamentals(self, ticker: str) -> Dict[str, Any]:
+        """
+        Fetch slow-changing data for a ticker:
+        market_cap, sector, industry, fundamentals (dict), earnings_date (datetime or None)
+        """
+
+    async def afetch_bars(self, ticker: str, since_ts: Optional[int] = None) -> np.ndarray:
+        return await asyncio.to_thread(self.fetch_bars, ticker, since_ts)
+
+    async def afetch_bars_bulk(self, since: Dict[str, Optional[int]]) -> Dict[str, np.ndarray]:
+        return await asyncio.to_thread(self.fetch_bars_bulk, since)
+
+    async def afetch_fundamentals(self, ticker: str) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.fetch_fundamentals, ticker)
+
+
+def frame_to_bars(hist) -> np.ndarray:
+    """Convert a pandas OHLCV DataFrame (yfinance column names) to store records"""
+    if hist is None or hist.empty:
+        return np.empty(0, dtype=BAR_DTYPE)
+
+    hist = hist.dropna(subset=["Close"])
+    bars = np.empty(len(hist), dtype=BAR_DTYPE)
+    bars["ts"] = [int(ts.timestamp()) for ts in hist.index]
+    bars["open"] = hist["Open"].to_numpy(dtype="f8")
+    bars["high"] = hist["High"].to_numpy(dtype="f8")
+    bars["low"] = hist["Low"].to_numpy(dtype="f8")
+    bars["close"] = hist["Close"].to_numpy(dtype="f8")
+    bars["volume"] = np.nan_to_num(hist["Volume"].to_numpy(dtype="f8"))
+    return bars
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Live data from Yahoo Finance via yfinance: https://pypi.org/project/yfinance/"""
+
+    name = "yfinance"
+
+    def __init__(self, api_key: str = ""):
+        self.interval = settings.MARKET_DATA_BAR_INTERVAL
+        self.backfill_period = settings.MARKET_DATA_BACKFILL_PERIOD
+
+    def fetch_bars(self, ticker: str, since_ts: Optional[int] = None) -> np.ndarray:
+        import yfinance as yf
+
+        stock = yf.Ticker(ticker)
+        if since_ts is None:
+            hist = stock.history(period=self.backfill_period, interval=self.interval)
+        else:
+            hist = stock.history(start=self._start_date(since_ts), interval=self.interval)
+        return self._since(frame_to_bars(hist), since_ts)
+
+    def fetch_bars_bulk(self, since: Dict[str, Optional[int]]) -> Dict[str, np.ndarray]:
+        """One yf.download per group (backfill vs incremental) instead of one call per ticker"""
+        import yfinance as yf
+
+        result: Dict[str, np.ndarray] = {}
+        backfill = [t for t, ts in since.items() if ts is None]
+        incremental = [t for t, ts in since.items() if ts is not None]
+
+        if backfill:
+            frame = yf.download(
+                backfill, period=self.backfill_period, interval=self.interval,
+                group_by="ticker", progress=False, threads=True
+            )
+            result.update(self._split_download(frame, backfill, since))
+
+        if incremental:
+            start = self._start_date(min(since[t] for t in incremental))
+            frame = yf.download(
+                incremental, start=start, interval=self.interval,
+                group_by="ticker", progress=False, threads=True
+            )
+            result.update(self._split_download(frame, incremental, since))
+
+        return result
+
+    def fetch_fundamentals(self, ticker: str) -> Dict[str, Any]:
+        import yfinance as yf
+
+        stock = yf.Ticker(ticker)
+        info = stock.info or {}
+        return {
+            "market_cap": info.get("marketCap"),
+            "sector": info.get("sector"),
+            "industry": info.get("industry"),
+            "fundamentals": self._extract_fundamentals(info),
+            "earnings_date": self._get_earnings_date(stock),
+        }
+
+    def _split_download(self, frame, tickers: List[str], since: Dict[str, Optional[int]]) -> Dict[str, np.ndarray]:
+        import pandas as pd
+
+        result = {}
+        for ticker in tickers:
+            if isinstance(frame.columns, pd.MultiIndex):
+                if ticker not in frame.columns.get_level_values(0):
+                    continue
+                sub = frame[ticker]
+            else:
+                sub = frame
+            result[ticker] = self._since(frame_to_bars(sub), since.get(ticker))
+        return result
+
+    @staticmethod
+    def _start_date(since_ts: int) -> str:
+        return datetime.fromtimestamp(since_ts, tz=timezone.utc).strftime("%Y-%m-%d")
+
+    @staticmethod
+    def _since(bars: np.ndarray, since_ts: Optional[int]) -> np.ndarray:
+        if since_ts is None:
+            return bars
+        return bars[bars["ts"] >= since_ts]
+
+    def _extract_fundamentals(self, info: Dict) -> Dict[str, Any]:
+        """
+        Extract fundamental financial metrics.
+        Research shows fundamentals enhance stock rating accuracy.
+        """
+        return {
+            "revenue_growth": info.get("revenueGrowth"),
+            "earnings_growth": info.get("earningsGrowth"),
+            "profit_margin": info.get("profitMargins"),
+            "debt_to_equity": info.get("debtToEquity"),
+            "return_on_equity": info.get("returnOnEquity"),
+            "price_to_earnings": info.get("trailingPE"),
+            "price_to_book": info.get("priceToBook"),
+            "enterprise_value": info.get("enterpriseValue"),
+            "free_cash_flow": info.get("freeCashflow"),
+            "revenue": info.get("totalRevenue"),
+            "earnings_per_share": info.get("trailingEps"),
+        }
+
+    def _get_earnings_date(self, stock) -> Optional[datetime]:
+        """Latest earnings date from the ticker calendar, if any"""
+        try:
+            calendar = stock.calendar
+            if isinstance(calendar, dict):
+                earnings_dates = calendar.get("Earnings Date") or []
+            elif calendar is not None and not calendar.empty:
+                earnings_dates = list(calendar.index)
+            else:
+                earnings_dates = []
+
+            if len(earnings_dates) > 0:
+                latest_earnings = earnings_dates[-1]
+                if isinstance(latest_earnings, datetime):
+                    return latest_earnings.replace(tzinfo=timezone.utc)
+                if hasattr(latest_earnings, "year"):
+                    return datetime(latest_earnings.year, latest_earnings.month, latest_earnings.day, tzinfo=timezone.utc)
+            return None
+        except Exception:
+            return None
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Deterministic offline provider serving recorded data from local files:
+        <root>/bars/<TICKER>.csv           ts,open,high,low,close,volume
+        <root>/fundamentals/<TICKER>.json  fundamentals record
+    Tickers with no recording get synthetic bars seeded by the ticker symbol, so
+    the same ticker always yields the same series and any universe size works.
+    """
+
+    name = "replay"
+
+    SYNTHETIC_BARS = 30
+    BAR_SECONDS = 86400
+
+    def __init__(self, root: Optional[str] = None, synthesize: bool = True):
+        self.root = root or settings.MARKET_DATA_REPLAY_DIR
+        self.synthesize = synthesize
+        self._bars: Dict[str, np.ndarray] = {}
+
+    def fetch_bars(self, ticker: str, since_ts: Optional[int] = None) -> np.ndarray:
+        bars = self._load_bars(ticker.upper())
+        if since_ts is None:
+            return bars
+        return bars[bars["ts"] >= since_ts]
+
+    def fetch_fundamentals(self, ticker: str) -> Dict[str, Any]:
+        path = os.path.join(self.root, "fundamentals", f"{ticker.upper()}.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                record = json.load(f)
+            if record.get("earnings_date"):
+                record["earnings_date"] = datetime.fromisoformat(record["earnings_date"])
+            return record
+
+        if not self.synthesize:
+            return {"market_cap": None, "sector": None, "industry": None, "fundamentals": {}, "earnings_date": None}
+
+        rng = np.random.default_rng(self._seed(ticker))
+        return {
+            "market_cap": float(rng.uniform(1e9, 2e12)),
+            "sector": None,
+            "industry": None,
+            "fundamentals": {
+                "revenue_growth": float(rng.normal(0.08, 0.1)),
+                "earnings_growth": float(rng.normal(0.05, 0.2)),
+                "price_to_earnings": float(rng.uniform(8, 60)),
+            },
+            "earnings_date": None,
+        }
+
+    def record(self, ticker: str, bars: np.ndarray, fundamentals: Optional[Dict[str, Any]] = None) -> None:
+        """Write bars (and optionally fundamentals) for a ticker to the replay directory"""
+        ticker = ticker.upper()
+        os.makedirs(os.path.join(self.root, "bars"), exist_ok=True)
+        with open(os.path.join(self.root, "bars", f"{ticker}.csv"), "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(BAR_DTYPE.names)
+            for bar in bars:
+                writer.writerow(bar.tolist())
+
+        if fundamentals is not None:
+            os.makedirs(os.path.join(self.root, "fundamentals"), exist_ok=True)
+            record = dict(fundamentals)
+            if isinstance(record.get("earnings_date"), datetime):
+                record["earnings_date"] = record["earnings_date"].isoformat()
+            with open(os.path.join(self.root, "fundamentals", f"{ticker}.json"), "w") as f:
+                json.dump(record, f, indent=2)
+
+        self._bars.pop(ticker, None)
+
+    def _load_bars(self, ticker: str) -> np.ndarray:
+        cached = self._bars.get(ticker)
+        if cached is not None:
+            return cached
+
+        path = os.path.join(self.root, "bars", f"{ticker}.csv")
+        if os.path.exists(path):
+            raw = np.genfromtxt(path, delimiter=",", names=True, dtype=None, ndmin=1)
+            bars = np.empty(len(raw), dtype=BAR_DTYPE)
+            for field in BAR_DTYPE.names:
+                bars[field] = raw[field]
+        elif self.synthesize:
+            bars = self._synthetic_bars(ticker)
+        else:
+            bars = np.empty(0, dtype=BAR_DTYPE)
+
+        self._bars[ticker] = bars
+        return bars
+
+    def _synthetic_bars(self, ticker: str) -> np.ndarray:
+        """Seeded random walk ending at a fixed epoch, identical on every run"""
+        rng = np.random.default_rng(self._seed(ticker))
+        n = self.SYNTHETIC_BARS
+        end_ts = 1_700_000_000 - (1_700_000_000 % self.BAR_SECONDS)
+
+        close = rng.uniform(20, 500) * np.cumprod(1 + rng.normal(0, 0.02, n))
+        bars = np.empty(n, dtype=BAR_DTYPE)
+        bars["ts"] = end_ts - self.BAR_SECONDS * np.arange(n - 1, -1, -1)
+        bars["open"] = close * (1 + rng.normal(0, 0.005, n))
+        bars["high"] = np.maximum(bars["open"], close) * (1 + rng.uniform(0, 0.01, n))
+        bars["low"] = np.minimum(bars["open"], close) * (1 - rng.uniform(0, 0.01, n))
+        bars["close"] = close
+        bars["volume"] = rng.lognormal(16, 0.5, n)
+        return bars
+
+    @staticmethod
+    def _seed(ticker: str) -> int:
+        return zlib.crc32(ticker.upper().encode("utf-8"))
+
+
+PROVIDERS = {
+    YFinanceProvider.name: YFinanceProvider,
+    ReplayProvider.name: ReplayProvider,
+}
+
+
+def get_provider(name: Optional[str] = None) -> MarketDataProvider:
+    """Build the provider named by settings.MARKET_DATA_PROVIDER (or `name`)"""
+    name = (name or settings.MARKET_DATA_PROVIDER).lower()
+    provider_cls = PROVIDERS.get(name)
+    if provider_cls is None:
+        raise ValueError(f"Unknown market data provider '{name}'. Available: {', '.join(PROVIDERS)}")
+    if provider_cls is ReplayProvider:
+        return ReplayProvider()
+    return provider_cls(api_key=settings.MARKET_DATA_API_KEY)
@@ -3,110 +3,79 @@ Market data service for live price movements, volume spikes, and earnings releas
 Enhanced with fundamental data based on research showing fundamentals enhance ratings accuracy
 Reference: https://arxiv.org/html/2411.00856v1
 
-Uses yfinance library: https://pypi.org/project/yfinance/
+Upstream access goes through a pluggable provider (see market_data_providers.py),
+selected by settings.MARKET_DATA_PROVIDER.
 """
-import yfinance as yf
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional, Any
-import httpx
+from typing import Dict, List, Optional, Any, TYPE_CHECKING
+import hashlib
+import threading
 import time
+from app.cache import TTLCache, get_shared_cache
 from app.config import settings
+from app.services.circuit_breaker import get_breaker, CircuitState
+
+if TYPE_CHECKING:
+    from app.services.market_snapshot import MarketSnapshot
+
+# Decoded snapshots kept per process, so cache hits skip deserialization
+_snapshots = TTLCache(maxsize=64, ttl=settings.MARKET_SNAPSHOT_TTL_SECONDS)
+_snapshot_lock = threading.Lock()
 
 
 class MarketDataService:
     """Service for fetching and processing live market data"""
     
     def __init__(self):
-        self.provider = settings.MARKET_DATA_PROVIDER
-        self.api_key = settings.MARKET_DATA_API_KEY
+        # Imported here: the bar store and providers pull in numpy (and pandas/yfinance on use)
+        from app.services.bar_store import BarStore
+        from app.services.market_data_providers import get_provider
+        from app.services.fundamentals_service import FundamentalsService
+        self.provider = get_provider(settings.MARKET_DATA_PROVIDER)
+        self.bar_store = BarStore()
+        self.fundamentals = FundamentalsService()
+        self.breaker = get_breaker(self.provider.name)
+        self._last_sync: Dict[str, float] = {}
     
     def get_ticker_data(self, ticker: str, retry: int = 2) -> Dict[str, Any]:
         """
         Get current market data for a ticker with fundamental data.
         Research shows fundamentals enhance ratings accuracy.
         
+        Price and volume metrics come from the local bar store; only bars newer
+        than the last stored one are fetched from upstream.
+        
         Args:
             ticker: Stock ticker symbol
             retry: Number of retry attempts (default: 2)
         """
+        # Bars were synced recently: answer from the store without touching upstream
+        if not self._sync_due(ticker):
+            metrics = self.bar_store.window_metrics(ticker)
+            if metrics is not None:
+                return self._build_ticker_data(ticker, metrics)
+        
         for attempt in range(retry + 1):
+            # Fail fast while the provider is known to be down
+            if not self.breaker.allow_request():
+                return self._stale_ticker_data(ticker)
+            
             try:
-                stock = yf.Ticker(ticker)
-                
-                # Get recent price data first (more reliable)
-                # Try multiple periods to ensure we get data
-                hist = None
-                periods = ["1d", "2d", "5d", "1mo"]
-                
-                for period in periods:
-                    try:
-                        # Add small delay between requests to avoid rate limits
-                        if period != periods[0]:
-                            time.sleep(0.5)
-                        hist = stock.history(period=period)
-                        if not hist.empty and len(hist) >= 2:
-                            break
-                    except Exception as e:
-                        print(f"Failed to get {ticker} with period {period}: {e}")
-                        continue
+                self._sync_bars(ticker)
+                self.breaker.record_success()
                 
-                if hist is None or hist.empty:
-                    # Last resort: try getting just today's data with different intervals
-                    try:
-                        for interval in ["1m", "5m", "15m", "1h"]:
-                            try:
-                                hist = stock.history(period="1d", interval=interval)
-                                if not hist.empty:
-                                    break
-                            except:
-                                continue
-                        if hist is None or hist.empty:
-                            print(f"{ticker}: No price data found, symbol may be delisted or market closed")
-                            return self._empty_ticker_data(ticker)
-                    except Exception as e:
-                        print(f"{ticker}: Failed to fetch any data: {e}")
-                        return self._empty_ticker_data(ticker)
+                metrics = self.bar_store.window_metrics(ticker)
+                if metrics is None:
+                    print(f"{ticker}: No price data found, symbol may be delisted or market closed")
+                    return self._empty_ticker_data(ticker)
                 
-                # Get info (may fail due to rate limits, but we have price data)
-                try:
-                    info = stock.info
-                except Exception as info_error:
-                    print(f"Warning: Could not fetch info for {ticker}: {info_error}")
-                    info = {}
-                
-                current_price = hist['Close'].iloc[-1]
-                prev_close = hist['Close'].iloc[-2] if len(hist) > 1 else current_price
-                price_change_24h = ((current_price - prev_close) / prev_close) * 100
-                
-                current_volume = hist['Volume'].iloc[-1]
-                prev_volume = hist['Volume'].iloc[-2] if len(hist) > 1 else current_volume
-                volume_change_24h = ((current_volume - prev_volume) / prev_volume) * 100 if prev_volume > 0 else 0
-                
-                # Detect volume spike (>50% increase)
-                volume_spike = volume_change_24h > 50
-                
-                # Detect significant price movement (>5%)
-                significant_move = abs(price_change_24h) > 5
-                
-                # Extract fundamental data (research shows this enhances accuracy)
-                fundamentals = self._extract_fundamentals(info)
-                
-                return {
-                    "ticker": ticker,
-                    "current_price": float(current_price),
-                    "price_change_24h": float(price_change_24h),
-                    "volume_24h": float(current_volume),
-                    "volume_change_24h": float(volume_change_24h),
-                    "volume_spike": volume_spike,
-                    "significant_move": significant_move,
-                    "market_cap": info.get("marketCap"),
-                    "sector": info.get("sector"),
-                    "industry": info.get("industry"),
-                    "earnings_release": self._check_earnings_release(stock),
-                    "fundamentals": fundamentals,  # Added based on research
-                    "last_updated": datetime.now(timezone.utc).isoformat()
-                }
+                return self._build_ticker_data(ticker, metrics)
             except Exception as e:
+                self.breaker.record_failure()
+                if self.breaker.state == CircuitState.OPEN:
+                    print(f"{self.provider.name} circuit open, serving stale data for {ticker}")
+                    return self._stale_ticker_data(ticker)
+                
                 error_msg = str(e)
                 # Check if it's a rate limit error
                 if "429" in error_msg or "Too Many Requests" in error_msg:
@@ -115,91 +84,96 @@ class MarketDataService:
                         print(f"Rate limited for {ticker}, retrying in {wait_time}s...")
                         time.sleep(wait_time)
                         continue
-                    else:
-                        print(f"Rate limit exceeded for {ticker} after {retry + 1} attempts")
-                        # Return partial data if we have price data
-                        try:
-                            stock = yf.Ticker(ticker)
-                            hist = stock.history(period="5d")
-                            if not hist.empty:
-                                current_price = hist['Close'].iloc[-1]
-                                return {
-                                    "ticker": ticker,
-                                    "current_price": float(current_price),
-                                    "price_change_24h": 0.0,
-                                    "volume_24h": 0.0,
-                                    "volume_change_24h": 0.0,
-                                    "volume_spike": False,
-                                    "significant_move": False,
-                                    "market_cap": None,
-                                    "sector": None,
-                                    "industry": None,
-                                    "earnings_release": False,
-                                    "fundamentals": {},
-                                    "last_updated": datetime.now(timezone.utc).isoformat()
-                                }
-                        except:
-                            pass
+                    print(f"Rate limit exceeded for {ticker} after {retry + 1} attempts")
                 
                 print(f"Error fetching data for {ticker} (attempt {attempt + 1}/{retry + 1}): {e}")
                 if attempt < retry:
                     time.sleep(1)  # Brief delay before retry
                     continue
-            
-            current_price = hist['Close'].iloc[-1]
-            prev_close = hist['Close'].iloc[-2] if len(hist) > 1 else current_price
-            price_change_24h = ((current_price - prev_close) / prev_close) * 100
-            
-            current_volume = hist['Volume'].iloc[-1]
-            prev_volume = hist['Volume'].iloc[-2] if len(hist) > 1 else current_volume
-            volume_change_24h = ((current_volume - prev_volume) / prev_volume) * 100 if prev_volume > 0 else 0
-            
-            # Detect volume spike (>50% increase)
-            volume_spike = volume_change_24h > 50
-            
-            # Detect significant price movement (>5%)
-            significant_move = abs(price_change_24h) > 5
-            
-            # Extract fundamental data (research shows this enhances accuracy)
-            fundamentals = self._extract_fundamentals(info)
-            
-            return {
-                "ticker": ticker,
-                "current_price": float(current_price),
-                "price_change_24h": float(price_change_24h),
-                "volume_24h": float(current_volume),
-                "volume_change_24h": float(volume_change_24h),
-                "volume_spike": volume_spike,
-                "significant_move": significant_move,
-                "market_cap": info.get("marketCap"),
-                "sector": info.get("sector"),
-                "industry": info.get("industry"),
-                "earnings_release": self._check_earnings_release(stock),
-                "fundamentals": fundamentals,  # Added based on research
-                "last_updated": datetime.now(timezone.utc).isoformat()
-            }
         
         # If all retries failed
-        return self._empty_ticker_data(ticker)
+        return self._stale_ticker_data(ticker)
+    
+    def _sync_due(self, ticker: str) -> bool:
+        """Whether the ticker's bars are old enough to ask upstream for new ones"""
+        last_sync = self._last_sync.get(ticker.upper(), 0.0)
+        return time.time() - last_sync >= settings.MARKET_DATA_SYNC_INTERVAL_SECONDS
     
-    def _extract_fundamentals(self, info: Dict) -> Dict[str, Any]:
+    def _sync_bars(self, ticker: str) -> int:
         """
-        Extract fundamental financial metrics.
-        Research shows fundamentals enhance stock rating accuracy.
+        Fetch bars newer than the last stored timestamp and append them.
+        Tickers with no stored bars are backfilled once. Returns bars written.
         """
-        return {
-            "revenue_growth": info.get("revenueGrowth"),
-            "earnings_growth": info.get("earningsGrowth"),
-            "profit_margin": info.get("profitMargins"),
-            "debt_to_equity": info.get("debtToEquity"),
-            "return_on_equity": info.get("returnOnEquity"),
-            "price_to_earnings": info.get("trailingPE"),
-            "price_to_book": info.get("priceToBook"),
-            "enterprise_value": info.get("enterpriseValue"),
-            "free_cash_flow": info.get("freeCashflow"),
-            "revenue": info.get("totalRevenue"),
-            "earnings_per_share": info.get("trailingEps"),
+        # The provider re-sends the last stored bar too, so a still-forming bar gets updated
+        bars = self.provider.fetch_bars(ticker, self.bar_store.last_timestamp(ticker))
+        written = self.bar_store.append(ticker, bars)
+        self._last_sync[ticker.upper()] = time.time()
+        return written
+    
+    def _sync_bars_bulk(self, tickers: List[str]) -> None:
+        """Sync every due ticker with a single bulk provider call"""
+        due = [t for t in tickers if self._sync_due(t)]
+        if not due or not self.breaker.allow_request():
+            return
+        
+        try:
+            fetched = self.provider.fetch_bars_bulk(
+                {ticker: self.bar_store.last_timestamp(ticker) for ticker in due}
+            )
+        except Exception as e:
+            self.breaker.record_failure()
+            print(f"Bulk bar fetch failed for {len(due)} tickers: {e}")
+            return
+        self.breaker.record_success()
+        
+        now = time.time()
+        for ticker, bars in fetched.items():
+            self.bar_store.append(ticker, bars)
+            self._last_sync[ticker.upper()] = now
+    
+    def _stale_ticker_data(self, ticker: str) -> Dict[str, Any]:
+        """Serve the last stored bars when upstream is unavailable, else demo data"""
+        metrics = self.bar_store.window_metrics(ticker)
+        if metrics is None:
+            return self._empty_ticker_data(ticker)
+        data = self._build_ticker_data(ticker, metrics)
+        data["is_stale"] = True
+        return data
+    
+    def _build_ticker_data(self, ticker: str, metrics: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Assemble the ticker payload from stored bar metrics, joined with whatever
+        fundamentals are cached. Fundamentals never block the price path.
+        """
+        price_change_24h = metrics["price_change_24h"]
+        volume_change_24h = metrics["volume_change_24h"]
+        
+        data = {
+            "ticker": ticker,
+            "current_price": metrics["current_price"],
+            "price_change_24h": price_change_24h,
+            "volume_24h": metrics["volume_24h"],
+            "volume_change_24h": volume_change_24h,
+            # Detect volume spike (>50% increase)
+            "volume_spike": volume_change_24h > 50,
+            # Detect significant price movement (>5%)
+            "significant_move": abs(price_change_24h) > 5,
+            "last_updated": datetime.now(timezone.utc).isoformat()
         }
+        return self._join_fundamentals(data)
+    
+    def _join_fundamentals(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Merge cached fundamentals/earnings into a price payload (non-blocking)"""
+        record = self.fundamentals.get(data["ticker"]) or {}
+        data.update({
+            "market_cap": record.get("market_cap"),
+            "sector": record.get("sector"),
+            "industry": record.get("industry"),
+            "earnings_release": self.fundamentals.is_recent_earnings(record.get("earnings_date")),
+            # Fundamental data (research shows this enhances accuracy)
+            "fundamentals": record.get("fundamentals", {}),
+        })
+        return data
     
     def _empty_ticker_data(self, ticker: str) -> Dict[str, Any]:
         """Return demo data structure for failed requests (for better UX)"""
@@ -234,29 +208,39 @@ class MarketDataService:
             "is_demo_data": True  # Flag to indicate this is demo data
         }
     
-    def _check_earnings_release(self, stock: yf.Ticker) -> bool:
-        """Check if there's a recent earnings release"""
-        try:
-            calendar = stock.calendar
-            if calendar is not None and not calendar.empty:
-                # Check if earnings date is within last 7 days
-                earnings_dates = calendar.index
-                if len(earnings_dates) > 0:
-                    latest_earnings = earnings_dates[-1]
-                    if isinstance(latest_earnings, datetime):
-                        days_ago = (datetime.now(timezone.utc) - latest_earnings.replace(tzinfo=timezone.utc)).days
-                        return days_ago <= 7
-            return False
-        except:
-            return False
-    
     def get_multiple_tickers(self, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
-        """Get data for multiple tickers"""
+        """Get data for multiple tickers, syncing due tickers in one bulk fetch"""
+        self._sync_bars_bulk(tickers)
+        
         result = {}
         for ticker in tickers:
+            # Tickers the bulk call could not serve fall back to the per-ticker path
             result[ticker] = self.get_ticker_data(ticker)
         return result
     
+    async def aget_multiple_tickers(self, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Async variant of get_multiple_tickers using the provider's async bulk fetch"""
+        due = [t for t in tickers if self._sync_due(t)]
+        if due and self.breaker.allow_request():
+            try:
+                fetched = await self.provider.afetch_bars_bulk(
+                    {ticker: self.bar_store.last_timestamp(ticker) for ticker in due}
+                )
+                self.breaker.record_success()
+                now = time.time()
+                for ticker, bars in fetched.items():
+                    self.bar_store.append(ticker, bars)
+                    self._last_sync[ticker.upper()] = now
+            except Exception as e:
+                self.breaker.record_failure()
+                print(f"Async bulk bar fetch failed for {len(due)} tickers: {e}")
+        
+        result = {}
+        for ticker in tickers:
+            metrics = self.bar_store.window_metrics(ticker)
+            result[ticker] = self._build_ticker_data(ticker, metrics) if metrics else self._stale_ticker_data(ticker)
+        return result
+    
     def get_market_context(
         self,
         tickers: Optional[List[str]] = None,
@@ -265,6 +249,8 @@ class MarketDataService:
         """
         Get market context for ranking and trend detection.
         Optionally includes social sentiment (research shows sentiment improves short-term performance).
+        Prices come from the bar store and are joined with cached fundamentals;
+        the join never waits on `stock.info` or the earnings calendar.
         """
         if not tickers:
             tickers = []
@@ -274,8 +260,8 @@ class MarketDataService:
         # Add social sentiment if available
         if include_sentiment:
             try:
-                from app.services.stocktwits_service import StockTwitsService
-                stocktwits = StockTwitsService()
+                from app.services.shared import get_stocktwits_service
+                stocktwits = get_stocktwits_service()
                 sentiments = stocktwits.get_multiple_sentiments(tickers)
                 
                 # Merge sentiment into ticker data
@@ -292,6 +278,40 @@ class MarketDataService:
             "timestamp": datetime.now(timezone.utc).isoformat()
         }
     
+    def get_market_snapshot(self, tickers: Optional[List[str]] = None) -> "MarketSnapshot":
+        """
+        Compact market context for ranking, built at most once per
+        MARKET_SNAPSHOT_TTL_SECONDS for a given ticker set and shared across
+        workers through the shared cache.
+        """
+        from app.services.market_snapshot import MarketSnapshot, FORMAT_VERSION
+        
+        tickers = sorted(set(tickers or []))
+        digest = hashlib.sha1(",".join(tickers).encode("utf-8")).hexdigest()[:16]
+        key = f"market_snapshot:v{FORMAT_VERSION}:{digest}"
+        ttl = settings.MARKET_SNAPSHOT_TTL_SECONDS
+        
+        snapshot = _snapshots.get(key)
+        if snapshot is not None and time.time() - snapshot.built_at < ttl:
+            return snapshot
+        
+        with _snapshot_lock:
+            # Another thread may have rebuilt it while we waited
+            snapshot = _snapshots.get(key)
+            if snapshot is not None and time.time() - snapshot.built_at < ttl:
+                return snapshot
+            
+            cache = get_shared_cache()
+            blob = cache.get(key)
+            snapshot = MarketSnapshot.from_bytes(blob) if blob else None
+            if snapshot is None or time.time() - snapshot.built_at >= ttl:
+                context = self.get_market_context(tickers, include_sentiment=True)
+                snapshot = MarketSnapshot.from_context(context)
+                cache.set(key, snapshot.to_bytes(), ttl=ttl)
+            
+            _snapshots.set(key, snapshot)
+            return snapshot
+    
     def detect_market_trends(self, tickers: List[str]) -> List[Dict[str, Any]]:
         """Detect market trends from ticker data"""
         trends = []
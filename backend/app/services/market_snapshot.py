@@ -0,0 +1,149 @@
+"""
+Compact market-context snapshot for ranking.
+
+`get_market_context` returns nested dicts with ISO strings and full fundamentals
+per ticker, but ranking only needs a handful of fields. A snapshot stores just
+those fields as parallel NumPy arrays indexed by ticker (struct-of-arrays),
+precomputes each ticker's market relevance once, and serializes to a small
+pickle-free binary blob that workers share through the cache.
+"""
+import io
+import time
+from typing import Dict, List, Optional, Any
+import numpy as np
+
+# Bump when the serialized layout changes so workers ignore old blobs
+FORMAT_VERSION = 1
+
+
+class MarketSnapshot:
+    """Immutable struct-of-arrays market state keyed by ticker index"""
+
+    __slots__ = (
+        "version", "built_at", "tickers", "index",
+        "price_change_24h", "volume_spike", "earnings_release",
+        "social_sentiment", "revenue_growth", "earnings_growth",
+        "relevance",
+    )
+
+    def __init__(
+        self,
+        tickers: List[str],
+        price_change_24h: np.ndarray,
+        volume_spike: np.ndarray,
+        earnings_release: np.ndarray,
+        social_sentiment: np.ndarray,
+        revenue_growth: np.ndarray,
+        earnings_growth: np.ndarray,
+        built_at: Optional[float] = None,
+        version: int = FORMAT_VERSION
+    ):
+        self.version = version
+        self.built_at = built_at if built_at is not None else time.time()
+        self.tickers = list(tickers)
+        self.index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.price_change_24h = price_change_24h
+        self.volume_spike = volume_spike
+        self.earnings_release = earnings_release
+        self.social_sentiment = social_sentiment
+        self.revenue_growth = revenue_growth
+        self.earnings_growth = earnings_growth
+        self.relevance = self._compute_relevance()
+
+    @classmethod
+    def from_context(cls, market_context: Dict[str, Any]) -> "MarketSnapshot":
+        """Build a snapshot from a get_market_context() result"""
+        ticker_data = market_context.get("tickers", {})
+        tickers = list(ticker_data)
+
+        def column(getter, dtype):
+            return np.array([getter(ticker_data[t]) for t in tickers], dtype=dtype)
+
+        def fundamental(name):
+            def getter(data):
+                value = (data.get("fundamentals") or {}).get(name)
+                return np.nan if value is None else value
+            return getter
+
+        return cls(
+            tickers,
+            price_change_24h=column(lambda d: d.get("price_change_24h") or 0.0, np.float32),
+            volume_spike=column(lambda d: bool(d.get("volume_spike")), np.bool_),
+            earnings_release=column(lambda d: bool(d.get("earnings_release")), np.bool_),
+            social_sentiment=column(lambda d: d.get("social_sentiment") or 0.0, np.float32),
+            revenue_growth=column(fundamental("revenue_growth"), np.float32),
+            earnings_growth=column(fundamental("earnings_growth"), np.float32),
+        )
+
+    def _compute_relevance(self) -> np.ndarray:
+        """
+        Vectorized form of LLMService._calculate_market_relevance, computed once
+        per snapshot instead of once per post per request.
+        """
+        has_growth = (np.nan_to_num(self.revenue_growth) != 0) | (np.nan_to_num(self.earnings_growth) != 0)
+        relevance = (
+            0.3 * self.volume_spike
+            + 0.25 * (np.abs(self.price_change_24h) > 0.05)
+            + 0.2 * self.earnings_release
+            + 0.15 * (np.abs(self.social_sentiment) > 0.3)
+            + 0.1 * has_growth
+        )
+        return np.minimum(relevance, 1.0).astype(np.float32)
+
+    def market_relevance(self, ticker: Optional[str]) -> float:
+        """Precomputed market relevance for a ticker (0.0 if unknown)"""
+        i = self.index.get(ticker) if ticker else None
+        return float(self.relevance[i]) if i is not None else 0.0
+
+    def ticker_data(self, ticker: Optional[str]) -> Dict[str, Any]:
+        """Dict view of one ticker, shaped like a market context entry"""
+        i = self.index.get(ticker) if ticker else None
+        if i is None:
+            return {}
+        return {
+            "price_change_24h": float(self.price_change_24h[i]),
+            "volume_spike": bool(self.volume_spike[i]),
+            "earnings_release": bool(self.earnings_release[i]),
+            "social_sentiment": float(self.social_sentiment[i]),
+            "fundamentals": {
+                "revenue_growth": None if np.isnan(self.revenue_growth[i]) else float(self.revenue_growth[i]),
+                "earnings_growth": None if np.isnan(self.earnings_growth[i]) else float(self.earnings_growth[i]),
+            },
+        }
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def to_bytes(self) -> bytes:
+        """Serialize to a compact .npz blob (no pickle)"""
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            version=np.int32(self.version),
+            built_at=np.float64(self.built_at),
+            tickers=np.array(self.tickers, dtype=np.str_),
+            price_change_24h=self.price_change_24h,
+            volume_spike=self.volume_spike,
+            earnings_release=self.earnings_release,
+            social_sentiment=self.social_sentiment,
+            revenue_growth=self.revenue_growth,
+            earnings_growth=self.earnings_growth,
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> Optional["MarketSnapshot"]:
+        """Deserialize a blob; returns None for a different format version"""
+        with np.load(io.BytesIO(blob), allow_pickle=False) as data:
+            if int(data["version"]) != FORMAT_VERSION:
+                return None
+            return cls(
+                [str(t) for t in data["tickers"]],
+                price_change_24h=data["price_change_24h"],
+                volume_spike=data["volume_spike"],
+                earnings_release=data["earnings_release"],
+                social_sentiment=data["social_sentiment"],
+                revenue_growth=data["revenue_growth"],
+                earnings_growth=data["earnings_growth"],
+                built_at=float(data["built_at"]),
+            )
@@ -0,0 +1,217 @@
+"""
+Local pre-scoring of posts, used to triage which posts get the full LLM analysis.
+
+A handful of text features (length, numbers, fundamentals vocabulary, hype,
+shouting) feed a linear quality model, and keyword tables pick out tickers,
+sector and catalyst. Posts scoring at least PRESCORE_LLM_THRESHOLD go on to the
+LLM; the rest keep this local analysis. The default weights are hand-set; fit
+them to LLM labels with `scripts/evaluate_prescorer.py --fit`, which writes
+PRESCORE_MODEL_PATH. Pure Python, well under a millisecond per post.
+"""
+import json
+import math
+import os
+import re
+from typing import Any, Dict, List, Optional
+from app.config import settings
+from app.metrics import registry
+
+analysis_total = registry.counter("post_analysis_total", "Post analyses by tier (llm, local, duplicate, fallback)")
+analysis_seconds = registry.histogram(
+    "post_analysis_seconds",
+    "Post analysis latency by tier",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+FEATURES = (
+    "words", "numbers", "fundamentals", "forward", "risk", "catalyst",
+    "sector", "ticker", "hype", "exclaim", "caps", "unique"
+)
+
+DEFAULT_MODEL = {
+    "bias": -20.0,
+    "weights": {
+        "words": 10.0, "numbers": 15.0, "fundamentals": 25.0, "forward": 10.0, "risk": 8.0, "catalyst": 6.0,
+        "sector": 4.0, "ticker": 3.0, "hype": -30.0, "exclaim": -10.0, "caps": -20.0, "unique": 5.0
+    }
+}
+
+FUNDAMENTAL_TERMS = {
+    "revenue", "revenues", "sales", "eps", "earnings", "margin", "margins", "ebitda", "cash", "fcf", "debt",
+    "valuation", "multiple", "p/e", "pe", "dcf", "guidance", "growth", "profit", "profitability", "balance",
+    "dividend", "buyback", "yield", "backlog", "bookings", "subscribers", "arpu", "capex", "opex", "estimates",
+    "book", "deposits", "interest", "roe", "roic", "inventory", "demand", "pricing", "share", "costs",
+}
+FORWARD_TERMS = {
+    "expect", "expects", "expected", "forecast", "guidance", "outlook", "target", "project", "projected",
+    "estimate", "estimates", "next", "upcoming", "should", "will", "catalyst", "2025", "2026", "2027",
+}
+RISK_TERMS = {"risk", "risks", "downside", "bear", "headwind", "headwinds", "stop", "hedge", "dilution", "volatility"}
+HYPE_TERMS = {
+    "moon", "mooning", "rocket", "lambo", "yolo", "tendies", "guaranteed", "squeeze", "diamond", "hodl",
+    "apes", "100x", "1000x", "lfg", "🚀", "💎", "🌕",
+}
+HIGH_RISK_TERMS = {"options", "calls", "puts", "leverage", "leveraged", "penny", "squeeze", "yolo"}
+LOW_RISK_TERMS = {"dividend", "defensive", "blue", "stable", "utility", "utilities", "bonds"}
+
+# Keyword -> (sector name, tag slug)
+SECTOR_TERMS = {
+    "software": ("Technology", "tech"), "semiconductor": ("Technology", "tech"), "chips": ("Technology", "tech"),
+    "cloud": ("Technology", "tech"), "ai": ("Technology", "tech"), "saas": ("Technology", "tech"),
+    "pharma": ("Healthcare", "healthcare"), "biotech": ("Healthcare", "healthcare"), "fda": ("Healthcare", "healthcare"),
+    "drug": ("Healthcare", "healthcare"), "hospital": ("Healthcare", "healthcare"),
+    "bank": ("Finance", "finance"), "banks": ("Finance", "finance"), "lending": ("Finance", "finance"),
+    "insurance": ("Finance", "finance"), "fintech": ("Finance", "finance"),
+    "oil": ("Energy", "energy"), "gas": ("Energy", "energy"), "crude": ("Energy", "energy"),
+    "solar": ("Energy", "energy"), "opec": ("Energy", "energy"),
+    "retail": ("Consumer Cyclical", "consumer"), "ecommerce": ("Consumer Cyclical", "consumer"),
+    "restaurant": ("Consumer Cyclical", "consumer"), "ev": ("Consumer Cyclical", "consumer"),
+    "reit": ("Real Estate", "real_estate"), "housing": ("Real Estate", "real_estate"),
+    "airline": ("Industrials", "industrials"), "defense": ("Industrials", "industrials"),
+    "utility": ("Utilities", "utilities"), "telecom": ("Communication Services", "communication"),
+    "streaming": ("Communication Services", "communication"), "advertising": ("Communication Services", "communication"),
+}
+SECTOR_SLUGS = {name: slug for name, slug in SECTOR_TERMS.values()}
+
+# Keyword -> catalyst_type, checked in order (first hit wins)
+CATALYST_TERMS = (
+    ("earnings", {"earnings", "eps", "quarter", "quarterly", "q1", "q2", "q3", "q4", "beat", "miss"}),
+    ("merger", {"merger", "acquisition", "acquire", "acquires", "buyout", "takeover"}),
+    ("regulatory", {"fda", "approval", "antitrust", "lawsuit", "regulator", "regulators", "sec"}),
+    ("product", {"launch", "launches", "product", "unveil", "unveils", "release"}),
+    ("macro", {"fed", "rates", "inflation", "cpi", "recession", "tariff", "tariffs"}),
+    ("technical", {"breakout", "support", "resistance", "rsi", "macd", "chart", "crossover", "sma", "ema"}),
+)
+
+WORD_RE = re.compile(r"[\w$/%🚀💎🌕]+")
+NUMBER_RE = re.compile(r"^[$]?\d[\d,.]*[%xkmb]?$", re.IGNORECASE)
+CASHTAG_RE = re.compile(r"\$([A-Za-z]{1,5})\b")
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def record_analysis(tier: str, seconds: float) -> None:
+    analysis_total.inc(tier=tier)
+    analysis_seconds.observe(seconds, tier=tier)
+
+
+class PreScoreService:
+    """Fast local quality estimate and tag extraction for a post"""
+
+    def __init__(self):
+        self.threshold = settings.PRESCORE_LLM_THRESHOLD
+        self.model = self._load_model(settings.PRESCORE_MODEL_PATH)
+
+    def _load_model(self, path: str) -> Dict[str, Any]:
+        if not os.path.exists(path):
+            return DEFAULT_MODEL
+        try:
+            with open(path) as f:
+                model = json.load(f)
+            if set(model["weights"]) != set(FEATURES):
+                raise ValueError("feature set does not match")
+            return {"bias": float(model["bias"]), "weights": {k: float(v) for k, v in model["weights"].items()}}
+        except Exception as e:
+            print(f"Pre-scorer: ignoring model {path} ({e}); using default weights")
+            return DEFAULT_MODEL
+
+    def extract(self, title: str, content: str, ticker: Optional[str] = None) -> Dict[str, Any]:
+        """Words, tickers, sector and catalyst mentioned in a post"""
+        text = f"{title}\n{content}"
+        raw_words = WORD_RE.findall(text)
+        words = [w.lower() for w in raw_words]
+        vocabulary = set(words)
+
+        tickers = {t.upper() for t in CASHTAG_RE.findall(text)}
+        if ticker:
+            tickers.add(ticker.upper())
+
+        sector = next((SECTOR_TERMS[w] for w in words if w in SECTOR_TERMS), (None, None))
+        catalyst = next((name for name, terms in CATALYST_TERMS if vocabulary & terms), None)
+        return {
+            "raw_words": raw_words,
+            "words": words,
+            "vocabulary": vocabulary,
+            "tickers": sorted(tickers),
+            "sector": sector[0],
+            "catalyst_type": catalyst,
+        }
+
+    def features(self, extracted: Dict[str, Any], text: str) -> Dict[str, float]:
+        """Model inputs, each roughly in [0, 1] (words is log-scaled)"""
+        words, vocabulary, raw_words = extracted["words"], extracted["vocabulary"], extracted["raw_words"]
+        count = max(len(words), 1)
+        tickers = set(extracted["tickers"])
+        shouted = [w for w in raw_words if len(w) > 2 and w.isupper() and w.isalpha() and w not in tickers]
+        return {
+            "words": math.log1p(len(words)),
+            "numbers": min(sum(1 for w in words if NUMBER_RE.match(w)), 10) / 10,
+            "fundamentals": min(len(vocabulary & FUNDAMENTAL_TERMS), 6) / 6,
+            "forward": min(len(vocabulary & FORWARD_TERMS), 3) / 3,
+            "risk": min(len(vocabulary & RISK_TERMS), 3) / 3,
+            "catalyst": 1.0 if extracted["catalyst_type"] else 0.0,
+            "sector": 1.0 if extracted["sector"] else 0.0,
+            "ticker": 1.0 if tickers else 0.0,
+            "hype": min(sum(1 for w in words if w in HYPE_TERMS), 3) / 3,
+            "exclaim": min(text.count("!"), 5) / 5,
+            "caps": len(shouted) / count,
+            "unique": len(vocabulary) / count,
+        }
+
+    def score(self, features: Dict[str, float]) -> float:
+        """Estimated LLM quality score (0-100)"""
+        weights = self.model["weights"]
+        raw = self.model["bias"] + sum(weights[name] * features[name] for name in FEATURES)
+        return round(max(0.0, min(100.0, raw)), 1)
+
+    def analyze(
+        self,
+        title: str,
+        content: str,
+        ticker: Optional[str] = None,
+        known_sector: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Local analysis in the same shape as LLMService.analyze_post"""
+        extracted = self.extract(title, content, ticker)
+        if known_sector and not extracted["sector"]:
+            extracted["sector"] = known_sector
+        features = self.features(extracted, f"{title}\n{content}")
+        vocabulary = extracted["vocabulary"]
+
+        if features["hype"] or vocabulary & HIGH_RISK_TERMS:
+            risk_profile = "high"
+        elif vocabulary & LOW_RISK_TERMS:
+            risk_profile = "low"
+        else:
+            risk_profile = "moderate"
+
+        tags: List[str] = []
+        if extracted["sector"]:
+            tags.append(f"sector:{SECTOR_SLUGS.get(extracted['sector'], extracted['sector'].lower())}")
+        if extracted["catalyst_type"]:
+            tags.append(f"catalyst:{extracted['catalyst_type']}")
+        tags.append(f"risk:{risk_profile}")
+
+        return {
+            "summary": self._summary(title, content),
+            "quality_score": self.score(features),
+            "semantic_tags": tags,
+            "sector": extracted["sector"],
+            "catalyst_type": extracted["catalyst_type"],
+            "risk_profile": risk_profile,
+            "insight_type": "technical_analysis" if extracted["catalyst_type"] == "technical" else None,
+            "key_points": [],
+            "forward_looking": features["forward"] > 0,
+            "fundamental_focus": features["fundamentals"] >= 0.5,
+            "tickers": extracted["tickers"],
+            "analysis_tier": "local",
+        }
+
+    def needs_llm(self, local_analysis: Dict[str, Any]) -> bool:
+        """Whether a post is promising enough for the full LLM analysis"""
+        return local_analysis["quality_score"] >= self.threshold
+
+    def _summary(self, title: str, content: str) -> str:
+        """Title plus the first sentence or two, capped at 300 characters"""
+        lead = " ".join(SENTENCE_RE.split(content.strip())[:2])
+        summary = f"{title}: {lead}" if lead else title
+        return summary if len(summary) <= 300 else summary[:297].rstrip() + "..."
@@ -0,0 +1,190 @@
+"""
+Real-time push: named channels fanned out to connected SSE/WebSocket clients.
+
+Channels are plain strings: `user:{id}` (DMs, replies to you, reactions on your
+posts), `post:{id}` (new comments and count changes for a post a client has on
+screen) and `feed` ("new posts available" nudges for everyone).
+
+With Redis (settings.REDIS_URL) events go through Redis pub/sub so every worker
+delivers to its own connections. Without Redis they are delivered in-process,
+which is exact for a single worker.
+"""
+import asyncio
+import json
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Optional, Set
+from app.config import settings
+from app.metrics import registry
+
+FEED_CHANNEL = "feed"
+
+push_connections = registry.gauge("push_connections", "Open push connections")
+push_events_published = registry.counter("push_events_published_total", "Push events published, by event type")
+push_events_dropped = registry.counter("push_events_dropped_total", "Push events dropped because a client queue was full")
+
+
+def user_channel(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def post_channel(post_id: int) -> str:
+    return f"post:{post_id}"
+
+
+class PushService:
+    """Per-process pub/sub hub for push connections"""
+
+    RETRY_SECONDS = 30.0
+    RECONNECT_SECONDS = 1.0
+    SUBSCRIBE_TIMEOUT_SECONDS = 1.0
+
+    def __init__(self, url: Optional[str] = None, namespace: str = "ssi:push"):
+        self.url = url or settings.REDIS_URL
+        self.namespace = namespace
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+        self._listening = asyncio.Event()  # Set while the Redis pattern subscription is confirmed
+        self._next_attempt = 0.0
+
+    async def _client(self):
+        """Redis client, or None while Redis is unreachable (retried periodically)"""
+        if self._redis is not None:
+            return self._redis
+        now = time.monotonic()
+        if now < self._next_attempt:
+            return None
+        self._next_attempt = now + self.RETRY_SECONDS
+        try:
+            import redis.asyncio as redis
+            client = redis.Redis.from_url(self.url, socket_connect_timeout=0.25)
+            await client.ping()
+            self._redis = client
+        except Exception as e:
+            print(f"Push: Redis unavailable ({e}), delivering in-process")
+            self._redis = None
+        return self._redis
+
+    async def publish(self, channel: str, event: str, data: Dict[str, Any]) -> None:
+        """Publish an event; never raises (push is best-effort)"""
+        payload = json.dumps({"channel": channel, "event": event, "data": data}, default=str)
+        push_events_published.inc(event=event)
+
+        if self._subscribers:
+            # Restarts the listener if Redis was unreachable when these connections subscribed
+            await self._ensure_listener()
+        client = await self._client()
+        if client is not None:
+            try:
+                listening = self._listening.is_set()
+                await client.publish(f"{self.namespace}:{channel}", payload)
+                if not listening:
+                    # Not receiving from Redis (yet): deliver to this worker's connections directly
+                    self._deliver(channel, payload)
+                return
+            except Exception as e:
+                print(f"Push: Redis publish failed ({e}), delivering in-process")
+                self._redis = None
+        self._deliver(channel, payload)
+
+    async def subscribe(self, channels: Iterable[str]) -> asyncio.Queue:
+        """Register a connection for the given channels and return its event queue"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.PUSH_QUEUE_SIZE)
+        for channel in channels:
+            self._subscribers[channel].add(queue)
+        await self._ensure_listener()
+        return queue
+
+    def add_channels(self, queue: asyncio.Queue, channels: Iterable[str]) -> None:
+        for channel in channels:
+            self._subscribers[channel].add(queue)
+
+    def remove_channels(self, queue: asyncio.Queue, channels: Iterable[str]) -> None:
+        for channel in channels:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is None:
+                continue
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[channel]
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        """Drop a connection from every channel"""
+        self.remove_channels(queue, [c for c, subs in list(self._subscribers.items()) if queue in subs])
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        self._listening.clear()
+        if self._redis is not None:
+            try:
+                await self._redis.close()
+            except Exception:
+                pass
+            self._redis = None
+
+    def _deliver(self, channel: str, payload: str) -> None:
+        subscribers = self._subscribers.get(channel)
+        if not subscribers:
+            return
+        message = json.loads(payload)
+        for queue in list(subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Slow client: drop rather than buffer without bound
+                push_events_dropped.inc(event=message["event"])
+
+    async def _ensure_listener(self) -> None:
+        """Start the Redis listener if needed and wait until its subscription is confirmed"""
+        if self._listener is None or self._listener.done():
+            if await self._client() is None:
+                return
+            self._listener = asyncio.create_task(self._listen())
+        if self._listening.is_set():
+            return
+        # Events published before the subscription is confirmed would not reach this worker
+        confirmed = asyncio.ensure_future(self._listening.wait())
+        await asyncio.wait({confirmed, self._listener}, timeout=self.SUBSCRIBE_TIMEOUT_SECONDS,
+                           return_when=asyncio.FIRST_COMPLETED)
+        confirmed.cancel()
+
+    async def _listen(self) -> None:
+        """Forward Redis pub/sub messages to local connections, reconnecting until closed"""
+        prefix = f"{self.namespace}:"
+        while True:
+            client = await self._client()
+            if client is None:
+                await asyncio.sleep(max(self._next_attempt - time.monotonic(), 0.0) + 0.1)
+                continue
+            pubsub = client.pubsub()
+            try:
+                await pubsub.psubscribe(f"{prefix}*")
+                async for message in pubsub.listen():
+                    if message.get("type") == "psubscribe":
+                        self._listening.set()
+                        continue
+                    if message.get("type") != "pmessage":
+                        continue
+                    channel = message["channel"]
+                    if isinstance(channel, bytes):
+                        channel = channel.decode()
+                    data = message["data"]
+                    self._deliver(channel[len(prefix):], data.decode() if isinstance(data, bytes) else data)
+                raise ConnectionError("subscription ended")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Publishers deliver in-process until the subscription is back; a dropped
+                # connection is retried shortly, an unreachable Redis every RETRY_SECONDS
+                print(f"Push: Redis listener stopped ({e}), reconnecting")
+                self._redis = None
+                self._next_attempt = time.monotonic() + self.RECONNECT_SECONDS
+            finally:
+                self._listening.clear()
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
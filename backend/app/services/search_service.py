@@ -0,0 +1,181 @@
+"""
+Full-text search over posts (title, summary, semantic tags, content).
+
+PostgreSQL: a weighted `tsvector` expression with a GIN index (migration 0006),
+ranked with ts_rank_cd. SQLite: the FTS5 table `posts_fts`, kept in sync with
+`posts` by triggers and ranked with bm25. Tag filters use the `post_tags` table
+on both. Relevance ranks the newest SEARCH_MAX_CANDIDATES matches, so a common
+term costs the same as a rare one; pages are keyset cursors over (score, post
+id), so deep pages cost the same as the first one.
+"""
+import base64
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select, delete, func, literal, literal_column, table, column, or_, and_, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from app.config import settings
+from app import models
+
+# Must match the GIN index expression in migration 0006 for the planner to use it
+PG_DOCUMENT_SQL = (
+    "setweight(to_tsvector('english', coalesce(posts.title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(posts.summary, '') || ' ' || coalesce(posts.semantic_tags::text, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(posts.content, '')), 'C')"
+)
+
+# bm25 column weights for posts_fts(title, summary, semantic_tags, content)
+FTS5_WEIGHTS = (10.0, 4.0, 4.0, 1.0)
+
+SORTS = ("relevance", "recent")
+
+
+def normalize_tags(tags: Optional[Iterable[str]]) -> List[str]:
+    return sorted({tag.strip().lower() for tag in (tags or []) if tag and tag.strip()})
+
+
+class SearchService:
+    """Ranked, cursor-paginated post search"""
+
+    def __init__(self):
+        self._has_fts5: Optional[bool] = None
+
+    def query_terms(self, query: str) -> List[str]:
+        return re.findall(r"\w+", (query or "").lower())[:settings.SEARCH_MAX_TERMS]
+
+    async def search_posts(
+        self,
+        db: AsyncSession,
+        query: str,
+        tags: Optional[List[str]] = None,
+        ticker: Optional[str] = None,
+        sort: str = "relevance",
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Dict:
+        """Posts matching every query term (and every tag), best or newest first"""
+        terms = self.query_terms(query)
+        if not terms:
+            return {"posts": [], "next_cursor": None}
+
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            matches, post_id, score = self._postgres_matches(query)
+        elif await self._sqlite_has_fts5(db):
+            matches, post_id, score = self._fts5_matches(terms)
+        else:
+            matches, post_id, score = self._like_matches(terms)
+
+        if ticker:
+            matches = matches.where(models.Post.ticker == ticker.upper())
+        for tag in normalize_tags(tags):
+            matches = matches.where(
+                select(models.PostTag.post_id)
+                .where(models.PostTag.post_id == post_id, models.PostTag.tag == tag)
+                .exists()
+            )
+
+        after = self._decode_cursor(cursor)
+        if sort == "recent":
+            # Straight off the index in id order: only the page itself is scored
+            if after:
+                matches = matches.where(post_id < after[1])
+            page = matches.add_columns(
+                post_id.label("post_id"), score.label("score"), literal(0).label("ceiling")
+            ).order_by(post_id.desc())
+        else:
+            # Rank only the newest SEARCH_MAX_CANDIDATES matches. The cursor pins that
+            # window (its newest match id) so later pages rank the same candidates.
+            if after:
+                matches = matches.where(post_id <= after[2])
+            candidates = matches.add_columns(
+                post_id.label("post_id"), score.label("score")
+            ).order_by(post_id.desc()).limit(settings.SEARCH_MAX_CANDIDATES).subquery()
+            page = select(
+                candidates.c.post_id,
+                candidates.c.score,
+                func.max(candidates.c.post_id).over().label("ceiling")
+            )
+            if after:
+                page = page.where(or_(
+                    candidates.c.score < after[0],
+                    and_(candidates.c.score == after[0], candidates.c.post_id < after[1])
+                ))
+            page = page.order_by(candidates.c.score.desc(), candidates.c.post_id.desc())
+
+        rows = (await db.execute(page.limit(limit + 1))).all()
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+        if not rows:
+            return {"posts": [], "next_cursor": None}
+
+        posts = {
+            post.id: post
+            for post in (await db.execute(
+                select(models.Post).options(joinedload(models.Post.author))
+                .where(models.Post.id.in_([row.post_id for row in rows]))
+            )).scalars().all()
+        }
+        last = rows[-1]
+        ceiling = after[2] if after else last.ceiling
+        return {
+            "posts": [posts[row.post_id] for row in rows if row.post_id in posts],
+            "next_cursor": self._encode_cursor(float(last.score), last.post_id, ceiling) if has_next else None
+        }
+
+    async def replace_post_tags(self, db: AsyncSession, post_id: int, tags: Optional[Iterable[str]]) -> None:
+        """Sync post_tags with a post's semantic_tags (call in the same transaction)"""
+        await db.execute(delete(models.PostTag).where(models.PostTag.post_id == post_id))
+        for tag in normalize_tags(tags):
+            db.add(models.PostTag(post_id=post_id, tag=tag))
+
+    def _postgres_matches(self, query: str):
+        """(filterable select, post id column, score expression) over the GIN-indexed document"""
+        document = literal_column(PG_DOCUMENT_SQL)
+        ts_query = func.plainto_tsquery(literal_column("'english'::regconfig"), query)
+        matches = select().select_from(models.Post).where(document.op("@@")(ts_query))
+        return matches, models.Post.id, func.ts_rank_cd(document, ts_query)
+
+    def _fts5_matches(self, terms: List[str]):
+        """Same over posts_fts; ordering by its rowid lets FTS5 walk the index newest first"""
+        fts = table("posts_fts", column("rowid"))
+        match = " ".join(f'"{term}"' for term in terms)  # Quoted: user input is never FTS syntax
+        matches = select().select_from(
+            fts.join(models.Post, models.Post.id == fts.c.rowid)
+        ).where(literal_column("posts_fts").op("MATCH")(match))
+        return matches, fts.c.rowid, -func.bm25(literal_column("posts_fts"), *FTS5_WEIGHTS)
+
+    def _like_matches(self, terms: List[str]):
+        """Unindexed fallback for SQLite databases created without migrations"""
+        conditions = [
+            or_(
+                models.Post.title.ilike(f"%{term}%"),
+                models.Post.summary.ilike(f"%{term}%"),
+                models.Post.content.ilike(f"%{term}%")
+            )
+            for term in terms
+        ]
+        matches = select().select_from(models.Post).where(*conditions)
+        return matches, models.Post.id, literal(0.0)
+
+    async def _sqlite_has_fts5(self, db: AsyncSession) -> bool:
+        if self._has_fts5 is None:
+            found = (await db.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'posts_fts'")
+            )).first()
+            self._has_fts5 = found is not None
+            if not self._has_fts5:
+                print("Search: posts_fts missing (run scripts/migrate.py); using unindexed LIKE search")
+        return self._has_fts5
+
+    def _encode_cursor(self, score: float, post_id: int, ceiling: int) -> str:
+        return base64.urlsafe_b64encode(f"{score!r}:{post_id}:{ceiling}".encode()).decode()
+
+    def _decode_cursor(self, cursor: Optional[str]) -> Optional[Tuple[float, int, int]]:
+        if not cursor:
+            return None
+        try:
+            score, post_id, ceiling = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+            return float(score), int(post_id), int(ceiling)
+        except (ValueError, UnicodeDecodeError):
+            raise ValueError("Invalid cursor")
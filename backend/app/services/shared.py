@@ -0,0 +1,106 @@
+"""
+Process-wide service singletons, built lazily on first use.
+
+Routers depend on these getters (`Depends(get_market_service)`) instead of
+constructing services at import time, so importing the app stays cheap and
+each worker builds at most one instance of each service.
+"""
+import threading
+from typing import Any, Callable, Dict
+
+_instances: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def _get_or_create(name: str, factory: Callable[[], Any]) -> Any:
+    instance = _instances.get(name)
+    if instance is None:
+        with _lock:
+            instance = _instances.get(name)
+            if instance is None:
+                instance = factory()
+                _instances[name] = instance
+    return instance
+
+
+def get_llm_service():
+    """Shared LLMService"""
+    from app.services.llm_service import LLMService
+    return _get_or_create("llm", LLMService)
+
+
+def get_market_service():
+    """Shared MarketDataService"""
+    from app.services.market_data_service import MarketDataService
+    return _get_or_create("market", MarketDataService)
+
+
+def get_reputation_service():
+    """Shared ReputationService"""
+    from app.services.reputation_service import ReputationService
+    return _get_or_create("reputation", ReputationService)
+
+
+def get_stocktwits_service():
+    """Shared StockTwitsService"""
+    from app.services.stocktwits_service import StockTwitsService
+    return _get_or_create("stocktwits", StockTwitsService)
+
+
+def get_conversation_service():
+    """Shared ConversationService"""
+    from app.services.conversation_service import ConversationService
+    return _get_or_create("conversation", ConversationService)
+
+
+def get_push_service():
+    """Shared PushService"""
+    from app.services.push_service import PushService
+    return _get_or_create("push", PushService)
+
+
+def get_timeline_service():
+    """Shared TimelineService"""
+    from app.services.timeline_service import TimelineService
+    return _get_or_create("timeline", TimelineService)
+
+
+def get_search_service():
+    """Shared SearchService"""
+    from app.services.search_service import SearchService
+    return _get_or_create("search", SearchService)
+
+
+def get_embedding_service():
+    """Shared EmbeddingService (loads the post vector index on first use)"""
+    from app.services.embedding_service import EmbeddingService
+    return _get_or_create("embedding", EmbeddingService)
+
+
+def get_dedup_service():
+    """Shared DedupService"""
+    from app.services.dedup_service import DedupService
+    return _get_or_create("dedup", DedupService)
+
+
+def get_prescore_service():
+    """Shared PreScoreService"""
+    from app.services.prescore_service import PreScoreService
+    return _get_or_create("prescore", PreScoreService)
+
+
+def get_explanation_service():
+    """Shared ExplanationService"""
+    from app.services.explanation_service import ExplanationService
+    return _get_or_create("explanation", ExplanationService)
+
+
+def built_services() -> Dict[str, Any]:
+    """Services instantiated so far in this process"""
+    return dict(_instances)
+
+
+def reset_services() -> None:
+    """Drop all instances (used on app shutdown)"""
+    with _lock:
+        _instances.clear()
@@ -3,10 +3,14 @@ StockTwits sentiment service for social sentiment data
 Based on research showing sentiment can enhance short-term predictions
 Reference: https://arxiv.org/html/2411.00856v1
 """
-import httpx
 from typing import Dict, Optional, Any
 from datetime import datetime, timezone
+from app.cache import TTLCache
 from app.config import settings
+from app.services.circuit_breaker import get_breaker
+
+# Last good sentiment per ticker, served while the StockTwits circuit is open
+_last_good = TTLCache(maxsize=2048, ttl=6 * 3600)
 
 
 class StockTwitsService:
@@ -21,21 +25,38 @@ class StockTwitsService:
         self.base_url = "https://stocktwits.com/api/2"
         self.rapidapi_url = "https://stocktwits.p.rapidapi.com"
         self.use_rapidapi = self.api_key is not None
+        self.breaker = get_breaker("stocktwits")
     
     def get_sentiment(self, ticker: str) -> Dict[str, Any]:
         """
         Get sentiment data for a ticker from StockTwits.
         Returns aggregated sentiment score and message count.
+        While the upstream circuit is open, returns the last good result (or empty) immediately.
         """
+        if not self.breaker.allow_request():
+            return _last_good.get(ticker.upper()) or self._empty_sentiment(ticker)
+        
         if not self.use_rapidapi:
             # Fallback to public API (limited)
-            return self._get_sentiment_public(ticker)
+            result = self._get_sentiment_public(ticker)
+        else:
+            result = self._get_sentiment_rapidapi(ticker)
         
-        return self._get_sentiment_rapidapi(ticker)
+        if result.get("total_messages", 0) > 0:
+            _last_good.set(ticker.upper(), result)
+        return result
+    
+    def _record_status(self, status_code: int) -> None:
+        """Count rate limiting and server errors against the upstream breaker"""
+        if status_code == 429 or status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
     
     def _get_sentiment_rapidapi(self, ticker: str) -> Dict[str, Any]:
         """Get sentiment using RapidAPI StockTwits API"""
         try:
+            import httpx
             with httpx.Client() as client:
                 # Use the stream endpoint to get messages for the ticker
                 response = client.get(
@@ -46,6 +67,7 @@ class StockTwitsService:
                     },
                     timeout=10.0
                 )
+                self._record_status(response.status_code)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -55,6 +77,7 @@ class StockTwitsService:
                     print(f"StockTwits API returned status {response.status_code}: {response.text[:200]}")
                     return self._empty_sentiment(ticker)
         except Exception as e:
+            self.breaker.record_failure()
             print(f"Error fetching StockTwits sentiment for {ticker}: {e}")
             import traceback
             traceback.print_exc()
@@ -64,17 +87,20 @@ class StockTwitsService:
     def _get_sentiment_public(self, ticker: str) -> Dict[str, Any]:
         """Get sentiment using public StockTwits API (limited functionality)"""
         try:
+            import httpx
             with httpx.Client() as client:
                 # Get stream for ticker
                 response = client.get(
                     f"{self.base_url}/streams/symbol/{ticker}.json",
                     timeout=10.0
                 )
+                self._record_status(response.status_code)
                 
                 if response.status_code == 200:
                     data = response.json()
                     return self._parse_stream_response(data, ticker)
         except Exception as e:
+            self.breaker.record_failure()
             print(f"Error fetching StockTwits stream for {ticker}: {e}")
         
         return self._empty_sentiment(ticker)
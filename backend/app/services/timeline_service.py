@@ -0,0 +1,149 @@
+"""
+Home timelines for the "following" feed.
+
+New posts are fanned out on write: one INSERT ... SELECT copies the post id into
+each follower's `timeline_entries`, which are trimmed to TIMELINE_MAX_ENTRIES.
+Authors with more than TIMELINE_FANOUT_MAX_FOLLOWERS followers are skipped at
+write time (no write storms) and merged in on read from their recent posts.
+A timeline page therefore costs O(page size) index reads either way.
+"""
+from typing import Dict, Optional
+from sqlalchemy import select, delete, literal, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, joinedload
+from app.config import settings
+from app import models
+
+
+class TimelineService:
+    """Fan-out-on-write timelines with a fan-out-on-read path for high-follower authors"""
+
+    def __init__(self):
+        self.max_entries = settings.TIMELINE_MAX_ENTRIES
+        self.fanout_max_followers = settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+        self.follow_backfill_posts = settings.TIMELINE_FOLLOW_BACKFILL_POSTS
+
+    def is_fanned_out_on_read(self, follower_count: Optional[int]) -> bool:
+        return (follower_count or 0) > self.fanout_max_followers
+
+    async def fan_out_post(self, db: AsyncSession, post_id: int) -> int:
+        """Push a new post into its author's followers' timelines; returns rows written"""
+        post = await db.get(models.Post, post_id)
+        if not post:
+            return 0
+        author = await db.get(models.User, post.author_id)
+        if author is None or self.is_fanned_out_on_read(author.follower_count):
+            return 0
+
+        followers = select(models.Follow.follower_id).where(models.Follow.following_id == post.author_id)
+        result = await db.execute(self._insert_ignore(
+            db,
+            select(models.Follow.follower_id, literal(post.id), literal(post.author_id))
+            .where(models.Follow.following_id == post.author_id)
+        ))
+        await self._trim(db, followers)
+        return result.rowcount or 0
+
+    async def add_author(self, db: AsyncSession, follower_id: int, author_id: int) -> None:
+        """Backfill a timeline with an author's recent posts after a follow"""
+        author = await db.get(models.User, author_id)
+        if author is None or self.is_fanned_out_on_read(author.follower_count):
+            return
+        recent = (
+            select(models.Post.id)
+            .where(models.Post.author_id == author_id)
+            .order_by(models.Post.id.desc())
+            .limit(self.follow_backfill_posts)
+            .subquery()
+        )
+        await db.execute(self._insert_ignore(
+            db,
+            # (SQLite needs a WHERE in INSERT ... SELECT ... ON CONFLICT)
+            select(literal(follower_id), recent.c.id, literal(author_id)).where(true())
+        ))
+        await self._trim(db, select(literal(follower_id)))
+
+    async def remove_author(self, db: AsyncSession, follower_id: int, author_id: int) -> None:
+        """Drop an author's posts from a timeline after an unfollow"""
+        await db.execute(
+            delete(models.TimelineEntry).where(
+                models.TimelineEntry.user_id == follower_id,
+                models.TimelineEntry.author_id == author_id
+            ).execution_options(synchronize_session=False)
+        )
+
+    async def get_timeline(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        limit: int,
+        before: Optional[int] = None
+    ) -> Dict:
+        """Newest-first page of followed authors' posts, keyed by post id cursor"""
+        entries = select(models.TimelineEntry.post_id).where(models.TimelineEntry.user_id == user_id)
+        if before is not None:
+            entries = entries.where(models.TimelineEntry.post_id < before)
+        post_ids = list((await db.execute(
+            entries.order_by(models.TimelineEntry.post_id.desc()).limit(limit)
+        )).scalars().all())
+
+        # Fan-out-on-read: followed authors whose posts are not pushed to timelines
+        heavy_authors = (await db.execute(
+            select(models.Follow.following_id)
+            .join(models.User, models.User.id == models.Follow.following_id)
+            .where(
+                models.Follow.follower_id == user_id,
+                models.User.follower_count > self.fanout_max_followers
+            )
+        )).scalars().all()
+        if heavy_authors:
+            recent = select(models.Post.id).where(models.Post.author_id.in_(heavy_authors))
+            if before is not None:
+                recent = recent.where(models.Post.id < before)
+            post_ids.extend((await db.execute(recent.order_by(models.Post.id.desc()).limit(limit))).scalars().all())
+            post_ids = sorted(set(post_ids), reverse=True)[:limit]
+
+        if not post_ids:
+            return {"posts": [], "next_cursor": None}
+
+        posts = {
+            post.id: post
+            for post in (await db.execute(
+                select(models.Post).options(joinedload(models.Post.author)).where(models.Post.id.in_(post_ids))
+            )).scalars().all()
+        }
+        page = [posts[post_id] for post_id in post_ids if post_id in posts]
+        return {
+            "posts": page,
+            "next_cursor": post_ids[-1] if len(post_ids) == limit else None
+        }
+
+    def _insert_ignore(self, db: AsyncSession, source):
+        """INSERT ... SELECT into timeline_entries that skips rows already present"""
+        # Both supported backends (PostgreSQL, SQLite) have INSERT ... ON CONFLICT
+        if db.get_bind().dialect.name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        return insert(models.TimelineEntry).from_select(
+            ["user_id", "post_id", "author_id"], source
+        ).on_conflict_do_nothing(index_elements=["user_id", "post_id"])
+
+    async def _trim(self, db: AsyncSession, user_ids) -> None:
+        """Keep only the newest max_entries post ids in each of the given timelines"""
+        newer = aliased(models.TimelineEntry)
+        cutoff = (
+            select(newer.post_id)
+            .where(newer.user_id == models.TimelineEntry.user_id)
+            .order_by(newer.post_id.desc())
+            .offset(self.max_entries)
+            .limit(1)
+            .correlate(models.TimelineEntry)
+            .scalar_subquery()
+        )
+        await db.execute(
+            delete(models.TimelineEntry).where(
+                models.TimelineEntry.user_id.in_(user_ids),
+                models.TimelineEntry.post_id <= cutoff
+            ).execution_options(synchronize_session=False)
+        )
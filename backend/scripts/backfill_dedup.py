@@ -0,0 +1,64 @@
+"""
+Sign and link existing posts for near-duplicate detection.
+
+New posts are checked and indexed as they are created. Run this once after
+migration 0007 so earlier posts are linked to (or become) canonical posts;
+posts are processed oldest first, so the earliest copy stays canonical:
+    python scripts/backfill_dedup.py
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select
+from sqlalchemy.orm import undefer
+from app.database import SessionLocal
+from app import models
+from app.services.dedup_service import DedupService
+
+BATCH_SIZE = 2000
+
+
+def backfill() -> None:
+    service = DedupService()
+    start = time.perf_counter()
+    canonical = linked = 0
+    db = SessionLocal()
+    try:
+        last_id = 0
+        while True:
+            batch = db.execute(
+                select(models.Post).options(undefer(models.Post.minhash))
+                .where(models.Post.id > last_id, models.Post.minhash.is_(None))
+                .order_by(models.Post.id).limit(BATCH_SIZE)
+            ).scalars().all()
+            if not batch:
+                break
+            for post in batch:
+                signature = service.signature(post.title, post.content)
+                if signature is None:
+                    continue
+                post.minhash = signature.tobytes()
+                post.canonical_post_id = service.best_match(
+                    signature, db.execute(*service.candidates(signature)).all()
+                )
+                if post.canonical_post_id is None:
+                    db.flush()  # Later posts in the batch must see this one's signature
+                    db.execute(*service.bands(post))
+                    canonical += 1
+                else:
+                    linked += 1
+            db.commit()
+            last_id = batch[-1].id
+            db.expunge_all()
+    finally:
+        db.close()
+    print(
+        f"Signed {canonical + linked} posts in {time.perf_counter() - start:.1f}s: "
+        f"{canonical} canonical, {linked} linked as near-duplicates"
+    )
+
+
+if __name__ == "__main__":
+    backfill()
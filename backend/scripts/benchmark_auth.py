@@ -0,0 +1,138 @@
+"""
+Login throughput and event-loop impact of bcrypt.
+
+Runs a burst of concurrent logins against the app in-process (ASGI transport,
+scratch SQLite database) while probing /health, once with bcrypt inline on the
+event loop (the old behaviour) and once on the bounded password pool:
+    python scripts/benchmark_auth.py --rounds 12 --logins 40 --workers 2
+"""
+import sys
+import os
+import argparse
+import asyncio
+import shutil
+import statistics
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=12, help="BCRYPT_ROUNDS (cost factor)")
+    parser.add_argument("--logins", type=int, default=40, help="Concurrent logins per burst")
+    parser.add_argument("--workers", type=int, default=2, help="PASSWORD_HASH_WORKERS")
+    parser.add_argument("--probe-interval-ms", type=float, default=10.0)
+    return parser.parse_args()
+
+
+args = parse_args()
+
+# Must be set before app.config is imported
+_work_dir = tempfile.mkdtemp(prefix="bench_auth_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_work_dir, 'auth.db')}"
+os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+
+import httpx
+from app.database import Base, engine, SessionLocal
+from app import models
+from app.main import create_app
+from app.services import auth_service
+
+PASSWORD = "benchmark-password"
+
+
+def time_primitives():
+    start = time.perf_counter()
+    hashed = auth_service.get_password_hash(PASSWORD)
+    hash_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    auth_service.verify_password(PASSWORD, hashed)
+    verify_ms = (time.perf_counter() - start) * 1000
+    print(f"bcrypt cost {args.rounds}: hash {hash_ms:.0f} ms, verify {verify_ms:.0f} ms\n")
+    return hashed
+
+
+def create_user(hashed: str) -> None:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.add(models.User(username="bench", email="bench@example.com", hashed_password=hashed))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def burst(client: httpx.AsyncClient) -> dict:
+    """Fire concurrent logins while measuring /health latency"""
+    done = asyncio.Event()
+    probe_ms = []
+
+    async def probe():
+        # Latency past the intended probe time, so event-loop stalls during the sleep count too
+        interval = args.probe_interval_ms / 1000
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            await client.get("/health")
+            probe_ms.append((time.perf_counter() - start - interval) * 1000)
+
+    async def login():
+        response = await client.post("/api/auth/login", data={"username": "bench", "password": PASSWORD})
+        assert response.status_code == 200, response.text
+
+    prober = asyncio.create_task(probe())
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(args.logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await prober
+
+    probe_ms.sort()
+    return {
+        "logins_per_s": args.logins / elapsed,
+        "probe_p50": statistics.median(probe_ms),
+        "probe_p99": probe_ms[min(len(probe_ms) - 1, int(len(probe_ms) * 0.99))],
+        "probe_max": probe_ms[-1],
+        "probes": len(probe_ms),
+    }
+
+
+async def run_mode(app, inline: bool) -> dict:
+    original = auth_service._run_password_op
+    if inline:
+        async def run_inline(operation, fn, *fn_args):
+            return fn(*fn_args)
+        auth_service._run_password_op = run_inline
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await burst(client)
+    finally:
+        auth_service._run_password_op = original
+
+
+async def main():
+    hashed = time_primitives()
+    create_user(hashed)
+    app = create_app()
+
+    print(f"{args.logins} concurrent logins, /health probed every {args.probe_interval_ms:.0f} ms")
+    print(f"{'mode':<22} {'logins/s':>9} {'probes':>7} {'health p50':>11} {'p99':>9} {'max':>9}")
+    for label, inline in [("inline (event loop)", True), (f"pool ({args.workers} workers)", False)]:
+        r = await run_mode(app, inline)
+        print(
+            f"{label:<22} {r['logins_per_s']:9.1f} {r['probes']:7d} "
+            f"{r['probe_p50']:9.1f}ms {r['probe_p99']:7.1f}ms {r['probe_max']:7.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    finally:
+        auth_service.shutdown_password_executor()
+        engine.dispose()
+        shutil.rmtree(_work_dir, ignore_errors=True)
@@ -0,0 +1,134 @@
+"""
+Near-duplicate detection cost and accuracy as the corpus grows.
+
+Creates synthetic posts in a scratch SQLite database through the same path as
+POST /api/posts (DedupService.link, flush, DedupService.index), with a share of them
+lightly edited copies of earlier posts, and reports per-post latency and how
+many copies were linked to their original:
+    python scripts/benchmark_dedup.py --posts 100000 --duplicates 0.2
+"""
+import sys
+import os
+import argparse
+import asyncio
+import random
+import shutil
+import statistics
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=100_000)
+    parser.add_argument("--duplicates", type=float, default=0.2, help="Share of posts that copy an earlier one")
+    parser.add_argument("--edits", type=int, default=2, help="Words changed in each copy")
+    parser.add_argument("--report-every", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+args = parse_args()
+
+# Must be set before app.config is imported
+_work_dir = tempfile.mkdtemp(prefix="bench_dedup_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_work_dir, 'dedup.db')}"
+
+from app.database import Base, engine, async_engine, AsyncSessionLocal
+from app import models
+from app.services.dedup_service import DedupService, shingles
+
+VOCABULARY = [f"word{i}" for i in range(5000)]
+COMMIT_EVERY = 500
+
+
+def make_text(rng: random.Random) -> str:
+    return " ".join(rng.choices(VOCABULARY, k=rng.randint(40, 120)))
+
+
+def edit_text(rng: random.Random, text: str) -> str:
+    words = text.split()
+    for _ in range(args.edits):
+        words[rng.randrange(len(words))] = rng.choice(VOCABULARY)
+    return " ".join(words)
+
+
+def jaccard(a: str, b: str) -> float:
+    a, b = set(shingles(a)), set(shingles(b))
+    return len(a & b) / len(a | b)
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run() -> None:
+    rng = random.Random(args.seed)
+    service = DedupService()
+    originals = []  # (post id, title, content) of posts that were not created as copies
+    source_of = {}  # Post id -> id of the original it was created from (itself for originals)
+    latencies_ms = []
+    copies = linked_right = linked_wrong = false_links = missed_similar = 0
+
+    async with AsyncSessionLocal() as db:
+        db.add(models.User(id=1, username="bench", email="bench@example.com", hashed_password="x"))
+        await db.commit()
+        print(f"{'posts':>8} {'p50':>8} {'p99':>8} {'max':>8}  copies linked / missed (above threshold) / wrong, false links")
+        for n in range(1, args.posts + 1):
+            source = rng.choice(originals) if originals and rng.random() < args.duplicates else None
+            if source:
+                title, content = source[1], edit_text(rng, source[2])
+            else:
+                title, content = make_text(rng)[:60], make_text(rng)
+            post = models.Post(
+                title=title, content=content, author_id=1, insight_type=models.InsightType.TECHNICAL_ANALYSIS
+            )
+
+            # Timed: the dedup work only (the post insert itself is paid with or without it)
+            start = time.perf_counter()
+            canonical_id = await service.link(db, post)
+            elapsed = time.perf_counter() - start
+            db.add(post)
+            await db.flush()
+            start = time.perf_counter()
+            await service.index(db, post)
+            latencies_ms.append((elapsed + time.perf_counter() - start) * 1000)
+
+            source_of[post.id] = source[0] if source else post.id
+            if source:
+                copies += 1
+                # A missed copy becomes canonical itself; later copies may match it instead
+                if canonical_id is not None and source_of[canonical_id] == source[0]:
+                    linked_right += 1
+                elif canonical_id is not None:
+                    linked_wrong += 1
+                elif jaccard(f"{source[1]}\n{source[2]}", f"{title}\n{content}") >= service.threshold:
+                    missed_similar += 1
+            else:
+                originals.append((post.id, title, content))
+                if canonical_id is not None:
+                    false_links += 1
+            if n % COMMIT_EVERY == 0:
+                await db.commit()
+                db.expunge_all()
+            if n % args.report_every == 0 or n == args.posts:
+                window = latencies_ms[-args.report_every:]
+                print(
+                    f"{n:8d} {percentile(window, 0.5):6.2f}ms {percentile(window, 0.99):6.2f}ms "
+                    f"{max(window):6.2f}ms  {linked_right} / {copies - linked_right - linked_wrong} "
+                    f"({missed_similar}) / {linked_wrong}, {false_links}"
+                )
+        await db.commit()
+    print(f"\noverall p50 {statistics.median(latencies_ms):.2f} ms (signature + band lookup + band insert)")
+
+
+if __name__ == "__main__":
+    try:
+        Base.metadata.create_all(bind=engine)
+        asyncio.run(run())
+    finally:
+        asyncio.run(async_engine.dispose())
+        engine.dispose()
+        shutil.rmtree(_work_dir, ignore_errors=True)
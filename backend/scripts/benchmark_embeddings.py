@@ -0,0 +1,111 @@
+"""
+Recall and latency of the post embedding index.
+
+Builds a scratch index from synthetic topical posts, then compares LSH lookups
+against exact brute-force search over the same vectors:
+    python scripts/benchmark_embeddings.py --posts 200000 --queries 200
+"""
+import sys
+import os
+import argparse
+import random
+import shutil
+import statistics
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--topics", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--tables", type=int, help="EMBEDDING_LSH_TABLES")
+    parser.add_argument("--bits", type=int, help="EMBEDDING_LSH_BITS")
+    parser.add_argument("--candidates", type=int, help="EMBEDDING_MAX_CANDIDATES")
+    return parser.parse_args()
+
+
+args = parse_args()
+
+# Must be set before app.config is imported
+_work_dir = tempfile.mkdtemp(prefix="bench_embeddings_")
+os.environ["EMBEDDING_INDEX_DIR"] = _work_dir
+for _option, _setting in [("tables", "EMBEDDING_LSH_TABLES"), ("bits", "EMBEDDING_LSH_BITS"), ("candidates", "EMBEDDING_MAX_CANDIDATES")]:
+    if getattr(args, _option) is not None:
+        os.environ[_setting] = str(getattr(args, _option))
+
+import numpy as np
+from app.services.embedding_service import EmbeddingService
+
+TICKERS = ["AAPL", "MSFT", "NVDA", "TSLA", "AMZN", "GOOGL", "META", "AMD", "JPM", "XOM"]
+
+
+def make_posts(rng: random.Random):
+    """Posts drawn from topics: each topic has its own words, mixed with shared filler"""
+    shared = [f"word{i}" for i in range(3000)]
+    topics = [[f"topic{t}x{i}" for i in range(10)] for t in range(args.topics)]
+    for post_id in range(1, args.posts + 1):
+        topic = rng.randrange(args.topics)
+        words = rng.choices(topics[topic], k=16) + rng.choices(shared, k=16)
+        rng.shuffle(words)
+        yield {
+            "id": post_id,
+            "title": " ".join(words[:6]),
+            "content": " ".join(words[6:]),
+            "ticker": TICKERS[topic % len(TICKERS)],
+        }
+
+
+def build(service: EmbeddingService) -> np.ndarray:
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    posts = list(make_posts(rng))
+    df = np.zeros(service.dim, dtype=np.int64)
+    for post in posts:
+        df[list({bucket for bucket, _ in service.hashed_terms(post)})] += 1
+    idf = np.log((1.0 + len(posts)) / (1.0 + df)) + 1.0
+    vectors = np.array([service.embed(post, idf) for post in posts], dtype=np.float32)
+    service.index.rewrite([(np.arange(1, len(posts) + 1), vectors)])
+    len(service.index)  # Load the memory map and build the LSH tables
+    print(f"Indexed {len(posts)} posts ({service.dim} dims) in {time.perf_counter() - start:.1f}s")
+    return vectors
+
+
+def main():
+    service = EmbeddingService()
+    vectors = build(service)
+    rng = np.random.default_rng(args.seed)
+    query_rows = rng.choice(len(vectors), size=args.queries, replace=False)
+
+    ann_ms, exact_ms, recalls = [], [], []
+    for row in query_rows:
+        post_id = int(row) + 1
+        start = time.perf_counter()
+        found = service.index.nearest(vectors[row], args.k, exclude=[post_id])
+        ann_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        scores = vectors @ vectors[row]
+        scores[row] = -np.inf
+        exact = set((np.argpartition(-scores, args.k)[:args.k] + 1).tolist())
+        exact_ms.append((time.perf_counter() - start) * 1000)
+
+        recalls.append(len(exact & {post for post, _ in found}) / args.k)
+
+    ann_ms.sort()
+    exact_ms.sort()
+    p99 = lambda samples: samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{'search':<20} {'p50':>9} {'p99':>9}")
+    print(f"{'LSH + rerank':<20} {statistics.median(ann_ms):7.1f}ms {p99(ann_ms):7.1f}ms   recall@{args.k} {statistics.mean(recalls):.3f}")
+    print(f"{'exact (in memory)':<20} {statistics.median(exact_ms):7.1f}ms {p99(exact_ms):7.1f}ms")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        shutil.rmtree(_work_dir, ignore_errors=True)
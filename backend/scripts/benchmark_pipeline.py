@@ -0,0 +1,96 @@
+"""
+Offline benchmark for the market context, ranking and trend detection pipeline.
+
+Uses the deterministic replay provider (recorded files, or synthetic series for
+unrecorded tickers), so it runs without network access at any scale:
+    python scripts/benchmark_pipeline.py --posts 10000 --tickers 500
+"""
+import sys
+import os
+import argparse
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Must be set before app.config is imported
+os.environ["MARKET_DATA_PROVIDER"] = "replay"
+_work_dir = tempfile.mkdtemp(prefix="bench_pipeline_")
+os.environ["MARKET_DATA_STORE_DIR"] = os.path.join(_work_dir, "bars")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_work_dir, 'bench.db')}"
+
+from app.database import Base, engine
+from app import models  # noqa: F401 (registers tables for create_all)
+from app.services.market_data_service import MarketDataService
+from app.services.llm_service import LLMService
+
+SECTORS = ["Technology", "Healthcare", "Finance", "Energy", "Consumer Cyclical"]
+INSIGHT_TYPES = ["fundamental_analysis", "technical_analysis", "macro_commentary", "earnings_forecast", "risk_warning"]
+
+
+def make_posts(n_posts, tickers, rng):
+    """Synthetic post dicts shaped like the feed's ranking input"""
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": i,
+            "title": f"Post {i}",
+            "content": "Synthetic benchmark post",
+            "ticker": rng.choice(tickers),
+            "insight_type": rng.choice(INSIGHT_TYPES),
+            "quality_score": rng.uniform(0, 100),
+            "sector": rng.choice(SECTORS),
+            "like_count": rng.randint(0, 50),
+            "dislike_count": rng.randint(0, 5),
+            "bullish_count": rng.randint(0, 20),
+            "bearish_count": rng.randint(0, 20),
+            "helpful_count": rng.randint(0, 10),
+            "author_reputation_score": rng.uniform(0, 100),
+            "created_at": (now - timedelta(hours=rng.uniform(0, 96))).isoformat(),
+        }
+        for i in range(n_posts)
+    ]
+
+
+def timed(label, fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    print(f"  {label:<32} {(time.perf_counter() - start) * 1000:9.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--tickers", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    tickers = [f"T{i:04d}" for i in range(args.tickers)]
+    posts = make_posts(args.posts, tickers, rng)
+    
+    Base.metadata.create_all(bind=engine)
+    market_service = MarketDataService()
+    llm_service = LLMService()
+    
+    print(f"Benchmark: {args.posts} posts, {args.tickers} tickers (provider={market_service.provider.name})")
+    try:
+        timed("fundamentals refresh", market_service.fundamentals.refresh, tickers)
+        timed("market context (cold store)", market_service.get_market_context, tickers, include_sentiment=False)
+        context = timed("market context (warm store)", market_service.get_market_context, tickers, include_sentiment=False)
+        snapshot = timed("market snapshot (build)", market_service.get_market_snapshot, tickers)
+        timed("market snapshot (cached)", market_service.get_market_snapshot, tickers)
+        timed("rank_posts (context dict)", llm_service.rank_posts, posts, None, context)
+        timed("rank_posts (snapshot)", llm_service.rank_posts, posts, None, snapshot)
+        timed("experiment_with_strategy", llm_service.experiment_with_strategy, posts, None, snapshot)
+        timed("detect_trends", llm_service.detect_trends, posts, context)
+        timed("detect_market_trends", market_service.detect_market_trends, tickers)
+    finally:
+        shutil.rmtree(_work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
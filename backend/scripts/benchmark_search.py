@@ -0,0 +1,133 @@
+"""
+Latency of post search on a large synthetic corpus.
+
+Builds a scratch SQLite database through the migrations (so the FTS5 index and
+triggers exist), fills it with generated posts and tags, and times the search
+service for common query shapes, first pages and deep cursor pages:
+    python scripts/benchmark_search.py --posts 200000 --queries 200
+"""
+import sys
+import os
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import shutil
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=200, help="Timed queries per shape")
+    parser.add_argument("--limit", type=int, default=20, help="Page size")
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+args = parse_args()
+
+# Must be set before app.config is imported
+_work_dir = tempfile.mkdtemp(prefix="bench_search_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_work_dir, 'search.db')}"
+
+from alembic import command
+from sqlalchemy import text
+from app.database import engine, async_engine, AsyncSessionLocal
+from app.services.search_service import SearchService
+from scripts.migrate import alembic_config
+
+TICKERS = ["AAPL", "MSFT", "NVDA", "TSLA", "AMZN", "GOOGL", "META", "AMD", "JPM", "XOM"]
+WORDS = (
+    "earnings revenue guidance margin growth demand supply chain chips cloud ai datacenter "
+    "buyback dividend valuation breakout support resistance momentum volume options "
+    "inflation rates fed recession consumer retail energy oil bank credit loan "
+    "upgrade downgrade analyst target beat miss quarter outlook forecast risk"
+).split() + [f"term{i}" for i in range(5000)]
+# Zipf-like: a few words appear in most posts, most words are rare (as in real text)
+CUM_WEIGHTS = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(WORDS))))
+TAGS = [f"sector:{s}" for s in ("tech", "energy", "finance", "consumer", "health")] + \
+       [f"catalyst:{c}" for c in ("earnings", "product", "macro", "m&a", "guidance")]
+
+
+def words(rng: random.Random, k: int) -> str:
+    return " ".join(rng.choices(WORDS, cum_weights=CUM_WEIGHTS, k=k))
+
+
+def build_corpus() -> None:
+    command.upgrade(alembic_config(), "head")
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO users (id, username, email, hashed_password) VALUES (1, 'bench', 'bench@example.com', 'x')"
+        ))
+        batch, tag_rows = [], []
+        for post_id in range(1, args.posts + 1):
+            tags = rng.sample(TAGS, 2)
+            batch.append({
+                "id": post_id,
+                "title": words(rng, 6),
+                "summary": words(rng, 12),
+                "content": words(rng, 60),
+                "ticker": rng.choice(TICKERS),
+                "tags": json.dumps(tags),
+            })
+            tag_rows.extend({"post_id": post_id, "tag": tag} for tag in tags)
+            if len(batch) == 5000 or post_id == args.posts:
+                conn.execute(text(
+                    "INSERT INTO posts (id, author_id, title, summary, content, ticker, semantic_tags, insight_type) "
+                    "VALUES (:id, 1, :title, :summary, :content, :ticker, :tags, 'TECHNICAL_ANALYSIS')"
+                ), batch)
+                conn.execute(text("INSERT INTO post_tags (post_id, tag) VALUES (:post_id, :tag)"), tag_rows)
+                batch, tag_rows = [], []
+        conn.execute(text("ANALYZE"))
+    print(f"Indexed {args.posts} posts in {time.perf_counter() - start:.1f}s\n")
+
+
+def percentile(samples, p: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+async def time_shape(service: SearchService, label: str, make_params, pages: int = 1) -> None:
+    rng = random.Random(args.seed)
+    samples = []
+    async with AsyncSessionLocal() as db:
+        for _ in range(args.queries):
+            params = make_params(rng)
+            cursor = None
+            for _ in range(pages):
+                start = time.perf_counter()
+                result = await service.search_posts(db, limit=args.limit, cursor=cursor, **params)
+                elapsed = (time.perf_counter() - start) * 1000
+                cursor = result["next_cursor"]
+                if not cursor:
+                    break
+            samples.append(elapsed)
+    samples.sort()
+    print(f"{label:<34} {percentile(samples, 0.5):8.1f}ms {percentile(samples, 0.99):8.1f}ms {samples[-1]:8.1f}ms")
+
+
+async def main():
+    build_corpus()
+    service = SearchService()
+    print(f"{'query (page of ' + str(args.limit) + ')':<34} {'p50':>10} {'p99':>10} {'max':>10}")
+    await time_shape(service, "one term", lambda r: {"query": words(r, 1)})
+    await time_shape(service, "most common term", lambda r: {"query": WORDS[0]})
+    await time_shape(service, "two terms", lambda r: {"query": words(r, 2)})
+    await time_shape(service, "three terms", lambda r: {"query": words(r, 3)})
+    await time_shape(service, "two terms, newest first", lambda r: {"query": words(r, 2), "sort": "recent"})
+    await time_shape(service, "two terms + ticker", lambda r: {"query": words(r, 2), "ticker": r.choice(TICKERS)})
+    await time_shape(service, "two terms + two tags", lambda r: {"query": words(r, 2), "tags": r.sample(TAGS, 2)})
+    await time_shape(service, "two terms, 5th page", lambda r: {"query": words(r, 2)}, pages=5)
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    finally:
+        asyncio.run(async_engine.dispose())
+        engine.dispose()
+        shutil.rmtree(_work_dir, ignore_errors=True)
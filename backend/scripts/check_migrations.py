@@ -0,0 +1,108 @@
+"""
+Migration check for databases created before migrations existed.
+
+Builds scratch SQLite databases the way older deploys left them (tables from the
+import-time create_all(), no alembic_version), runs scripts/migrate.py on each,
+and fails unless every one ends at head with the models' schema and its rows
+intact. Also covers a fresh database:
+    python scripts/check_migrations.py
+"""
+import sys
+import os
+import shutil
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Must be set before app.config is imported
+_work_dir = tempfile.mkdtemp(prefix="migrations_")
+_db_path = os.path.join(_work_dir, "legacy.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+
+from alembic import command
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+from app.database import engine
+from app import models
+from migrate import alembic_config, migrate
+
+
+def _reset() -> None:
+    engine.dispose()
+    if os.path.exists(_db_path):
+        os.remove(_db_path)
+
+
+def _legacy_schema(with_fundamentals: bool) -> None:
+    """A create_all() era schema (the 0001 baseline) with a few rows, and no migration history"""
+    command.upgrade(alembic_config(), "0001")
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE alembic_version"))
+        conn.execute(text(
+            "INSERT INTO users (id, username, email, hashed_password) VALUES (1, 'alice', 'alice@x.com', 'h')"
+        ))
+        conn.execute(text(
+            "INSERT INTO posts (id, author_id, title, content, ticker, insight_type, quality_score, "
+            "like_count, dislike_count, bullish_count, bearish_count, helpful_count, view_count) "
+            "VALUES (1, 1, 'AAPL earnings', 'Services revenue beat', 'AAPL', 'EARNINGS_FORECAST', 70, "
+            "0, 0, 0, 0, 0, 0)"
+        ))
+    # ticker_fundamentals joined the models after the original schema: older create_all() databases
+    # lack it, later ones (before the composite indexes) have it
+    if with_fundamentals:
+        models.TickerFundamentals.__table__.create(engine, checkfirst=True)
+    else:
+        models.TickerFundamentals.__table__.drop(engine, checkfirst=True)
+
+
+def _check_at_head(name: str) -> list:
+    problems = []
+    head = ScriptDirectory.from_config(alembic_config()).get_current_head()
+    with engine.connect() as conn:
+        current = MigrationContext.configure(conn).get_current_revision()
+        if current != head:
+            problems.append(f"{name}: at revision {current}, expected {head}")
+        if "ticker_fundamentals" not in inspect(conn).get_table_names():
+            problems.append(f"{name}: ticker_fundamentals is missing")
+    try:
+        command.check(alembic_config())
+    except Exception as e:
+        problems.append(f"{name}: schema differs from the models: {e}")
+    return problems
+
+
+def main() -> int:
+    scenarios = [
+        ("fresh database", None),
+        ("create_all() baseline", False),
+        ("create_all() baseline with ticker_fundamentals", True),
+    ]
+    problems = []
+    try:
+        for name, with_fundamentals in scenarios:
+            _reset()
+            if with_fundamentals is not None:
+                _legacy_schema(with_fundamentals)
+            migrate()
+            found = _check_at_head(name)
+            if with_fundamentals is not None:
+                with engine.connect() as conn:
+                    title = conn.execute(text("SELECT title FROM posts WHERE id = 1")).scalar()
+                if title != "AAPL earnings":
+                    found.append(f"{name}: existing post rows were not preserved")
+            print(f"  {'FAIL' if found else 'ok  '} {name}")
+            problems += found
+    finally:
+        engine.dispose()
+        shutil.rmtree(_work_dir, ignore_errors=True)
+
+    for problem in problems:
+        print(problem)
+    if problems:
+        return 1
+    print(f"{len(scenarios)}/{len(scenarios)} databases migrated to head")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+Query-plan regression check for the hot API queries.
+
+Builds a scratch SQLite database with `alembic upgrade head`, runs EXPLAIN QUERY
+PLAN on the same statement shapes the routers issue, and fails if any of them
+stops using its expected index (e.g. after a model or migration change):
+    python scripts/check_query_plans.py
+"""
+import sys
+import os
+import shutil
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Must be set before app.config is imported
+_work_dir = tempfile.mkdtemp(prefix="query_plans_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_work_dir, 'plans.db')}"
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import select, func, or_, and_, text
+from app.database import engine
+from app import models
+from app.services.search_service import SearchService
+from app.services.dedup_service import DedupService
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _search_candidates():
+    """The SearchService candidate query for a plain search on SQLite"""
+    matches, post_id, score = SearchService()._fts5_matches(["earnings"])
+    return matches.add_columns(post_id, score).order_by(post_id.desc()).limit(100)
+
+
+def _dedup_candidates():
+    """The DedupService band lookup for a new post"""
+    service = DedupService()
+    statement, parameters = service.candidates(service.signature("AAPL earnings", "services revenue beat estimates"))
+    return statement.params(parameters)
+
+
+# (name, statement, index the plan must use)
+CHECKS = [
+    (
+        "posts by ticker, newest first",
+        select(models.Post).where(models.Post.ticker == "AAPL")
+        .order_by(models.Post.created_at.desc()).limit(50),
+        "ix_posts_ticker_created_at",
+    ),
+    (
+        "top-level comments for a post",
+        select(models.Comment).where(
+            models.Comment.post_id == 1,
+            models.Comment.parent_comment_id == None
+        ).order_by(models.Comment.created_at.desc()).limit(50),
+        "ix_comments_post_id_parent_comment_id_created_at",
+    ),
+    (
+        "replies to a comment",
+        select(models.Comment).where(models.Comment.parent_comment_id == 1)
+        .order_by(models.Comment.created_at.asc()).limit(20),
+        "ix_comments_parent_comment_id",
+    ),
+    (
+        "conversation between two users",
+        select(models.DirectMessage).where(
+            or_(
+                and_(models.DirectMessage.sender_id == 1, models.DirectMessage.recipient_id == 2),
+                and_(models.DirectMessage.sender_id == 2, models.DirectMessage.recipient_id == 1)
+            )
+        ).order_by(models.DirectMessage.created_at.asc()).limit(50),
+        "ix_direct_messages_sender_id_recipient_id_created_at",
+    ),
+    (
+        "message inbox (conversation summaries)",
+        select(models.ConversationSummary).where(models.ConversationSummary.user_id == 1)
+        .order_by(models.ConversationSummary.last_message_at.desc()).limit(50),
+        "ix_conversation_summaries_user_id_last_message_at",
+    ),
+    (
+        "home timeline page",
+        select(models.TimelineEntry.post_id).where(
+            models.TimelineEntry.user_id == 1,
+            models.TimelineEntry.post_id < 1000
+        ).order_by(models.TimelineEntry.post_id.desc()).limit(20),
+        "uq_timeline_entries_user_id_post_id",
+    ),
+    (
+        "reactions received per type (reputation)",
+        select(models.Reaction.reaction_type, func.count(models.Reaction.id))
+        .join(models.Post, models.Reaction.post_id == models.Post.id)
+        .where(models.Post.author_id == 1)
+        .group_by(models.Reaction.reaction_type),
+        "uq_reactions_post_id_user_id_reaction_type",
+    ),
+    (
+        "follow lookup",
+        select(models.Follow).where(models.Follow.follower_id == 1, models.Follow.following_id == 2),
+        "uq_follows_follower_id_following_id",
+    ),
+    (
+        "comment like lookup",
+        select(models.CommentReaction).where(
+            models.CommentReaction.comment_id == 1,
+            models.CommentReaction.user_id == 2
+        ),
+        "uq_comment_reactions_comment_id_user_id",
+    ),
+    (
+        "posts by tag",
+        select(models.PostTag.post_id).where(models.PostTag.tag == "sector:tech").order_by(models.PostTag.post_id.desc()),
+        "ix_post_tags_tag_post_id",
+    ),
+    (
+        "search candidates (full-text index)",
+        _search_candidates(),
+        "posts_fts VIRTUAL TABLE INDEX",
+    ),
+    (
+        "near-duplicate candidates by band",
+        _dedup_candidates(),
+        "sqlite_autoindex_post_minhash_bands_1",
+    ),
+]
+
+
+def explain(conn, statement) -> str:
+    """EXPLAIN QUERY PLAN output for a statement, one detail per line"""
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+    return "\n".join(row[-1] for row in rows)
+
+
+def main() -> int:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    command.upgrade(config, "head")
+
+    failures = 0
+    with engine.connect() as conn:
+        for name, statement, index in CHECKS:
+            plan = explain(conn, statement)
+            ok = index in plan
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {name}: expects {index}")
+            if not ok:
+                print("     " + plan.replace("\n", "\n     "))
+
+    print(f"\n{len(CHECKS) - failures}/{len(CHECKS)} query plans use their expected index")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    finally:
+        engine.dispose()
+        shutil.rmtree(_work_dir, ignore_errors=True)
@@ -0,0 +1,153 @@
+"""
+Agreement, cost and latency of the local pre-scorer against LLM analyses.
+
+Scores a labelled sample locally and compares it with the LLM's own analysis:
+how many posts the LLM rates at or above the triage threshold would be skipped,
+score correlation, sector/catalyst agreement, and what the skipped LLM calls
+would have cost. The sample is a JSONL file of {"title", "content", "ticker",
+"quality_score", "sector", "catalyst_type"} records (the LLM's labels), or by
+default the posts the LLM analyzed in DATABASE_URL (analysis_tier = 'llm'):
+    python scripts/evaluate_prescorer.py --sample labelled.jsonl
+    python scripts/evaluate_prescorer.py --fit  # also fit weights to the LLM scores and save them
+"""
+import sys
+import os
+import argparse
+import json
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sqlalchemy import select
+from app.config import settings
+from app.database import SessionLocal
+from app import models
+from app.services.llm_service import LLMService
+from app.services.prescore_service import PreScoreService, FEATURES
+
+CHARS_PER_TOKEN = 4  # Rough English average for prompt token estimates
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sample", help="Labelled JSONL file (default: LLM-analyzed posts in the database)")
+    parser.add_argument("--limit", type=int, default=5000, help="Newest posts taken from the database")
+    parser.add_argument("--threshold", type=float, default=settings.PRESCORE_LLM_THRESHOLD)
+    parser.add_argument("--llm-latency-ms", type=float, default=6000.0, help="Typical LLM analysis call latency")
+    parser.add_argument("--completion-tokens", type=int, default=350, help="Typical analysis completion length")
+    parser.add_argument("--prompt-price", type=float, default=0.01, help="USD per 1k prompt tokens")
+    parser.add_argument("--completion-price", type=float, default=0.03, help="USD per 1k completion tokens")
+    parser.add_argument("--fit", action="store_true", help="Fit weights with ridge regression and save them")
+    parser.add_argument("--folds", type=int, default=5, help="Cross-validation folds for the fitted report")
+    parser.add_argument("--output", default=settings.PRESCORE_MODEL_PATH)
+    return parser.parse_args()
+
+
+def load_sample(args):
+    if args.sample:
+        with open(args.sample) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    db = SessionLocal()
+    try:
+        posts = db.execute(
+            select(models.Post).where(models.Post.analysis_tier == "llm")
+            .order_by(models.Post.id.desc()).limit(args.limit)
+        ).scalars().all()
+        return [
+            {
+                "title": p.title, "content": p.content, "ticker": p.ticker, "quality_score": p.quality_score,
+                "sector": p.sector, "catalyst_type": p.catalyst_type,
+            }
+            for p in posts
+        ]
+    finally:
+        db.close()
+
+
+def agreement(labels, predictions) -> float:
+    """Share of labelled records whose prediction matches (case-insensitive); nan if none are labelled"""
+    pairs = [(str(label).lower(), str(prediction or "").lower()) for label, prediction in zip(labels, predictions) if label]
+    return sum(label == prediction for label, prediction in pairs) / len(pairs) if pairs else float("nan")
+
+
+def feature_row(service, record):
+    extracted = service.extract(record["title"], record["content"], record.get("ticker"))
+    features = service.features(extracted, f"{record['title']}\n{record['content']}")
+    return [features[name] for name in FEATURES]
+
+
+def ranks(values):
+    return np.argsort(np.argsort(values))
+
+
+def report(label, scores, llm_scores, threshold):
+    scores, llm_scores = np.asarray(scores, dtype=float), np.asarray(llm_scores, dtype=float)
+    sent, worthy = scores >= threshold, llm_scores >= threshold
+    print(f"\n{label}")
+    print(f"  sent to LLM           {sent.mean():7.1%}  (skipped {(~sent).mean():.1%})")
+    print(f"  LLM-worthy kept       {(sent & worthy).sum() / max(worthy.sum(), 1):7.1%}  "
+          f"({(worthy & ~sent).sum()} of {worthy.sum()} posts the LLM scores >= {threshold:g} skipped)")
+    print(f"  precision of sends    {(sent & worthy).sum() / max(sent.sum(), 1):7.1%}")
+    print(f"  score MAE             {np.abs(scores - llm_scores).mean():7.1f}")
+    print(f"  Pearson / Spearman    {np.corrcoef(scores, llm_scores)[0, 1]:7.3f} / "
+          f"{np.corrcoef(ranks(scores), ranks(llm_scores))[0, 1]:.3f}")
+    return sent
+
+
+def main() -> int:
+    args = parse_args()
+    records = load_sample(args)
+    if len(records) < 2:
+        print("Need at least two labelled posts (pass --sample or analyze posts with the LLM first)")
+        return 1
+
+    service = PreScoreService()
+    llm_service = LLMService()
+
+    start = time.perf_counter()
+    analyses = [service.analyze(r["title"], r["content"], r.get("ticker")) for r in records]
+    local_ms = (time.perf_counter() - start) * 1000 / len(records)
+
+    llm_scores = [float(r.get("quality_score") or 0.0) for r in records]
+    print(f"{len(records)} labelled posts, threshold {args.threshold:g}, local analysis {local_ms:.3f} ms/post")
+    print(f"  sector agreement      {agreement([r.get('sector') for r in records], [a['sector'] for a in analyses]):7.1%}")
+    print(f"  catalyst agreement    "
+          f"{agreement([r.get('catalyst_type') for r in records], [a['catalyst_type'] for a in analyses]):7.1%}")
+    sent = report("current weights", [a["quality_score"] for a in analyses], llm_scores, args.threshold)
+
+    if args.fit:
+        from sklearn.linear_model import Ridge
+        from sklearn.model_selection import cross_val_predict
+
+        X = np.array([feature_row(service, r) for r in records])
+        y = np.array(llm_scores)
+        folds = max(2, min(args.folds, len(records)))
+        held_out = np.clip(cross_val_predict(Ridge(alpha=1.0), X, y, cv=folds), 0.0, 100.0)
+        sent = report(f"fitted weights ({folds}-fold held-out)", held_out, llm_scores, args.threshold)
+
+        model = Ridge(alpha=1.0).fit(X, y)
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({
+                "bias": float(model.intercept_),
+                "weights": {name: float(w) for name, w in zip(FEATURES, model.coef_)},
+                "fitted_on": len(records),
+            }, f, indent=2)
+        print(f"\nSaved weights fitted on {len(records)} posts to {args.output} (restart the API to load them)")
+
+    # Savings of the last report's triage decisions, per 1,000 posts
+    prompt_tokens = np.mean([
+        len(llm_service._build_analysis_prompt(r["title"], r["content"], r.get("ticker"))) / CHARS_PER_TOKEN
+        for r in records
+    ])
+    call_cost = (prompt_tokens * args.prompt_price + args.completion_tokens * args.completion_price) / 1000
+    skipped = (~sent).mean() * 1000
+    print(f"\nPer 1,000 posts: {skipped:.0f} LLM calls skipped, "
+          f"~{skipped * (prompt_tokens + args.completion_tokens):,.0f} tokens, ~${skipped * call_cost:.2f} "
+          f"(at ${call_cost:.4f}/call) and ~{skipped * args.llm_latency_ms / 1000 / 60:.0f} min of LLM time; "
+          f"local pass adds {local_ms * 1000:.0f} ms in total")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
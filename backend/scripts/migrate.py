@@ -0,0 +1,70 @@
+"""
+Apply database migrations once per deploy (before starting API workers):
+    python scripts/migrate.py
+
+Databases created by the old import-time `create_all()` have no
+alembic_version table: they are stamped at head if they already match the
+models, at 0002 if they have its composite indexes, otherwise at the 0001
+baseline, and then upgraded. (Tables added to the models after the original
+schema, such as ticker_fundamentals, are created by later revisions that skip
+them when they already exist; scripts/check_migrations.py covers these cases.)
+On PostgreSQL an advisory lock keeps concurrent runs from racing.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import inspect, text
+from app.database import engine, Base
+from app import models  # noqa: F401 (registers tables on Base.metadata)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_REVISION = "0001"
+INDEXES_REVISION = "0002"
+MIGRATION_LOCK_ID = 72_110_034  # Arbitrary app-wide advisory lock key
+
+
+def alembic_config() -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    return config
+
+
+def legacy_stamp_revision(conn) -> str:
+    """Revision matching a schema that was created without migrations"""
+    diffs = compare_metadata(MigrationContext.configure(conn), Base.metadata)
+    if not diffs:
+        return "head"
+    # create_all() after the 0002 indexes were added to the models, before later tables
+    post_indexes = {index["name"] for index in inspect(conn).get_indexes("posts")}
+    if "ix_posts_ticker_created_at" in post_indexes:
+        return INDEXES_REVISION
+    return BASELINE_REVISION
+
+
+def migrate():
+    config = alembic_config()
+    is_postgres = engine.dialect.name == "postgresql"
+
+    with engine.connect() as lock_conn:
+        if is_postgres:
+            lock_conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        try:
+            tables = set(inspect(engine).get_table_names())
+            if "alembic_version" not in tables and "users" in tables:
+                revision = legacy_stamp_revision(lock_conn)
+                print(f"Existing schema without migration history; stamping {revision}")
+                command.stamp(config, revision)
+            command.upgrade(config, "head")
+        finally:
+            if is_postgres:
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+    print("Database schema is up to date")
+
+
+if __name__ == "__main__":
+    migrate()
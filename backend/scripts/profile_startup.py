@@ -0,0 +1,95 @@
+"""
+Startup import profiler with an import-time budget.
+
+Imports `app.main` in a fresh interpreter under `python -X importtime` and
+reports the slowest modules (cumulative and self time, grouped by top-level
+package). Fails when the total exceeds the budget, or when a heavy library that
+should load on first use is imported at startup:
+    python scripts/profile_startup.py --budget-ms 1500 --top 15
+"""
+import sys
+import os
+import argparse
+import subprocess
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded lazily by the services that need them; must not appear at import time
+LAZY_MODULES = ["openai", "yfinance", "pandas", "numpy", "jose", "redis"]
+
+Entry = Tuple[str, int, int, int]  # (module, depth, self_us, cumulative_us)
+
+
+def run_importtime(module: str) -> List[Entry]:
+    """Import a module in a fresh interpreter and parse -X importtime output"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        entries.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return entries
+
+
+def summarize(entries: List[Entry], module: str) -> Dict:
+    cumulative = {name: cum for name, _, _, cum in entries}
+    by_package: Dict[str, int] = defaultdict(int)
+    for name, _, self_us, _ in entries:
+        by_package[name.split(".")[0]] += self_us
+    return {
+        "total_us": cumulative.get(module, 0),
+        "modules": cumulative,
+        "packages": by_package,
+        "top_level": sorted(
+            ((name, cum) for name, depth, _, cum in entries if depth <= 1),
+            key=lambda item: item[1], reverse=True
+        ),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Max total import time")
+    parser.add_argument("--runs", type=int, default=3, help="Keep the fastest of N runs")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [summarize(run_importtime(args.module), args.module) for _ in range(max(args.runs, 1))]
+    best = min(runs, key=lambda run: run["total_us"])
+
+    print(f"import {args.module}: {best['total_us'] / 1000:.1f} ms (best of {len(runs)})\n")
+    print(f"{'cumulative ms':>14}  module")
+    for name, cum in best["top_level"][:args.top]:
+        print(f"{cum / 1000:14.1f}  {name}")
+    print(f"\n{'self ms':>14}  package")
+    for package, self_us in sorted(best["packages"].items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{self_us / 1000:14.1f}  {package}")
+
+    failures = []
+    if best["total_us"] / 1000 > args.budget_ms:
+        failures.append(f"total import time {best['total_us'] / 1000:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+    for module in LAZY_MODULES:
+        if module in best["modules"]:
+            failures.append(f"{module} is imported at startup (should load on first use)")
+
+    print()
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if not failures:
+        print(f"ok   within {args.budget_ms:.0f} ms budget; no eager heavy imports")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+Rebuild the post embedding index from the database.
+
+New posts are indexed incrementally as they are analyzed, each with the IDF
+weights of the moment. Run this to backfill posts that predate the index, after
+changing EMBEDDING_DIM, or now and then to re-weight every post with the IDF of
+the whole corpus:
+    python scripts/rebuild_embeddings.py
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sqlalchemy import select
+from app.database import SessionLocal
+from app import models
+from app.services.embedding_service import EmbeddingService, post_embedding_fields
+
+BATCH_SIZE = 2000
+
+
+def iter_posts(db):
+    """Posts in id order, one batch at a time"""
+    last_id = 0
+    while True:
+        batch = db.execute(
+            select(models.Post).where(models.Post.id > last_id).order_by(models.Post.id).limit(BATCH_SIZE)
+        ).scalars().all()
+        if not batch:
+            return
+        yield [post_embedding_fields(post) for post in batch]
+        last_id = batch[-1].id
+        db.expunge_all()
+
+
+def rebuild() -> None:
+    service = EmbeddingService()
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        # Pass 1: document frequency of every hash bucket
+        df = np.zeros(service.dim, dtype=np.int64)
+        total = 0
+        for posts in iter_posts(db):
+            for post in posts:
+                buckets = {bucket for bucket, _ in service.hashed_terms(post)}
+                df[list(buckets)] += 1
+            total += len(posts)
+        idf = np.log((1.0 + total) / (1.0 + df)) + 1.0
+
+        # Pass 2: embed with corpus-wide IDF and swap the index file
+        def batches():
+            for posts in iter_posts(db):
+                vectors = np.array([service.embed(post, idf) for post in posts], dtype=np.float32)
+                keep = vectors.any(axis=1)
+                yield np.array([post["id"] for post in posts])[keep], vectors[keep]
+
+        written = service.index.rewrite(batches())
+    finally:
+        db.close()
+    print(f"Indexed {written} of {total} posts into {service.index.path} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    rebuild()
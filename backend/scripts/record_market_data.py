@@ -0,0 +1,43 @@
+"""
+Record live market data into replay files for the offline "replay" provider.
+
+    python scripts/record_market_data.py AAPL MSFT NVDA
+
+Then run with MARKET_DATA_PROVIDER=replay to serve the recording without network.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.market_data_providers import YFinanceProvider, ReplayProvider
+
+
+def main():
+    """Fetch bars and fundamentals for each ticker and write them to MARKET_DATA_REPLAY_DIR"""
+    tickers = [t.upper() for t in sys.argv[1:]]
+    if not tickers:
+        print("Usage: python scripts/record_market_data.py TICKER [TICKER ...]")
+        sys.exit(1)
+    
+    live = YFinanceProvider()
+    replay = ReplayProvider(synthesize=False)
+    
+    bars_by_ticker = live.fetch_bars_bulk({ticker: None for ticker in tickers})
+    for ticker in tickers:
+        bars = bars_by_ticker.get(ticker)
+        if bars is None or len(bars) == 0:
+            print(f"⚠️  {ticker}: no bars returned, skipping")
+            continue
+        try:
+            fundamentals = live.fetch_fundamentals(ticker)
+        except Exception as e:
+            print(f"⚠️  {ticker}: could not fetch fundamentals ({e}), recording bars only")
+            fundamentals = None
+        replay.record(ticker, bars, fundamentals)
+        print(f"✅ {ticker}: recorded {len(bars)} bars")
+    
+    print(f"\nReplay data written to {replay.root}")
+
+
+if __name__ == "__main__":
+    main()
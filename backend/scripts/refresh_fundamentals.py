@@ -0,0 +1,36 @@
+"""
+Daily refresh job for ticker fundamentals and earnings dates.
+
+Run once a day (cron / Kubernetes CronJob), separately from the API workers:
+    python scripts/refresh_fundamentals.py            # all known tickers
+    python scripts/refresh_fundamentals.py AAPL MSFT  # specific tickers
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.fundamentals_service import FundamentalsService
+
+
+def main():
+    """Refresh fundamentals for the given tickers, or every known ticker"""
+    service = FundamentalsService()
+    tickers = [t.upper() for t in sys.argv[1:]] or service.known_tickers()
+    
+    if not tickers:
+        print("No tickers to refresh")
+        return
+    
+    print(f"Refreshing fundamentals for {len(tickers)} tickers...")
+    start_time = time.time()
+    refreshed = service.refresh(tickers)
+    elapsed = time.time() - start_time
+    
+    print(f"✅ Refreshed {refreshed}/{len(tickers)} tickers in {elapsed:.1f}s")
+    if refreshed < len(tickers):
+        print(f"⚠️  {len(tickers) - refreshed} tickers failed (rate limits or unknown symbols)")
+
+
+if __name__ == "__main__":
+    main()
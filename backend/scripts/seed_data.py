@@ -10,7 +10,7 @@ from app.database import SessionLocal
 from app import models
 from datetime import datetime, timedelta, timezone
 import random
-import bcrypt
+from app.services.auth_service import get_password_hash
 
 # Dummy user data
 DUMMY_USERS = [
@@ -219,9 +219,8 @@ def create_dummy_users(db: Session):
             continue
         
         # Create user with hashed password
-        # Use bcrypt directly to avoid passlib issues
         password = "pass123"  # Default password for all dummy users
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        hashed_password = get_password_hash(password)  # Honors BCRYPT_ROUNDS
         
         db_user = models.User(
             username=user_data["username"],